@@ -4,6 +4,8 @@ from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import event
 import os
 
 # Load environment variables from .env file
@@ -12,6 +14,13 @@ load_dotenv()
 # Setup of key Flask object (app)
 app = Flask(__name__)
 
+# Behind nginx, trust this many X-Forwarded-For hops so request.remote_addr is the client.
+# Only safe while the app port is reachable through nginx alone, otherwise clients can forge the
+# header; docker-compose.yml publishes 8203 on the host's loopback for that reason
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES') or 0)
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
 # Initialize Flask-Login object
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -60,8 +69,41 @@ app.config['SQLALCHEMY_DATABASE_STRING'] = dbString
 app.config['SQLALCHEMY_DATABASE_URI'] = dbURI
 app.config['SQLALCHEMY_BACKUP_URI'] = backupURI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Connection pool; pre-ping and recycle keep MySQL from handing out connections it has dropped
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 20),
+    'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),  # seconds to wait for a free connection
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),  # seconds, below MySQL's wait_timeout
+    'pool_pre_ping': dbURI.startswith('mysql'),
+}
+# SQLite connection settings, applied to every new connection by set_sqlite_pragmas below
+# WAL lets readers and one writer work at once; NORMAL still survives crashes of the app
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)  # ms to wait for a lock
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)  # bytes
+app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE') or -64000)  # negative: KiB per connection
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+# Versioned schema in migrations/, applied at startup by `flask custom init_db` (model/schema.py)
+# Batch mode lets autogenerated migrations alter SQLite tables, which lack most ALTER TABLE forms
+migrate = Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'), render_as_batch=True)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Applies the SQLITE_* settings to a new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+        cursor.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+        cursor.execute(f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT'])}")
+        cursor.execute(f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}")
+        cursor.execute(f"PRAGMA cache_size={int(app.config['SQLITE_CACHE_SIZE'])}")
+    finally:
+        cursor.close()
+
+with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
 
 # Image upload settings 
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # maximum size of uploaded content
@@ -69,6 +111,70 @@ app.config['UPLOAD_EXTENSIONS'] = ['.jpg', '.png', '.gif']  # supported file typ
 # os.system('rm -rf ' + os.path.join(app.instance_path, 'uploads'))
 app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Content-addressed store for drawings, see model/blob_store.py
+app.config['BLOB_FOLDER'] = os.path.join(app.instance_path, 'blobs')
+os.makedirs(app.config['BLOB_FOLDER'], exist_ok=True)
+# Background threads generating resized image variants, see model/thumbnails.py
+app.config['THUMBNAIL_WORKERS'] = int(os.environ.get('THUMBNAIL_WORKERS') or 2)
+# When set (e.g. '/_blobs/'), blob downloads are handed to nginx with X-Accel-Redirect
+app.config['BLOB_ACCEL_REDIRECT'] = os.environ.get('BLOB_ACCEL_REDIRECT') or None
+
+# Streamed table backups, see model/backup.py
+app.config['BACKUP_FOLDER'] = os.environ.get('BACKUP_FOLDER') or os.path.join(app.instance_path, 'backup')
+app.config['BACKUP_COMPRESSION'] = os.environ.get('BACKUP_COMPRESSION') or 'gzip'  # gzip, zstd or none
+# Online SQLite file snapshots, see model/snapshots.py
+app.config['SNAPSHOT_FOLDER'] = os.environ.get('SNAPSHOT_FOLDER') or os.path.join(app.instance_path, 'snapshots')
+app.config['SNAPSHOT_RETENTION'] = int(os.environ.get('SNAPSHOT_RETENTION') or 7)  # full snapshots kept
+app.config['SNAPSHOT_FULL_EVERY'] = int(os.environ.get('SNAPSHOT_FULL_EVERY') or 24)  # increments between full snapshots
+app.config['SNAPSHOT_PAGE_STEP'] = 1024  # pages copied per backup step
+app.config['SNAPSHOT_STEP_SLEEP'] = 0.005  # seconds between steps, letting other connections in
+app.config['SNAPSHOT_MAX_RESTARTS'] = 5  # paged copies restarted by writes before copying in one step
+app.config['SNAPSHOT_BUSY_TIMEOUT'] = 30  # seconds to wait for a lock
+
+# Competition settings
+# 'database' shares running rounds between gunicorn workers, 'memory' keeps them in-process
+app.config['COMPETITION_SESSION_STORE'] = os.environ.get('COMPETITION_SESSION_STORE') or 'database'
+# Seconds a cached leaderboard/times response may lag writes made outside this process; 0 disables caching
+app.config['LEADERBOARD_CACHE_TTL'] = int(os.environ.get('LEADERBOARD_CACHE_TTL') or 5)
+# With the database store, stream events are relayed through the stream_events table to every process
+app.config['STREAM_EVENT_RETENTION'] = int(os.environ.get('STREAM_EVENT_RETENTION') or 60)  # seconds kept
+
+# Blind trace reference image cache, see model/reference_images.py
+app.config['REFERENCE_CACHE_FOLDER'] = os.path.join(app.instance_path, 'reference_cache')
+app.config['REFERENCE_CACHE_TTL'] = int(os.environ.get('REFERENCE_CACHE_TTL') or 3600)  # seconds before revalidating
+app.config['REFERENCE_CACHE_MAX_BYTES'] = int(os.environ.get('REFERENCE_CACHE_MAX_BYTES') or 200 * 1024 * 1024)
+app.config['REFERENCE_CACHE_ENTRIES'] = int(os.environ.get('REFERENCE_CACHE_ENTRIES') or 64)  # decoded arrays kept in memory
+app.config['REFERENCE_FETCH_TIMEOUT'] = 5  # seconds
+app.config['REFERENCE_CANVAS_SIZES'] = [(800, 500)]  # (width, height) of the drawing canvas
+
+# Logins, see model/passwords.py and api/rate_limit.py
+# Hashes made with another method or cost are replaced on the next successful login
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256'
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)  # cores hashing may use
+app.config['PASSWORD_HASH_QUEUE'] = 16  # checks waiting for a worker before logins get a 503
+app.config['PASSWORD_IMPORT_WORKERS'] = int(os.environ.get('PASSWORD_IMPORT_WORKERS') or os.cpu_count() or 1)  # bulk import processes
+app.config['LOGIN_RATE_LIMIT'] = True
+app.config['LOGIN_RATE_LIMIT_IP'] = (20, 60)  # (attempts, seconds) per client IP
+app.config['LOGIN_RATE_LIMIT_UID'] = (5, 60)  # (attempts, seconds) per uid tried from one client IP
+# Buckets live in each gunicorn worker, so with N workers a client gets up to N times these rates
+
+# API tokens, see model/token_revocation.py
+app.config['TOKEN_LIFETIME'] = 3600  # seconds, matches the cookie max_age
+app.config['TOKEN_REVOCATION_SYNC'] = int(os.environ.get('TOKEN_REVOCATION_SYNC') or 5)  # seconds between revocation list syncs
+app.config['TOKEN_REVOCATION_BLOOM_BITS'] = 1 << 20  # 128 KB; ~1% false positives at 100k live revocations
+
+# Authenticated user cache for token_required, see model/user_cache.py
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL') or 10)  # seconds; 0 disables caching
+app.config['USER_CACHE_SIZE'] = 1024  # users kept per process
+
+# Blind trace grading queue, see model/grading_queue.py
+# Jobs graded at once across every worker; each dispatcher's pool has at most this many processes
+app.config['GRADING_WORKERS'] = int(os.environ.get('GRADING_WORKERS') or 2)
+# Run a dispatcher in this process; the SSE stream service turns it off (docker-compose.yml)
+app.config['GRADING_DISPATCHER'] = (os.environ.get('GRADING_DISPATCHER') or '1') != '0'
+app.config['GRADING_QUEUE_MAX'] = int(os.environ.get('GRADING_QUEUE_MAX') or 200)  # queued jobs before POSTs get a 429
+app.config['GRADING_MAX_ATTEMPTS'] = 3
+app.config['GRADING_JOB_TIMEOUT'] = 120  # seconds before a running job is presumed lost and requeued
 
 # GITHUB settings
 app.config['GITHUB_API_URL'] = 'https://api.github.com'
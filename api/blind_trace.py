@@ -1,25 +1,40 @@
 import traceback
 import base64
-import io
-import numpy as np
-from flask import Blueprint, request, jsonify, g
+import os
+from flask import Blueprint, request, jsonify, g, current_app, send_file
 from flask_restful import Api, Resource
 from datetime import datetime
-from __init__ import db
+from __init__ import app, db
 from api.jwt_authorize import token_required
-from model.blind_trace import BlindTraceSubmission
-from PIL import Image
-import requests
+from model.blind_trace import BlindTraceSubmission, GradingJob
+from model.blob_store import blob_delete, blob_in_use, blob_path, blob_relpath
+from model.grading_queue import GradingQueue, QueueFull
+from model.thumbnails import THUMBNAIL_SIZES, delete_variants, is_valid_size, variant_for
+from PIL import UnidentifiedImageError
 
 # Blueprint & API Initialization
 blind_trace_api = Blueprint('blind_trace_api', __name__, url_prefix='/api/blind_trace')
 api = Api(blind_trace_api)
 
+# Submissions are graded off the request thread, in a process pool fed from the database
+grading_queue = GradingQueue(
+    workers=app.config['GRADING_WORKERS'],
+    max_queued=app.config['GRADING_QUEUE_MAX'],
+    max_attempts=app.config['GRADING_MAX_ATTEMPTS'],
+    job_timeout=app.config['GRADING_JOB_TIMEOUT'],
+    dispatch=app.config['GRADING_DISPATCHER']
+)
+
+@blind_trace_api.before_app_request
+def start_grading_dispatcher():
+    """Resume queued grading as soon as this worker serves its first request, e.g. after a restart (unless GRADING_DISPATCHER is off)"""
+    grading_queue.start()
+
 class BlindTraceAPI:
     class _Submission(Resource):
         @token_required()
         def post(self):
-            """Submit a drawing, grade it using SSIM, and store the result"""
+            """Accept a drawing for grading; the score is filled in by the grading queue"""
             current_user = g.current_user
             data = request.get_json()
 
@@ -27,42 +42,31 @@ class BlindTraceAPI:
             if not data or "image_url" not in data or "drawing" not in data:
                 return {"message": "Missing required fields", "error": "Bad Request"}, 400
 
+            if grading_queue.is_full():
+                return {"message": "Too many submissions are waiting to be graded", "error": "Too Many Requests"}, 429, {"Retry-After": "5"}
+
             try:
-                # Decode base64 drawing
-                drawing_data = base64.b64decode(data["drawing"].split(",")[1])
-                drawing_img = Image.open(io.BytesIO(drawing_data)).convert("L")  # Convert to grayscale
-
-                # Fetch reference image
-                reference_img = Image.open(io.BytesIO(requests.get(data["image_url"]).content)).convert("L")
-
-                # Resize to match dimensions
-                reference_img = reference_img.resize(drawing_img.size)
-
-                # Convert images to numpy arrays
-                drawing_arr = np.array(drawing_img)
-                reference_arr = np.array(reference_img)
-
-                # Compute Mean Squared Error (MSE)
-                mse = np.mean((drawing_arr - reference_arr) ** 2)
-                max_mse = np.prod(drawing_arr.shape) * 255**2  # Max possible MSE for 8-bit images
-                score = round(100 * (1 - mse / max_mse), 2)  # Normalize to percentage
-
-                # Save submission
-                submission = BlindTraceSubmission(
-                    user_id=current_user.id,
-                    image_url=data["image_url"],
-                    drawing=data["drawing"],
-                    score=score,
-                    submission_time=datetime.utcnow()
-                )
-                db.session.add(submission)
-                db.session.commit()
+                # Decode the drawing once and keep it as a PNG in the blob store; the grader reads it from there
+                try:
+                    submission = BlindTraceSubmission(
+                        user_id=current_user.id,
+                        image_url=data["image_url"],
+                        drawing_bytes=base64.b64decode(data["drawing"].split(",")[-1])
+                    )
+                except (ValueError, UnidentifiedImageError):
+                    return {"message": "Drawing is not a valid image", "error": "Bad Request"}, 400
+
+                try:
+                    grading_queue.enqueue(submission)
+                except QueueFull as e:
+                    return {"message": str(e), "error": "Too Many Requests"}, 429, {"Retry-After": "5"}
 
                 return {
-                    "message": "Submission graded",
-                    "score": score,
+                    "message": "Submission accepted for grading",
+                    "id": submission.id,
+                    "status_url": f"/api/blind_trace/submission/{submission.id}",
                     "submission": submission.read()
-                }, 201
+                }, 202
 
             except Exception as e:
                 db.session.rollback()
@@ -74,7 +78,8 @@ class BlindTraceAPI:
             """Retrieve all past submissions for the current user"""
             current_user = g.current_user
             try:
-                submissions = BlindTraceSubmission.query.filter_by(user_id=current_user.id).all()
+                submissions = BlindTraceSubmission.query.filter_by(user_id=current_user.id) \
+                    .order_by(BlindTraceSubmission.submission_time.desc()).all()
                 return {
                     "message": "Submissions retrieved successfully",
                     "submissions": [sub.read() for sub in submissions]
@@ -100,8 +105,14 @@ class BlindTraceAPI:
                 if submission.user_id != current_user.id:
                     return {"message": "Unauthorized to delete this submission", "error": "Forbidden"}, 403
 
+                drawing_hash = submission.drawing_hash
+                GradingJob.query.filter_by(submission_id=submission.id).delete()
                 db.session.delete(submission)
                 db.session.commit()
+                # Identical drawings share a blob, also with pictures; only remove it once unreferenced
+                if drawing_hash and not blob_in_use(drawing_hash):
+                    delete_variants(blob_path(drawing_hash))
+                    blob_delete(drawing_hash)
 
                 return {"message": "Submission deleted successfully"}, 200
 
@@ -110,5 +121,54 @@ class BlindTraceAPI:
                 traceback.print_exc()
                 return {"message": "Internal Server Error", "error": str(e)}, 500
 
+    class _SubmissionResult(Resource):
+        @token_required()
+        def get(self, submission_id):
+            """Poll one submission; status is 'pending' until graded, then 'graded' with a score or 'failed'"""
+            current_user = g.current_user
+            submission = BlindTraceSubmission.find_by_id(submission_id)
+            if not submission:
+                return {"message": "Submission not found", "error": "Not Found"}, 404
+            if submission.user_id != current_user.id and current_user.role != 'Admin':
+                return {"message": "Unauthorized to view this submission", "error": "Forbidden"}, 403
+            return submission.read(), 200
+
+    class _Drawing(Resource):
+        def get(self, drawing_hash):
+            """
+            Stream a submitted drawing from the blob store; nginx serves it when BLOB_ACCEL_REDIRECT is set.
+
+            ?size=thumb or ?size=medium returns a resized WebP variant, e.g. for the admin review table.
+            """
+            size = request.args.get('size')
+            if not is_valid_size(size):
+                return {
+                    "message": f"Unknown size, expected one of: original, {', '.join(THUMBNAIL_SIZES)}",
+                    "error": "Bad Request"
+                }, 400
+            try:
+                original = blob_path(drawing_hash)
+            except ValueError:
+                return {"message": "Drawing not found", "error": "Not Found"}, 404
+            if not os.path.exists(original) or not blob_in_use(drawing_hash):
+                return {"message": "Drawing not found", "error": "Not Found"}, 404
+
+            # Content-addressed, so the bytes behind a URL never change
+            max_age = 365 * 24 * 3600
+            path, variant_mime_type = variant_for(original, size)
+            mime_type = variant_mime_type or 'image/png'
+            etag = f"{drawing_hash}-{size}" if variant_mime_type else drawing_hash
+            accel_prefix = current_app.config['BLOB_ACCEL_REDIRECT']
+            if accel_prefix:
+                resp = current_app.response_class(mimetype=mime_type)
+                resp.headers['X-Accel-Redirect'] = accel_prefix + blob_relpath(drawing_hash) + path[len(original):]
+                resp.set_etag(etag)
+                resp.cache_control.public = True
+                resp.cache_control.max_age = max_age
+                return resp
+            return send_file(path, mimetype=mime_type, etag=etag, max_age=max_age, conditional=True)
+
     # Register API endpoint
     api.add_resource(_Submission, '/submission')
+    api.add_resource(_SubmissionResult, '/submission/<int:submission_id>')
+    api.add_resource(_Drawing, '/drawing/<string:drawing_hash>')
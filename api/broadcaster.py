@@ -0,0 +1,168 @@
+import json
+import queue
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from __init__ import app
+from model.leaderboard import LeaderboardEntry
+
+
+class Broadcaster:
+    """
+    Fans competition events out to Server-Sent Events subscribers.
+
+    One background thread reads the running rounds from the timer engine once
+    per tick (a single store read, whatever the number of listeners) and
+    pushes a `tick` to each subscribed user, followed by `round_end` when the
+    clock runs out.  Leaderboard changes are pushed to everyone after commit.
+
+    With an event bus (the database session store), published events go through
+    the bus and each tick relays the new ones to this process's subscribers, so a
+    round started on one worker reaches a stream held by another.  Ticks need no
+    relay: every process reads them from the shared store itself.
+
+    Each subscriber is a bounded queue; a slow client drops events instead of
+    holding memory.  Connections block on their queue, so idle streams cost
+    nothing but a socket and a greenlet under the gevent worker that serves
+    /api/competition/stream (see docker-compose.yml); on a threaded worker each
+    open stream holds one of its threads.
+    """
+
+    def __init__(self, timer_engine, interval=1.0, queue_size=100, bus=None):
+        self._engine = timer_engine
+        self._interval = interval
+        self._queue_size = queue_size
+        self._bus = bus
+        self._last_event_id = 0  # newest bus event already relayed
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user key -> set of queues
+        self._active = set()    # user keys with a round on the clock at the last tick
+        self._thread = None
+
+    def subscribe(self, user_id):
+        """Register a listener for `user_id` and return its event queue"""
+        listener = queue.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.setdefault(str(user_id), set()).add(listener)
+            if self._thread is None:
+                if self._bus is not None:
+                    # Relay only what is published from now on
+                    self._last_event_id = self._bus.last_id()
+                self._thread = threading.Thread(target=self._run, name='competition-broadcaster', daemon=True)
+                self._thread.start()
+        return listener
+
+    def unsubscribe(self, user_id, listener):
+        with self._lock:
+            listeners = self._subscribers.get(str(user_id))
+            if listeners:
+                listeners.discard(listener)
+                if not listeners:
+                    del self._subscribers[str(user_id)]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(listeners) for listeners in self._subscribers.values())
+
+    def publish(self, name, data, user_id=None):
+        """Send an event to one user's listeners, or to everyone when user_id is None"""
+        self._publish_all([(name, data, user_id)])
+
+    def _publish_all(self, events):
+        if self._bus is None:
+            for name, data, user_id in events:
+                self._deliver(name, json.dumps(data), user_id)
+            return
+        try:
+            self._bus.publish([(name, json.dumps(data), None if user_id is None else str(user_id))
+                               for name, data, user_id in events])
+        except Exception as e:
+            print(f"Broadcaster publish failed: {str(e)}")
+
+    def _deliver(self, name, data, user_id=None):
+        """Queue a JSON-encoded event for this process's listeners"""
+        message = f"event: {name}\ndata: {data}\n\n"
+        with self._lock:
+            if user_id is None:
+                targets = [l for listeners in self._subscribers.values() for l in listeners]
+            else:
+                targets = list(self._subscribers.get(str(user_id), ()))
+        for listener in targets:
+            try:
+                listener.put_nowait(message)
+            except queue.Full:
+                pass  # slow client; it will catch up on the next tick
+
+    def _run(self):
+        while True:
+            time.sleep(self._interval)
+            with self._lock:
+                watched = set(self._subscribers)
+            try:
+                with app.app_context():
+                    self._relay()
+                    if watched:
+                        self._tick(watched)
+            except Exception as e:
+                print(f"Broadcaster tick failed: {str(e)}")
+
+    def _relay(self):
+        """Deliver the bus events published since the last tick, from any process"""
+        if self._bus is None:
+            return
+        events, self._last_event_id = self._bus.read_since(self._last_event_id)
+        for name, data, user_key in events:
+            self._deliver(name, data, user_key)
+
+    def _tick(self, watched):
+        now = self._engine.store.clock()
+        active = set()
+        for session in self._engine.store.sessions():
+            key = str(session.key)
+            if key not in watched:
+                continue
+            if session.is_active(now):
+                active.add(key)
+                self._deliver('tick', json.dumps({
+                    "time_remaining": session.time_remaining(now),
+                    "is_active": True
+                }), user_id=key)
+            elif key in self._active:
+                self._deliver('round_end', json.dumps({"word": session.word, "duration": session.duration}),
+                              user_id=key)
+        self._active = active
+
+    def watch_leaderboard(self):
+        """Publish committed LeaderboardEntry changes as `leaderboard` events"""
+        pending = f"leaderboard_events_{id(self)}"
+
+        def collect(mapper, connection, target):
+            session = object_session(target)
+            if session is not None:
+                session.info.setdefault(pending, []).append({
+                    "id": target.id,
+                    "profile_name": target.profile_name,
+                    "drawing_name": target.drawing_name,
+                    "score": target.score,
+                    "created_by": target.created_by,
+                    "is_deleted": target.is_deleted
+                })
+
+        for name in ('after_insert', 'after_update'):
+            event.listen(LeaderboardEntry, name, collect)
+
+        @event.listens_for(Session, 'do_orm_execute')
+        def collect_bulk(state):
+            if not state.is_select and LeaderboardEntry.__mapper__ in state.all_mappers:
+                state.session.info.setdefault(pending, []).append({"rebuilt": True})
+
+        @event.listens_for(Session, 'after_commit')
+        def flush(session):
+            deltas = session.info.pop(pending, [])
+            if deltas:
+                self._publish_all([('leaderboard', delta, None) for delta in deltas])
+
+        @event.listens_for(Session, 'after_rollback')
+        def discard(session):
+            session.info.pop(pending, None)
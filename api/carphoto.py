@@ -3,6 +3,7 @@ from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.user import User
 from model.carPhoto import car_base64_decode, car_base64_upload, car_file_delete, default_car_decode
+from model.thumbnails import THUMBNAIL_SIZES, is_valid_size
 
 car_api = Blueprint('car_photo_api', __name__, url_prefix='/api/id')
 api = Api(car_api)
@@ -26,15 +27,20 @@ class _CarPhoto(Resource):
     - HTTP status code 200 if the Car picture is successfully retrieved.
     - HTTP status code 404 if the Car picture is not set for the current user.
     - HTTP status code 500 if an error occurs while reading the Car picture from the server.
+
+    An optional ?size= query parameter (thumb, medium) returns a resized variant instead of the original.
     """
     @token_required()
     def get(self):
         current_user = g.current_user
+        size = request.args.get('size')
+        if not is_valid_size(size):
+            return {'message': f"Unknown size, expected one of: original, {', '.join(THUMBNAIL_SIZES)}"}, 400
         if not current_user.car or current_user.car == "":
             return {"message": "Car picture is not set.",
                     "car": default_car_decode()}, 404
         
-        base64_encode = car_base64_decode(current_user.uid, current_user.car)
+        base64_encode = car_base64_decode(current_user.uid, current_user.car, size)
 
         if not base64_encode:
             return {'message': 'An error occurred while reading the car picture.'}, 500
@@ -1,13 +1,19 @@
-from flask import Flask, request, jsonify, make_response, g
+from flask import Flask, request, jsonify, make_response, g, Response
 from flask_restful import Api, Resource
 from flask import Blueprint
 from flask_cors import CORS
 from __init__ import app, db
-import threading
+import json
 import os
+import queue
 import time
 from model.competition import Time
+from model.timer import TimerEngine
+from model.session_store import create_session_store
+from model.stream_events import create_event_bus
 from api.jwt_authorize import token_required
+from api.response_cache import leaderboard_cache
+from api.broadcaster import Broadcaster
 import random
 
 # Initialize a Flask application
@@ -22,26 +28,16 @@ WORDS = [
 competitors_api = Blueprint('competitors_api', __name__, url_prefix='/api')
 api = Api(competitors_api)
 
-# Global timer state
-timer_state = {
-    "time_remaining": 0,
-    "is_active": False
-}
+# Per-user timers, keyed by user id; remaining time is computed on read
+timer_engine = TimerEngine(create_session_store())
 
-# Change the timer_durations to store both duration and word
-timer_durations = {}  # Will store {user_id: {'duration': int, 'word': str}}
+# Single fan-out source for /competition/stream; ticks read the store once for all listeners,
+# and events published by any process reach every process's streams through the event bus
+broadcaster = Broadcaster(timer_engine, bus=create_event_bus())
+broadcaster.watch_leaderboard()
 
-def timer_thread(duration):
-    """Background thread to handle the countdown."""
-    global timer_state
-    timer_state["is_active"] = True
-    timer_state["time_remaining"] = duration
-
-    while timer_state["time_remaining"] > 0 and timer_state["is_active"]:
-        time.sleep(1)
-        timer_state["time_remaining"] -= 1
-
-    timer_state["is_active"] = False
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT = 15
 
 class CompetitionAPI:
     """Define the API CRUD endpoints for the Competition model"""
@@ -67,16 +63,10 @@ class CompetitionAPI:
                         "error": "Bad Request"
                     }, 400
 
-                # Store both duration and word for this user
+                # Start (or restart) this user's round with a random word
                 word = random.choice(WORDS)
-                timer_durations[current_user.id] = {
-                    'duration': duration,
-                    'word': word
-                }
-
-                # Start timer thread
-                thread = threading.Thread(target=timer_thread, args=(duration,))
-                thread.start()
+                timer_engine.start(current_user.id, duration, word, user_name=current_user.name)
+                broadcaster.publish('round_start', {"duration": duration, "word": word}, user_id=current_user.id)
 
                 return {
                     "message": "Timer started",
@@ -93,10 +83,12 @@ class CompetitionAPI:
         @token_required()
         def get(self):
             """Get current timer status"""
+            current_user = g.current_user
             try:
+                status = timer_engine.status(current_user.id)
                 return {
-                    "time_remaining": timer_state["time_remaining"],
-                    "is_active": timer_state["is_active"]
+                    "time_remaining": status["time_remaining"],
+                    "is_active": status["is_active"]
                 }, 200
             except Exception as e:
                 return {
@@ -109,28 +101,24 @@ class CompetitionAPI:
             """Stop timer and save time entry"""
             current_user = g.current_user
             try:
-                timer_data = timer_durations.get(current_user.id)
-                if timer_data is None:
+                session, time_taken = timer_engine.stop(current_user.id)
+                if session is None:
                     return {
                         "message": "No timer data found",
                         "error": "Bad Request"
                     }, 400
 
-                duration = timer_data['duration']
-                time_taken = duration - timer_state["time_remaining"]
-                timer_state["is_active"] = False
-
                 # Create time entry with word
                 new_time = Time(
                     users_name=current_user.name,
-                    timer_duration=duration,
+                    timer_duration=session.duration,
                     time_taken=time_taken,
-                    drawn_word=timer_data['word'],  # Add the word
+                    drawn_word=session.word,  # Add the word
                     created_by=current_user.id
                 )
                 
                 new_time.create()
-                del timer_durations[current_user.id]
+                broadcaster.publish('round_end', new_time.read(), user_id=current_user.id)
 
                 return {
                     "message": "Timer stopped and time saved",
@@ -149,8 +137,9 @@ class CompetitionAPI:
         def get(self):
             """Get all times ordered by fastest completion"""
             try:
-                entries = Time.query.order_by(Time.time_taken.asc()).all()
-                return [entry.read() for entry in entries]
+                return leaderboard_cache.response(
+                    lambda: [entry.read() for entry in Time.query.order_by(Time.time_taken.asc()).all()]
+                )
             except Exception as e:
                 return []
 
@@ -190,7 +179,34 @@ class CompetitionAPI:
                     "error": str(e)
                 }, 500
 
+    class _Stream(Resource):
+        @token_required()
+        def get(self):
+            """Server-Sent Events stream of timer ticks, round start/end and leaderboard changes"""
+            user_id = g.current_user.id
+            status = timer_engine.status(user_id)
+            listener = broadcaster.subscribe(user_id)
+
+            def events():
+                try:
+                    yield "retry: 3000\n\n"
+                    yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                    while True:
+                        try:
+                            yield listener.get(timeout=STREAM_HEARTBEAT)
+                        except queue.Empty:
+                            yield ": keep-alive\n\n"
+                finally:
+                    broadcaster.unsubscribe(user_id, listener)
+
+            return Response(
+                events(),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
     # Register API endpoints
     api.add_resource(_Timer, '/competition/timer')
+    api.add_resource(_Stream, '/competition/stream')
     api.add_resource(_Times, '/competition/times')
 
@@ -1,5 +1,5 @@
 import traceback
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, g
 from flask_restful import Api, Resource
 from datetime import datetime
 from __init__ import app
@@ -32,7 +32,7 @@ class GuessAPI:
                 data = request.get_json()
 
                 if not data or "user_guess" not in data or "correct_word" not in data:
-                    return jsonify({"message": "Missing required fields", "error": "Bad Request"}), 400
+                    return {"message": "Missing required fields", "error": "Bad Request"}, 400
 
                 guess = data["user_guess"].strip().lower()
                 correct_word = data["correct_word"].strip().lower()
@@ -50,17 +50,17 @@ class GuessAPI:
                 db.session.add(word_guess)
                 db.session.commit()  # Commit to database
 
-                return jsonify({
+                return {
                     "message": "Guess submitted successfully",
                     "guess": word_guess.read(),
                     "correct": is_correct
-                }), 201
+                }, 201
 
             except Exception as e:
                 db.session.rollback()  # Rollback any failed transactions
                 print("Error occurred while submitting guess:", str(e))
                 traceback.print_exc()  # Debugging
-                return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
+                return {"message": "Internal Server Error", "error": str(e)}, 500
                 
         @token_required()
         def get(self):
@@ -70,17 +70,17 @@ class GuessAPI:
                 guesses = Guess.query.filter_by(created_by=current_user.id).all()
 
                 if not guesses:
-                    return jsonify({"message": "No guesses found", "recent_guesses": []}), 200  
+                    return {"message": "No guesses found", "recent_guesses": []}, 200  
 
-                return jsonify({
+                return {
                     "message": "Guesses fetched successfully",
                     "recent_guesses": [guess.read() for guess in guesses]
-                }), 200
+                }, 200
 
             except Exception as e:
                 print("Error occurred while fetching guesses:", str(e))
                 traceback.print_exc()
-                return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
+                return {"message": "Internal Server Error", "error": str(e)}, 500
 
         @token_required()
         def put(self):
@@ -90,27 +90,27 @@ class GuessAPI:
                 data = request.get_json()
 
                 if not data or "id" not in data or "user_guess" not in data or "correct_word" not in data:
-                    return jsonify({"message": "Missing required fields", "error": "Bad Request"}), 400
+                    return {"message": "Missing required fields", "error": "Bad Request"}, 400
 
                 guess = Guess.query.get(data["id"])
                 if not guess:
-                    return jsonify({"message": "Guess not found", "error": "Not Found"}), 404
+                    return {"message": "Guess not found", "error": "Not Found"}, 404
 
                 if guess.created_by != current_user.id:
-                    return jsonify({"message": "Unauthorized to update this guess", "error": "Forbidden"}), 403
+                    return {"message": "Unauthorized to update this guess", "error": "Forbidden"}, 403
 
                 guess.guess = data["user_guess"].strip().lower()
                 guess.correct_answer = data["correct_word"].strip().lower()
                 guess.is_correct = (guess.guess == guess.correct_answer)
                 db.session.commit()  # Commit update
 
-                return jsonify({"message": "Guess updated successfully", "guess": guess.read()}), 200
+                return {"message": "Guess updated successfully", "guess": guess.read()}, 200
 
             except Exception as e:
                 db.session.rollback()
                 print("Error occurred while updating guess:", str(e))
                 traceback.print_exc()
-                return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
+                return {"message": "Internal Server Error", "error": str(e)}, 500
 
         @token_required()
         def delete(self):
@@ -120,25 +120,25 @@ class GuessAPI:
                 data = request.get_json()
 
                 if not data or "id" not in data:
-                    return jsonify({"message": "Missing required fields", "error": "Bad Request"}), 400
+                    return {"message": "Missing required fields", "error": "Bad Request"}, 400
 
                 guess = Guess.query.get(data["id"])
                 if not guess:
-                    return jsonify({"message": "Guess not found", "error": "Not Found"}), 404
+                    return {"message": "Guess not found", "error": "Not Found"}, 404
 
                 if guess.created_by != current_user.id:
-                    return jsonify({"message": "Unauthorized to delete this guess", "error": "Forbidden"}), 403
+                    return {"message": "Unauthorized to delete this guess", "error": "Forbidden"}, 403
 
                 db.session.delete(guess)
                 db.session.commit()  # Commit delete
 
-                return jsonify({"message": "Guess deleted successfully"}), 200
+                return {"message": "Guess deleted successfully"}, 200
 
             except Exception as e:
                 db.session.rollback()
                 print("Error occurred while deleting guess:", str(e))
                 traceback.print_exc()
-                return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
+                return {"message": "Internal Server Error", "error": str(e)}, 500
 
     # Register API endpoints
     api.add_resource(_CRUD, '/guess')
\ No newline at end of file
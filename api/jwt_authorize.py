@@ -2,7 +2,8 @@ from flask import request
 from flask import current_app, g
 from functools import wraps
 import jwt
-from model.user import User
+from model.user_cache import get_user
+from model.token_revocation import revocation_list
 
 def token_required(roles=None):
     """
@@ -12,14 +13,15 @@ def token_required(roles=None):
     
     1. Checks for the presence of a valid JWT token in the request cookie.
     2. Decodes the token and retrieves the user data.
-    3. Checks if the user data is found in the database.
-    4. Checks if the user has the required role.
-    5. Sets the current_user in the global context (Flask's g object).
-    6. Returns the decorated function if all checks pass.
+    3. Checks if the user data is found in the user cache or, on a miss, the database.
+    4. Checks the token has not been revoked (logout or token_version bump).
+    5. Checks if the user has the required role.
+    6. Sets the current_user and token claims in the global context (Flask's g object).
+    7. Returns the decorated function if all checks pass.
 
     Possible error responses:
     
-    - 401 / Unauthorized: token is missing or invalid.
+    - 401 / Unauthorized: token is missing, invalid or revoked.
     - 403 / Forbidden: user has insufficient permissions.
     - 500 / Internal Server Error: something went wrong with the token decoding.
 
@@ -41,7 +43,8 @@ def token_required(roles=None):
 
             try:
                 data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
-                current_user = User.query.filter_by(_uid=data["_uid"]).first()
+                # Snapshot of id/uid/name/role from the per-process cache; other attributes load the row
+                current_user = get_user(data["_uid"], data.get("ver", 0))
                 if not current_user:
                     return {
                         "message": "User not found",
@@ -49,6 +52,14 @@ def token_required(roles=None):
                         "data": data
                     }, 401
 
+                # Logged out, or issued before the user's tokens were revoked; both checks are in memory
+                if data.get("ver", 0) != current_user.token_version or \
+                        ("jti" in data and revocation_list.is_revoked(data["jti"])):
+                    return {
+                        "message": "Token has been revoked",
+                        "error": "Unauthorized"
+                    }, 401
+
                 if roles and current_user.role not in roles:
                     return {
                         "message": "User does not have the required role",
@@ -58,6 +69,7 @@ def token_required(roles=None):
 
                 # Authentication success, set the current_user in the global context (Flask's g object)
                 g.current_user = current_user
+                g.token = data
             except jwt.ExpiredSignatureError:
                 return {
                     "message": "Token has expired",
@@ -1,14 +1,29 @@
 from flask import Blueprint, request, g
 from flask_restful import Api, Resource
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from __init__ import app
 from api.jwt_authorize import token_required
+from api.response_cache import leaderboard_cache
 from model.leaderboard import LeaderboardEntry
 from model.competition import Time
 
 leaderboard_api = Blueprint('leaderboard_api', __name__, url_prefix='/api')
 api = Api(leaderboard_api)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def page_args():
+    """Read ?limit= and ?cursor= from the request, raising ValueError if invalid"""
+    limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    if not (1 <= limit <= MAX_PAGE_SIZE):
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    cursor = request.args.get('cursor') or None
+    if cursor:
+        LeaderboardEntry.decode_cursor(cursor)
+    return limit, cursor
+
 class LeaderboardAPI:
     class _CRUD(Resource):
         @token_required()
@@ -40,29 +55,36 @@ class LeaderboardAPI:
                         }, 404
 
                     # Calculate speed factor and scale to 1000 points
-                    speed_factor = competition_entry.timer_duration / competition_entry.time_taken
-                    score = min(1000, int(speed_factor * 500))
-
-                # Check if entry exists and update if necessary
-                existing_entry = LeaderboardEntry.query.filter_by(
-                    created_by=current_user.id,
-                    drawing_name=data['drawing_name']
-                ).first()
-
-                if existing_entry:
-                    if score > existing_entry.score:
-                        existing_entry.score = score
-                        existing_entry.update()
-                    return existing_entry.read(), 200
-                else:
-                    entry = LeaderboardEntry(
-                        profile_name=current_user.name,
-                        drawing_name=data['drawing_name'],
-                        score=score,
-                        created_by=current_user.id
+                    score = LeaderboardEntry.score_for(
+                        competition_entry.timer_duration,
+                        competition_entry.time_taken
                     )
-                    entry.create()
-                    return entry.read(), 201
+
+                for attempt in range(2):
+                    # Check if entry exists and update if necessary
+                    existing_entry = LeaderboardEntry.query.filter_by(
+                        created_by=current_user.id,
+                        drawing_name=data['drawing_name']
+                    ).first()
+
+                    if existing_entry:
+                        if score > existing_entry.score:
+                            existing_entry.score = score
+                            existing_entry.update()
+                        return existing_entry.read(), 200
+                    try:
+                        entry = LeaderboardEntry(
+                            profile_name=current_user.name,
+                            drawing_name=data['drawing_name'],
+                            score=score,
+                            created_by=current_user.id
+                        )
+                        entry.create()
+                        return entry.read(), 201
+                    except IntegrityError:
+                        if attempt:
+                            raise
+                        # A concurrent request created the entry first; update it instead
 
             except Exception as e:
                 return {
@@ -71,62 +93,9 @@ class LeaderboardAPI:
                 }, 500
 
         def get(self):
-            """Get leaderboard entries with calculated scores from competition data"""
+            """Get leaderboard entries grouped by word; scores are computed when results are saved"""
             try:
-                # Track deleted entries to prevent re-adding
-                deleted_entries = set()
-                competition_entries = Time.query.all()
-                print(f"Found {len(competition_entries)} competition entries")
-                result = {}
-
-                for entry in competition_entries:
-                    word = entry.drawn_word
-                    if word not in result:
-                        result[word] = []
-                        print(f"Processing word: {word}")
-
-                    # Skip if this entry was previously deleted from leaderboard
-                    entry_key = f"{entry.created_by}_{word}"
-                    if entry_key in deleted_entries:
-                        continue
-
-                    # Calculate speed factor: original_time/actual_time
-                    speed_factor = entry.timer_duration / entry.time_taken
-                    score = min(1000, int(speed_factor * 500))
-                    print(f"Speed factor for {entry.users_name}: {speed_factor:.2f}, Score: {score}")
-
-                    # Create or update leaderboard entry
-                    leaderboard_entry = LeaderboardEntry.query.filter_by(
-                        created_by=entry.created_by,
-                        drawing_name=word
-                    ).first()
-
-                    if leaderboard_entry and not leaderboard_entry.is_deleted:
-                        if score > leaderboard_entry.score:
-                            leaderboard_entry.score = score
-                            leaderboard_entry.update()
-                        result[word].append(leaderboard_entry.read())
-                    elif not leaderboard_entry:
-                        leaderboard_entry = LeaderboardEntry(
-                            profile_name=entry.users_name,
-                            drawing_name=word,
-                            score=score,
-                            created_by=entry.created_by,
-                            is_deleted=False
-                        )
-                        leaderboard_entry.create()
-                        result[word].append(leaderboard_entry.read())
-
-                # Sort each word's entries by score
-                for word in result:
-                    result[word] = sorted(
-                        result[word],
-                        key=lambda x: x['score'],
-                        reverse=True
-                    )
-
-                return result
-
+                return leaderboard_cache.response(LeaderboardEntry.get_grouped_rankings)
             except Exception as e:
                 print(f"Error in get method: {str(e)}")
                 return {}
@@ -171,4 +140,70 @@ class LeaderboardAPI:
                     "error": str(e)
                 }, 500
 
+    class _Word(Resource):
+        def get(self, word):
+            """Get one page of rankings for a word (?limit=&cursor=)"""
+            try:
+                limit, cursor = page_args()
+            except ValueError as e:
+                return {
+                    "message": "Invalid pagination parameters",
+                    "error": str(e)
+                }, 400
+
+            def build():
+                entries, next_cursor = LeaderboardEntry.get_word_page(word, limit, cursor)
+                return {
+                    "drawing_name": word,
+                    "entries": [entry.read() for entry in entries],
+                    "next_cursor": next_cursor
+                }
+            return leaderboard_cache.response(build)
+
+    class _Top(Resource):
+        def get(self):
+            """Get one page of the best scores across all words (?limit=&cursor=)"""
+            try:
+                limit, cursor = page_args()
+            except ValueError as e:
+                return {
+                    "message": "Invalid pagination parameters",
+                    "error": str(e)
+                }, 400
+
+            def build():
+                entries, next_cursor = LeaderboardEntry.get_top(limit, cursor)
+                return {
+                    "entries": [entry.read() for entry in entries],
+                    "next_cursor": next_cursor
+                }
+            return leaderboard_cache.response(build)
+
+    class _Rank(Resource):
+        @token_required()
+        def get(self, word):
+            """Get the current user's rank for a word"""
+            current_user = g.current_user
+            entry, rank = LeaderboardEntry.get_rank(current_user.id, word)
+            if entry is None:
+                return {
+                    "message": "No leaderboard entry for this drawing",
+                    "error": "Not Found"
+                }, 404
+
+            return {
+                "rank": rank,
+                "entry": entry.read()
+            }, 200
+
+    class _CacheStats(Resource):
+        @token_required("Admin")
+        def get(self):
+            """Hit/miss counters of the leaderboard response cache, for monitoring"""
+            return leaderboard_cache.stats(), 200
+
     api.add_resource(_CRUD, '/leaderboard')
+    api.add_resource(_CacheStats, '/leaderboard/cache')
+    api.add_resource(_Top, '/leaderboard/top')
+    api.add_resource(_Word, '/leaderboard/<string:word>')
+    api.add_resource(_Rank, '/leaderboard/<string:word>/rank')
@@ -3,6 +3,7 @@ from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.nestPost import NestPost
 from model.nestImg import nestImg_base64_decode, nestImg_base64_upload
+from model.thumbnails import THUMBNAIL_SIZES, is_valid_size
 
 nestImg_api = Blueprint('nestImg_api', __name__, url_prefix='/api/id')
 api = Api(nestImg_api)
@@ -33,9 +34,12 @@ class _NestImage(Resource):
         # Doesn't work since you can't add a body to a GET
         data = request.get_json()
         current_nestPost = NestPost.query.filter_by(id=data["imageID"]).first()
+        size = request.args.get('size')
+        if not is_valid_size(size):
+            return {'message': f"Unknown size, expected one of: original, {', '.join(THUMBNAIL_SIZES)}"}, 400
 
         if current_nestPost._image_url:
-            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url)
+            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url, size)
             if not base64_encode:
                 return {'message': 'An error occurred while reading the picture.'}, 500
             return {'postImg': base64_encode}, 200
@@ -47,9 +51,12 @@ class _NestImage(Resource):
         current_user = g.current_user
         data = request.get_json()
         current_nestPost = NestPost.query.filter_by(id=data["imageID"]).first()
+        size = request.args.get('size')
+        if not is_valid_size(size):
+            return {'message': f"Unknown size, expected one of: original, {', '.join(THUMBNAIL_SIZES)}"}, 400
 
         if current_nestPost._image_url:
-            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url)
+            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url, size)
             if not base64_encode:
                 return {'message': 'An error occurred while reading the picture.'}, 500
             return {'postImg': base64_encode}, 200
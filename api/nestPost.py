@@ -4,6 +4,7 @@ from flask_restful import Api, Resource  # used for REST API building
 from datetime import datetime
 from __init__ import app
 from api.jwt_authorize import token_required
+from api.post import page_args, page_response
 from model.nestPost import NestPost
 
 """
@@ -21,6 +22,15 @@ The Api object is connected to the Blueprint object to define the API endpoints.
 """
 api = Api(nestPost_api)
 
+def group_arg():
+    """Read the optional ?group_id= filter, raising ValueError if it is not an integer"""
+    group_id = request.args.get('group_id')
+    if not group_id:
+        return None
+    if not group_id.isdigit():
+        raise ValueError("group_id must be an integer")
+    return int(group_id)
+
 class NestPostAPI:
     """
     Define the API CRUD endpoints for the Post model.
@@ -48,12 +58,16 @@ class NestPostAPI:
         def get(self):
             # Obtain the current user
             current_user = g.current_user
-            # Find all the posts by the current user
-            posts = NestPost.query.filter(NestPost._user_id == current_user.id).all()
-            # Prepare a JSON list of all the posts, uses for loop shortcut called list comprehension
-            json_ready = [post.read() for post in posts]
+            try:
+                group_id = group_arg()
+                limit, after_id = page_args()
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            # Find the posts by the current user, with user and group names, in one query
+            posts, next_after_id = NestPost.list_posts(
+                user_id=current_user.id, group_id=group_id, limit=limit, after_id=after_id)
             # Return a JSON list, converting Python dictionaries to JSON format
-            return jsonify(json_ready)
+            return page_response(posts, next_after_id, limit)
 
         @token_required()
         def put(self):
@@ -86,9 +100,26 @@ class NestPostAPI:
             # Return response
             return jsonify({"message": "Post deleted"})
 
+    class _LIST(Resource):
+        def get(self):
+            """
+            Retrieve all posts, optionally only one group's with ?group_id=,
+            and a page at a time with ?limit= and ?after_id=.
+            """
+            try:
+                group_id = group_arg()
+                limit, after_id = page_args()
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            # Find the posts, with user and group names, in one query
+            posts, next_after_id = NestPost.list_posts(group_id=group_id, limit=limit, after_id=after_id)
+            # Return a JSON list, converting Python dictionaries to JSON format
+            return page_response(posts, next_after_id, limit)
+
     """
-    Map the _CRUD class to the API endpoints for /post.
+    Map the _CRUD and _LIST classes to the API endpoints for /nestPost and /nestPosts.
     - The API resource class inherits from flask_restful.Resource.
     - The _CRUD class defines the HTTP methods for the API.
     """
-    api.add_resource(_CRUD, '/nestPost')
\ No newline at end of file
+    api.add_resource(_CRUD, '/nestPost')
+    api.add_resource(_LIST, '/nestPosts')
\ No newline at end of file
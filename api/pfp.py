@@ -3,6 +3,7 @@ from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.user import User
 from model.pfp import pfp_base64_decode, pfp_base64_upload, pfp_file_delete
+from model.thumbnails import THUMBNAIL_SIZES, is_valid_size
 
 pfp_api = Blueprint('pfp_api', __name__, url_prefix='/api/id')
 api = Api(pfp_api)
@@ -26,13 +27,18 @@ class _PFP(Resource):
     - HTTP status code 200 if the profile picture is successfully retrieved.
     - HTTP status code 404 if the profile picture is not set for the current user.
     - HTTP status code 500 if an error occurs while reading the profile picture from the server.
+
+    An optional ?size= query parameter (thumb, medium) returns a resized variant instead of the original.
     """
     @token_required()
     def get(self):
         current_user = g.current_user
+        size = request.args.get('size')
+        if not is_valid_size(size):
+            return {'message': f"Unknown size, expected one of: original, {', '.join(THUMBNAIL_SIZES)}"}, 400
 
         if current_user.pfp:
-            base64_encode = pfp_base64_decode(current_user.uid, current_user.pfp)
+            base64_encode = pfp_base64_decode(current_user.uid, current_user.pfp, size)
             if not base64_encode:
                 return {'message': 'An error occurred while reading the profile picture.'}, 500
             return {'pfp': base64_encode}, 200
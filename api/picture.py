@@ -1,13 +1,19 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app, send_file
 from flask_restful import Api, Resource
 from datetime import datetime
-import base64
+import io
+from PIL import UnidentifiedImageError
 from api.jwt_authorize import token_required
 from model.picture import Picture, db
+from model.blob_store import blob_path, blob_relpath
+from model.thumbnails import THUMBNAIL_SIZES, is_valid_size, schedule_variants, variant_for
 
 picture_api = Blueprint('picture_api', __name__, url_prefix='/api')
 api = Api(picture_api)
 
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
 class PictureAPI:
     class _CRUD(Resource):
         @token_required()
@@ -42,18 +48,21 @@ class PictureAPI:
                         "error": "Bad Request"
                     }, 400
 
-                image_bytes = file.read()
-                image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                image_data = f"data:image/png;base64,{image_base64}"
-
-                picture = Picture(
-                    user_name=current_user.name,
-                    drawing_name=data.get('drawing_name'),
-                    image_data=image_data,
-                    description=data.get('description')
-                )
+                try:
+                    picture = Picture(
+                        user_name=current_user.name,
+                        drawing_name=data.get('drawing_name'),
+                        image_bytes=file.read(),
+                        description=data.get('description')
+                    )
+                except UnidentifiedImageError:
+                    return {
+                        "message": "Invalid file type - must be an image",
+                        "error": "Bad Request"
+                    }, 400
                 
                 if picture.create():
+                    schedule_variants(blob_path(picture.image_hash))
                     return picture.read(), 201
                 return {
                     "message": "Failed to create picture entry",
@@ -68,10 +77,26 @@ class PictureAPI:
                 }, 500
 
         def get(self):
-            """Retrieve all pictures"""
+            """Retrieve one page of picture metadata, newest first (?limit=&cursor=)"""
             try:
-                pictures = Picture.query.order_by(Picture.created_at.desc()).all()
-                return [p.read() for p in pictures]
+                limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+                if not (1 <= limit <= MAX_PAGE_SIZE):
+                    raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+                cursor = request.args.get('cursor') or None
+                if cursor:
+                    Picture.decode_cursor(cursor)
+            except ValueError as e:
+                return {
+                    "message": "Invalid pagination parameters",
+                    "error": str(e)
+                }, 400
+
+            try:
+                pictures, next_cursor = Picture.get_page(limit, cursor)
+                return {
+                    "pictures": [p.read() for p in pictures],
+                    "next_cursor": next_cursor
+                }, 200
             except Exception as e:
                 print(f"Get error: {str(e)}")
                 return {}
@@ -102,9 +127,12 @@ class PictureAPI:
                         "error": "Not Found"
                     }, 404
 
-                db.session.delete(picture)
-                db.session.commit()
-                
+                if not picture.delete():
+                    return {
+                        "message": "Failed to delete picture",
+                        "error": "Database Error"
+                    }, 500
+
                 return {
                     "message": "Picture deleted successfully"
                 }, 200
@@ -116,5 +144,58 @@ class PictureAPI:
                     "error": str(e)
                 }, 500
 
+    class _Image(Resource):
+        def get(self, picture_id):
+            """
+            Stream the raw image bytes; nginx serves them directly when BLOB_ACCEL_REDIRECT is set.
+
+            ?size=thumb or ?size=medium returns a resized WebP variant instead of the original.
+            """
+            size = request.args.get('size')
+            if not is_valid_size(size):
+                return {
+                    "message": f"Unknown size, expected one of: original, {', '.join(THUMBNAIL_SIZES)}",
+                    "error": "Bad Request"
+                }, 400
+
+            picture = Picture.query.get(picture_id)
+            if not picture:
+                return {
+                    "message": "Picture not found",
+                    "error": "Not Found"
+                }, 404
+
+            # Pictures are never edited, so the bytes behind an id are immutable
+            max_age = 365 * 24 * 3600
+            if picture.image_hash:
+                original = blob_path(picture.image_hash)
+                path, variant_mime_type = variant_for(original, size)
+                mime_type = variant_mime_type or picture.mime_type
+                etag = f"{picture.image_hash}-{size}" if variant_mime_type else picture.image_hash
+                accel_prefix = current_app.config['BLOB_ACCEL_REDIRECT']
+                if accel_prefix:
+                    resp = current_app.response_class(mimetype=mime_type)
+                    suffix = path[len(original):]
+                    resp.headers['X-Accel-Redirect'] = accel_prefix + blob_relpath(picture.image_hash) + suffix
+                    resp.set_etag(etag)
+                    resp.cache_control.public = True
+                    resp.cache_control.max_age = max_age
+                    return resp
+                return send_file(
+                    path,
+                    mimetype=mime_type,
+                    etag=etag,
+                    max_age=max_age,
+                    conditional=True
+                )
+            if picture.image_data:
+                # Row not yet moved by `flask custom migrate_pictures`
+                return send_file(io.BytesIO(picture.legacy_image_bytes()), mimetype='image/png')
+            return {
+                "message": "Picture has no image",
+                "error": "Not Found"
+            }, 404
+
     # Single resource registration for CRUD operations
-    api.add_resource(_CRUD, '/pictures')
\ No newline at end of file
+    api.add_resource(_CRUD, '/pictures')
+    api.add_resource(_Image, '/pictures/<int:picture_id>/image')
\ No newline at end of file
@@ -1,4 +1,5 @@
 import jwt
+from urllib.parse import urlencode
 from flask import Blueprint, request, jsonify, current_app, Response, g
 from flask_restful import Api, Resource  # used for REST API building
 from datetime import datetime
@@ -22,6 +23,32 @@ The Api object is connected to the Blueprint object to define the API endpoints.
 """
 api = Api(post_api)
 
+MAX_PAGE_SIZE = 100
+
+def page_args():
+    """
+    Read optional ?limit= and ?after_id= keyset paging arguments, raising ValueError if invalid.
+    Without ?limit= every matching post is returned, as before paging existed.
+    """
+    limit = request.args.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or not (1 <= int(limit) <= MAX_PAGE_SIZE):
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        limit = int(limit)
+    after_id = request.args.get('after_id')
+    if after_id and not after_id.isdigit():
+        raise ValueError("after_id must be an integer")
+    return limit, int(after_id) if after_id else None
+
+def page_response(posts, next_after_id, limit):
+    """JSON list of posts, with a Link header to the next page when there is one"""
+    resp = jsonify(posts)
+    if next_after_id is not None:
+        args = request.args.to_dict()
+        args.update(limit=limit, after_id=next_after_id)
+        resp.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return resp
+
 class PostAPI:
     """
     Define the API CRUD endpoints for the Post model.
@@ -129,52 +156,44 @@ class PostAPI:
             """
             # Obtain the current user
             current_user = g.current_user
-            # Find all the posts by the current user
-            posts = Post.query.filter(Post._user_id == current_user.id).all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = [post.read() for post in posts]
+            try:
+                limit, after_id = page_args()
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            # Find the posts by the current user, with user and channel names, in one query
+            posts, next_after_id = Post.list_posts(user_id=current_user.id, limit=limit, after_id=after_id)
             # Return a JSON list, converting Python dictionaries to JSON format
-            return jsonify(json_ready)
+            return page_response(posts, next_after_id, limit)
 
     class _BULK_CRUD(Resource):
+        @token_required()
         def post(self):
             """
-            Handle bulk post creation by sending POST requests to the single post endpoint.
+            Bulk post creation by the current user: one validation pass and batched inserts.
+
+            Returns success_count, error_count and per-row errors ({index, message}).
             """
+            current_user = g.current_user
             posts = request.get_json()
 
             if not isinstance(posts, list):
                 return {'message': 'Expected a list of post data'}, 400
 
-            results = {'errors': [], 'success_count': 0, 'error_count': 0}
-
-            with current_app.test_client() as client:
-                for post in posts:
-                    # Simulate a POST request to the single post creation endpoint
-                    response = client.post('/api/post', json=post)
-
-                    if response.status_code == 200:
-                        results['success_count'] += 1
-                    else:
-                        results['errors'].append(response.get_json())
-                        results['error_count'] += 1
-
             # Return the results of the bulk creation process
-            return jsonify(results)
+            return jsonify(Post.bulk_create(posts, current_user.id))
         
         def get(self):
             """
-            Retrieve all posts.
+            Retrieve all posts, optionally a page at a time with ?limit= and ?after_id=.
             """
-            # Find all the posts
-            posts = Post.query.all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = []
-            for post in posts:
-                post_data = post.read()
-                json_ready.append(post_data)
+            try:
+                limit, after_id = page_args()
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            # Find the posts, with user and channel names, in one query
+            posts, next_after_id = Post.list_posts(limit=limit, after_id=after_id)
             # Return a JSON list, converting Python dictionaries to JSON format
-            return jsonify(json_ready)
+            return page_response(posts, next_after_id, limit)
 
     class _FILTER(Resource):
         @token_required()
@@ -189,12 +208,15 @@ class PostAPI:
             if 'channel_id' not in data:
                 return {'message': 'Channel ID not found'}, 400
             
-            # Find all posts by channel ID and user ID
-            posts = Post.query.filter_by(_channel_id=data['channel_id']).all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = [post.read() for post in posts]
+            try:
+                limit, after_id = page_args()
+            except ValueError as e:
+                return {'message': str(e)}, 400
+
+            # Find all posts by channel ID, with user and channel names, in one query
+            posts, next_after_id = Post.list_posts(channel_id=data['channel_id'], limit=limit, after_id=after_id)
             # Return a JSON list, converting Python dictionaries to JSON format
-            return jsonify(json_ready)
+            return page_response(posts, next_after_id, limit)
 
     """
     Map the _CRUD, _USER, _BULK_CRUD, and _FILTER classes to the API endpoints for /post, /post/user, /posts, and /posts/filter.
@@ -0,0 +1,66 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+from __init__ import app
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets: `capacity` attempts at once, refilled evenly over `period` seconds.
+
+    Buckets live in process memory, like the rest of the single gunicorn worker's
+    caches.  Only the `max_keys` most recently used keys are tracked; an evicted key
+    simply starts again with a full bucket.
+    """
+
+    def __init__(self, capacity, period, max_keys=10000):
+        self.capacity = capacity
+        self.rate = capacity / period  # tokens per second
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def acquire(self, key):
+        """
+        Takes one token from `key`'s bucket.
+
+        Returns:
+            float: 0 if allowed, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+login_ip_limiter = TokenBucketLimiter(*app.config['LOGIN_RATE_LIMIT_IP'])
+login_uid_limiter = TokenBucketLimiter(*app.config['LOGIN_RATE_LIMIT_UID'])
+
+
+def login_retry_after(uid):
+    """
+    Rate-limit a login attempt by client IP, then by the uid being tried from that IP.
+
+    The uid bucket is keyed on (uid, IP): someone hammering a victim's uid only
+    drains their own bucket and cannot lock the victim out.
+
+    Returns:
+        int: 0 if the attempt may proceed, otherwise the whole seconds to send as Retry-After.
+    """
+    if not current_app.config['LOGIN_RATE_LIMIT']:
+        return 0
+    wait = login_ip_limiter.acquire(request.remote_addr)
+    if not wait:
+        wait = login_uid_limiter.acquire((str(uid).lower(), request.remote_addr))
+    return math.ceil(wait)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from __init__ import app
+from model.competition import Time
+from model.leaderboard import LeaderboardEntry
+
+
+class VersionedCache:
+    """
+    Serialized JSON responses cached per URL and tagged with a version.
+
+    Any committed write to a watched model in this process bumps the version,
+    which makes every cached body stale at once.  Writes this process cannot see
+    (other gunicorn workers, CLI commands such as restore_data or
+    rebuild_leaderboard, raw SQL) are picked up when an entry's `ttl` seconds run
+    out, so a body is never more than `ttl` seconds behind the database.
+
+    The ETag is a hash of the body alone, so every worker tags the same leaderboard
+    the same way and a rebuild that changed nothing still answers 304 to
+    If-None-Match.
+    """
+
+    def __init__(self, models, ttl, max_entries=256, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (version, body, etag, expires_at)
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._watch(models)
+
+    def _watch(self, models):
+        flag = f"dirty_{id(self)}"
+        mappers = {model.__mapper__ for model in models}
+
+        def mark(mapper, connection, target):
+            session = object_session(target)
+            if session is not None:
+                session.info[flag] = True
+
+        for model in models:
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, name, mark)
+
+        @event.listens_for(Session, 'do_orm_execute')
+        def mark_bulk(state):
+            # Bulk insert/update/delete statements skip the mapper events
+            if not state.is_select and mappers.intersection(state.all_mappers):
+                state.session.info[flag] = True
+
+        @event.listens_for(Session, 'after_commit')
+        def bump(session):
+            if session.info.pop(flag, False):
+                self.bump()
+
+        @event.listens_for(Session, 'after_rollback')
+        def discard(session):
+            session.info.pop(flag, None)
+
+    def bump(self):
+        """Invalidate every cached body"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def get_or_build(self, key, builder):
+        """
+        Return (body, etag) for `key`, calling builder() on a miss.
+
+        builder must return a JSON-serializable value; exceptions propagate
+        and nothing is cached.
+        """
+        now = self._clock()
+        with self._lock:
+            version = self.version
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[3] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        body = json.dumps(builder())
+        etag = hashlib.sha1(body.encode()).hexdigest()
+        with self._lock:
+            # Skip storing if a write landed while the body was being built
+            if self.version == version and self._ttl > 0:
+                self._entries[key] = (version, body, etag, now + self._ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return body, etag
+
+    def response(self, builder):
+        """Conditional JSON response for the current request URL"""
+        body, etag = self.get_or_build(request.full_path, builder)
+        resp = current_app.response_class(body, mimetype='application/json')
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'no-cache'
+        resp = resp.make_conditional(request)
+        if resp.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+        return resp
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "ttl": self._ttl,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified
+            }
+
+
+# Leaderboard and competition times are rebuilt from the same two tables
+leaderboard_cache = VersionedCache([LeaderboardEntry, Time], ttl=app.config['LEADERBOARD_CACHE_TTL'])
@@ -1,10 +1,15 @@
 import jwt
+import time
+import uuid
 from flask import Blueprint, request, jsonify, current_app, Response, g
 from flask_restful import Api, Resource  # used for REST API building
-from datetime import datetime
-from __init__ import app
+from datetime import datetime, timedelta
+from __init__ import app, db
 from api.jwt_authorize import token_required
+from api.rate_limit import login_retry_after
 from model.user import User
+from model.token_revocation import revocation_list
+from model.passwords import HashingBusy
 
 # Create a Blueprint for the user API
 user_api = Blueprint('user_api', __name__, url_prefix='/api')
@@ -22,30 +27,23 @@ class UserAPI:
         Users API operation for bulk Create and Read.
         """
 
+        @token_required("Admin")
         def post(self):
             """
-            Handle bulk user creation by sending POST requests to the single user endpoint.
+            Bulk user creation: one validation pass, parallel password hashing and batched inserts.
+
+            Returns success_count, error_count and per-row errors ({index, uid, message}).
             """
             users = request.get_json()
 
             if not isinstance(users, list):
                 return {'message': 'Expected a list of user data'}, 400
 
-            results = {'errors': [], 'success_count': 0, 'error_count': 0}
-
-            with current_app.test_client() as client:
-                for user in users:
-                    # Set a default password as we don't have it for bulk creation
-                    user["password"] = app.config['DEFAULT_PASSWORD']
-
-                    # Simulate a POST request to the single user creation endpoint
-                    response = client.post('/api/user', json=user)
-
-                    if response.status_code == 200:
-                        results['success_count'] += 1
-                    else:
-                        results['errors'].append(response.get_json())
-                        results['error_count'] += 1
+            try:
+                results = User.bulk_import(users)
+            except Exception as e:
+                db.session.rollback()
+                return {'message': 'Bulk import failed', 'error': str(e)}, 500
 
             return jsonify(results)
         
@@ -174,15 +172,29 @@ class UserAPI:
                 if not password:
                     return {'message': 'Password is missing'}, 401
 
+                retry_after = login_retry_after(uid)
+                if retry_after:
+                    return {'message': 'Too many login attempts, try again later'}, 429, {'Retry-After': str(retry_after)}
+
                 # Find user
                 user = User.query.filter_by(_uid=uid).first()
 
-                if user is None or not user.is_password(password):
-                    return {'message': "Invalid user id or password"}, 401
+                try:
+                    if user is None or not user.is_password(password):
+                        return {'message': "Invalid user id or password"}, 401
+                except HashingBusy:
+                    return {'message': 'Server is busy, try again shortly'}, 503, {'Retry-After': '1'}
+                user.upgrade_password_hash(password)
 
-                # Generate token
+                # Generate token; jti lets this one token be revoked, ver lets all of the user's tokens be revoked
+                lifetime = current_app.config["TOKEN_LIFETIME"]
                 token = jwt.encode(
-                    {"_uid": user._uid},
+                    {
+                        "_uid": user._uid,
+                        "jti": uuid.uuid4().hex,
+                        "ver": user.token_version,
+                        "exp": datetime.utcnow() + timedelta(seconds=lifetime)
+                    },
                     current_app.config["SECRET_KEY"],
                     algorithm="HS256"
                 )
@@ -190,7 +202,7 @@ class UserAPI:
                 resp.set_cookie(
                     current_app.config["JWT_TOKEN_NAME"],
                     token,
-                    max_age=3600,
+                    max_age=lifetime,
                     secure=True,
                     httponly=True,
                     path='/',
@@ -206,10 +218,18 @@ class UserAPI:
         @token_required()
         def delete(self):
             """
-            Invalidate the current user's token by setting its expiry to 0.
+            Log out: revoke the current token and clear the cookie.
+
+            ?all=true revokes every token issued to the user, logging out all devices.
             """
             current_user = g.current_user
             try:
+                if request.args.get('all', '').lower() in ('1', 'true'):
+                    current_user.revoke_tokens()
+                elif "jti" in g.token:
+                    expires_at = g.token.get("exp", time.time() + current_app.config["TOKEN_LIFETIME"])
+                    revocation_list.revoke(g.token["jti"], expires_at)
+
                 # Generate a token with practically 0 age
                 token = jwt.encode(
                     {"_uid": current_user._uid, "exp": datetime.utcnow()},
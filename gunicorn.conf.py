@@ -0,0 +1,39 @@
+"""
+Gunicorn settings, read automatically from the working directory (`gunicorn main:app`).
+
+on_starting brings the database schema up to date once, in the master process
+before any worker is forked, so workers start serving without running DDL.
+The upgrade runs as `flask custom init_db` in a child process: importing the app
+in the master would hand its open connections and module state to every worker.
+If the upgrade fails, gunicorn exits instead of serving an out-of-date schema.
+Set SKIP_DB_UPGRADE=1 when the migrations are applied by a separate release step.
+
+Worker count: with the database competition session store every worker sees the
+same rounds, so the default is gunicorn's (2 x cores) + 1; the memory store only
+works with a single worker.  GUNICORN_WORKERS overrides either default, and
+scripts/bench_timer_workers.py measures the timer endpoints across worker counts.
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+
+if os.environ.get('GUNICORN_WORKERS'):
+    workers = int(os.environ['GUNICORN_WORKERS'])
+elif (os.environ.get('COMPETITION_SESSION_STORE') or 'database') == 'database':
+    workers = multiprocessing.cpu_count() * 2 + 1
+else:
+    workers = 1
+# Threads let each worker keep serving while logins hash on the password pool
+threads = 8
+bind = '0.0.0.0:8203'
+
+def on_starting(server):
+    if os.environ.get('SKIP_DB_UPGRADE'):
+        server.log.info("Skipping database upgrade (SKIP_DB_UPGRADE is set)")
+        return
+    project = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [project, os.environ.get('PYTHONPATH')])))
+    server.log.info("Upgrading the database schema")
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'main', 'custom', 'init_db'],
+                   cwd=project, env=env, check=True)
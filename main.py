@@ -2,16 +2,17 @@
 import json
 import os
 from urllib.parse import urljoin, urlparse
-from flask import abort, redirect, render_template, request, send_from_directory, url_for, jsonify  # import render_template from "public" flask libraries
+from flask import abort, redirect, render_template, request, send_file, send_from_directory, url_for, jsonify  # import render_template from "public" flask libraries
 from flask_login import current_user, login_user, logout_user
 from flask.cli import AppGroup
 from flask_login import current_user, login_required
 from flask import current_app
-from werkzeug.security import generate_password_hash
-import shutil
+from werkzeug.security import generate_password_hash, safe_join
+import click
 from flask import Flask, request, jsonify, render_template
 from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.orm import joinedload
 
 # import "objects" from "this" project
 from __init__ import app, db, login_manager  # Key Flask objects
@@ -47,9 +48,16 @@ from model.post import Post, initPosts
 from model.nestPost import NestPost, initNestPosts # Justin added this, custom format for his website
 from model.vote import Vote, initVotes
 from model.guess import db, Guess, initGuessDataTable
-from model.picture import Picture, initPictureTable  # Update this line
+from model.picture import Picture, initPictureTable, migratePictureBlobs  # Update this line
 from model.competition import Time, initTimerTable  # Add this import
 from model.blind_trace import BlindTraceSubmission, initBlindTraceTable # Add this import
+from model.thumbnails import is_valid_size, variant_for
+from model.passwords import HashingBusy
+from api.rate_limit import login_retry_after
+from model.reference_images import prewarm_references
+from model.backup import backup_tables, latest_backup, restore_tables
+from model.snapshots import list_snapshots, restore_snapshot, snapshot_sqlite, sqlite_path, take_snapshot
+from model.schema import upgrade_schema
 # server only Views
 
 # register URIs for api endpoints
@@ -106,8 +114,18 @@ def login():
     error = None
     next_page = request.args.get('next', '') or request.form.get('next', '')
     if request.method == 'POST':
+        retry_after = login_retry_after(request.form['username'])
+        if retry_after:
+            error = f'Too many login attempts, try again in {retry_after} seconds.'
+            return render_template("login.html", error=error, next=next_page), 429, {'Retry-After': str(retry_after)}
         user = User.query.filter_by(_uid=request.form['username']).first()
-        if user and user.is_password(request.form['password']):
+        try:
+            valid = user is not None and user.is_password(request.form['password'])
+        except HashingBusy:
+            error = 'Server is busy, please try again.'
+            return render_template("login.html", error=error, next=next_page), 503, {'Retry-After': '1'}
+        if valid:
+            user.upgrade_password_hash(request.form['password'])
             login_user(user)
             if not is_safe_url(next_page):
                 return abort(400)
@@ -148,9 +166,18 @@ def u2table():
     return render_template("u2table.html", user_data=users)
 
 
-# Helper function to extract uploads for a user (ie PFP image)
+# Helper function to extract uploads for a user (ie PFP image), ?size=thumb|medium for a resized variant
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
+    size = request.args.get('size')
+    if not is_valid_size(size):
+        abort(400)
+    if size and size != 'original':
+        original = safe_join(current_app.config['UPLOAD_FOLDER'], filename)
+        if original is None or not os.path.isfile(original):
+            abort(404)
+        path, mime_type = variant_for(original, size)
+        return send_file(path, mimetype=mime_type)
     return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
  
 @app.route('/users/delete/<int:user_id>', methods=['DELETE'])
@@ -185,7 +212,9 @@ def blind_trace_admin():
     if not current_user.is_authenticated or current_user.role != 'Admin':
         return redirect(url_for('index'))
 
-    blind_trace_data = BlindTraceSubmission.query.all()  # Ensure this model exists
+    # Players in the same query; rows carry only metadata, drawings load from drawing_url
+    blind_trace_data = BlindTraceSubmission.query.options(joinedload(BlindTraceSubmission.user)) \
+        .order_by(BlindTraceSubmission.submission_time.desc()).all()
     return render_template('blind_trace_admin.html', blind_trace_data=blind_trace_data)
 
 # Create an AppGroup for custom commands
@@ -206,77 +235,144 @@ def generate_data():
     initStatsDataTable()
     initTimerTable()
     initPictureTable()  # Add this line
-    initBlindTraceTable
+    initBlindTraceTable()
+
+
+# Define a command to bring the schema up to date; gunicorn.conf.py runs it once before the workers start
+@custom_cli.command('init_db')
+def init_db():
+    before, after = upgrade_schema()
+    print(f"Database schema at revision {after}" + (f" (was {before})" if before != after else ""))
+    initLeaderboardTable()
+
+
+# Define a command to recompute the leaderboard from competition results
+@custom_cli.command('rebuild_leaderboard')
+def rebuild_leaderboard():
+    count = LeaderboardEntry.rebuild()
+    print(f"Leaderboard rebuilt: {count} entries recomputed from competition results")
+
+
+# Define a command to move picture data URIs into the blob store
+@custom_cli.command('migrate_pictures')
+def migrate_pictures():
+    migrated, failed = migratePictureBlobs()
+    print(f"Moved {migrated} pictures to the blob store, {failed} failed")
+
+
+# Define a command to load a round's blind trace reference images into the cache
+@custom_cli.command('prewarm_references')
+@click.argument('urls', nargs=-1, required=True)
+@click.option('--size', 'sizes', multiple=True, help='Canvas size as WIDTHxHEIGHT, repeatable')
+def prewarm_references_command(urls, sizes):
+    sizes = [tuple(int(n) for n in size.split('x')) for size in sizes] or None
+    errors = prewarm_references(urls, sizes)
+    for url, error in errors.items():
+        print(f"Failed to load {url}: {error}")
+    print(f"Prewarmed {len(urls) - len(errors)} of {len(urls)} reference images")
 
 
 # Backup the old database
 def backup_database(db_uri, backup_uri):
-    """Backup the current database."""
-    if backup_uri:
-        db_path = db_uri.replace('sqlite:///', 'instance/')
-        backup_path = backup_uri.replace('sqlite:///', 'instance/')
-        shutil.copyfile(db_path, backup_path)
+    """Backup the current database with an online snapshot, safe while the app is running."""
+    db_path = sqlite_path(db_uri)
+    backup_path = sqlite_path(backup_uri) if backup_uri else None
+    if db_path and backup_path:
+        snapshot_sqlite(backup_path, source=db_path)
         print(f"Database backed up to {backup_path}")
     else:
         print("Backup not supported for production database.")
 
 
-# Extract data from the existing database
-def extract_data():
-    data = {}
-    with app.app_context():
-        data['users'] = [user.read() for user in User.query.all()]
-        data['sections'] = [section.read() for section in Section.query.all()]
-        data['groups'] = [group.read() for group in Group.query.all()]
-        data['channels'] = [channel.read() for channel in Channel.query.all()]
-        data['posts'] = [post.read() for post in Post.query.all()]
-        data['timer_entries'] = [time.read() for time in Time.query.all()]
-    return data
-
-
-# Save extracted data to JSON files
-def save_data_to_json(data, directory='backup'):
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    for table, records in data.items():
-        with open(os.path.join(directory, f'{table}.json'), 'w') as f:
-            json.dump(records, f)
-    print(f"Data backed up to {directory} directory.")
+# Define a command to snapshot the database file
+@custom_cli.command('snapshot_db')
+@click.option('--incremental', is_flag=True, help='Store only the pages changed since the previous snapshot')
+@click.option('--method', type=click.Choice(['backup', 'vacuum']), default='backup', show_default=True,
+              help='Online backup API in page steps, or VACUUM INTO')
+@click.option('--retention', type=int, default=None, help='Full snapshots to keep (default: SNAPSHOT_RETENTION)')
+def snapshot_db(incremental=False, method='backup', retention=None):
+    stats = take_snapshot(incremental=incremental, method=method, retention=retention)
+    detail = f", {stats['pages_changed']} of {stats['pages']} pages changed" if stats['kind'] == 'incremental' else ''
+    print(f"{stats['kind'].capitalize()} snapshot {stats['name']}: {stats['bytes']} bytes in {stats['seconds']} s"
+          f"{detail}, {stats['restarts']} restarts")
+    for name in stats['rotated']:
+        print(f"Rotated out {name}")
+
+
+# Define a command to rebuild the database from a snapshot
+@custom_cli.command('restore_snapshot')
+@click.argument('name', required=False)
+@click.option('--to', 'destination', required=True, help='File to write the rebuilt database to')
+def restore_snapshot_command(name=None, destination=None):
+    names = list_snapshots()
+    if not names:
+        print("No snapshots found.")
+        return
+    restore_snapshot(name or names[-1], destination)
+    print(f"Snapshot {name or names[-1]} restored to {destination}")
 
 
 # Load data from JSON files
 def load_data_from_json(directory='backup'):
     data = {}
-    for table in ['users', 'sections', 'groups', 'channels', 'posts']:
-        with open(os.path.join(directory, f'{table}.json'), 'r') as f:
-            data[table] = json.load(f)
+    for table in ['users', 'sections', 'groups', 'channels', 'posts', 'timer_entries']:
+        path = os.path.join(directory, f'{table}.json')
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data[table] = json.load(f)
     return data
 
 
 # Restore data to the new database
 def restore_data(data):
     with app.app_context():
-        users = User.restore(data['users'])
-        _ = Section.restore(data['sections'])
-        _ = Group.restore(data['groups'], users)
-        _ = Channel.restore(data['channels'])
-        _ = Post.restore(data['posts'])
+        for table, restore in (
+            ('users', User.restore),
+            ('sections', Section.restore),
+            ('groups', Group.restore),
+            ('channels', Channel.restore),
+            ('posts', Post.restore),
+            ('timer_entries', Time.restore),
+        ):
+            if table in data:
+                counts = restore(data[table])
+                print(f"Restored {table}: {counts['inserted']} inserted, {counts['updated']} updated")
         if 'timer_entries' in data:
-            _ = Time.restore(data['timer_entries'])
+            # The bulk upsert bypasses record_time, so recompute the entries from the restored results
+            count = LeaderboardEntry.rebuild()
+            print(f"Leaderboard rebuilt: {count} entries recomputed from competition results")
     print("Data restored to the new database.")
 
 
 # Define a command to backup data
 @custom_cli.command('backup_data')
-def backup_data():
-    data = extract_data()
-    save_data_to_json(data)
+@click.option('--directory', default=None, help='Backup directory (default: a new timestamped folder in BACKUP_FOLDER)')
+@click.option('--compression', type=click.Choice(['gzip', 'zstd', 'none']), default=None,
+              help='Table file compression (default: BACKUP_COMPRESSION)')
+@click.option('--table', 'tables', multiple=True, help='Only back up this table, repeatable')
+def backup_data(directory=None, compression=None, tables=()):
+    backup_tables(directory, compression, tables=tables or None)
     backup_database(app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLALCHEMY_BACKUP_URI'])
 
 
 # Define a command to restore data
 @custom_cli.command('restore_data')
-def restore_data_command():
+@click.option('--directory', default=None, help='Backup to restore (default: the newest in BACKUP_FOLDER)')
+@click.option('--file', 'path', default=None,
+              help='Legacy JSON file instead: a list of users, like instance/backup/data.json, or {table: records}')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per transaction')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of an interrupted restore')
+def restore_data_command(directory=None, path=None, batch_size=1000, restart=False):
+    if path:
+        with open(path) as f:
+            data = json.load(f)
+        restore_data({'users': data} if isinstance(data, list) else data)
+        return
+    directory = directory or latest_backup()
+    if directory:
+        restore_tables(directory, batch_size=batch_size, resume=not restart)
+        return
+    # Table-per-file JSON written by earlier versions of backup_data
     data = load_data_from_json()
     restore_data(data)
    
@@ -284,29 +380,6 @@ def restore_data_command():
 app.cli.add_command(custom_cli)
 
 
-# Add initialization at app startup
-_is_initialized = False
-
-@app.before_request
-def initialize_tables():
-    global _is_initialized
-    if not _is_initialized:
-        try:
-            with app.app_context():
-                db.create_all()
-                # Make sure Competition table is created before Leaderboard
-                initTimerTable()     # Competition table initialization
-                initLeaderboardTable()  # Leaderboard table initialization
-                initPictureTable()   # Keep this initialization
-                initGuessDataTable()
-                initStatsDataTable()
-                initBlindTraceTable
-                _is_initialized = True
-        except Exception as e:
-            print(f"Error initializing tables: {str(e)}")  # Add better error logging
-            app.logger.error(f"Error initializing: {str(e)}")
-            return jsonify({"error": "Init failed"}), 500
-
 @app.route('/admin/leaderboard')
 @login_required
 def leaderboard_admin():
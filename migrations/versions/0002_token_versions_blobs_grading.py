@@ -0,0 +1,178 @@
+"""token versions, picture blobs, grading queue and listing indexes
+
+Adds the tables, columns and indexes the models gained since the baseline:
+competition sessions, revoked tokens and users._token_version, picture blob
+metadata (image_data becomes optional), blind trace grading, and the indexes
+behind the leaderboard, post and picture listings.
+
+Databases built by db.create_all() at some point in between already have part of
+this, so every step is skipped when its table, column or index exists.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 16:41:25.171363
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _add_columns(table, columns, indexes=()):
+    """Adds the missing columns, then the missing (name, columns) indexes, in one batch"""
+    existing_columns, existing_indexes = _columns(table), _indexes(table)
+    with op.batch_alter_table(table, schema=None) as batch_op:
+        for column in columns:
+            if column.name not in existing_columns:
+                batch_op.add_column(column)
+        for name, index_columns in indexes:
+            if name not in existing_indexes:
+                batch_op.create_index(name, index_columns, unique=False)
+
+
+def upgrade():
+    tables = _tables()
+    if 'competition_sessions' not in tables:
+        op.create_table('competition_sessions',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('user_name', sa.String(length=255), nullable=True),
+        sa.Column('drawn_word', sa.String(length=50), nullable=False),
+        sa.Column('timer_duration', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.Float(), nullable=False),
+        sa.Column('expires_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+        )
+    _add_columns('competition_sessions', [], [('ix_competition_sessions_expires_at', ['expires_at'])])
+
+    if 'revoked_tokens' not in tables:
+        op.create_table('revoked_tokens',
+        sa.Column('jti', sa.String(length=64), nullable=False),
+        sa.Column('expires_at', sa.Float(), nullable=False),
+        sa.Column('revoked_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('jti')
+        )
+    _add_columns('revoked_tokens', [], [
+        ('ix_revoked_tokens_expires_at', ['expires_at']),
+        ('ix_revoked_tokens_revoked_at', ['revoked_at']),
+    ])
+
+    if 'grading_jobs' not in tables:
+        op.create_table('grading_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('submission_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('claimed_at', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['submission_id'], ['blind_trace_submissions.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('submission_id')
+        )
+    _add_columns('grading_jobs', [], [('ix_grading_jobs_status', ['status'])])
+
+    # Existing users get version 0, the version every token issued so far carries
+    _add_columns('users', [sa.Column('_token_version', sa.Integer(), nullable=False, server_default='0')])
+
+    _add_columns('blind_trace_submissions', [
+        sa.Column('drawing_hash', sa.String(length=64), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='pending'),
+        sa.Column('score', sa.Float(), nullable=True),
+        sa.Column('error', sa.String(length=255), nullable=True),
+    ], [
+        ('ix_blind_trace_submissions_drawing_hash', ['drawing_hash']),
+        ('ix_blind_trace_submissions_score', ['score']),
+        ('ix_blind_trace_user_time', ['user_id', 'submission_time']),
+    ])
+
+    # Existing pictures keep their data URI in image_data until `flask custom migrate_pictures`
+    _add_columns('pictures', [
+        sa.Column('image_hash', sa.String(length=64), nullable=True),
+        sa.Column('mime_type', sa.String(length=50), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+    ], [
+        ('ix_pictures_created_at', ['created_at']),
+        ('ix_pictures_image_hash', ['image_hash']),
+    ])
+    with op.batch_alter_table('pictures', schema=None) as batch_op:
+        batch_op.alter_column('image_data',
+               existing_type=sa.TEXT(),
+               nullable=True)
+
+    _add_columns('leaderboard', [], [
+        ('ix_leaderboard_drawing_score', ['drawing_name', 'score']),
+        ('ix_leaderboard_user_drawing', ['created_by', 'drawing_name']),
+    ])
+    _add_columns('nestPosts', [], [
+        ('ix_nestPosts__group_id', ['_group_id']),
+        ('ix_nestPosts__user_id', ['_user_id']),
+    ])
+    _add_columns('posts', [], [
+        ('ix_posts__channel_id', ['_channel_id']),
+        ('ix_posts__user_id', ['_user_id']),
+    ])
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('_token_version')
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts__user_id')
+        batch_op.drop_index('ix_posts__channel_id')
+
+    with op.batch_alter_table('pictures', schema=None) as batch_op:
+        batch_op.drop_index('ix_pictures_image_hash')
+        batch_op.drop_index('ix_pictures_created_at')
+        batch_op.alter_column('image_data',
+               existing_type=sa.TEXT(),
+               nullable=False)
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
+        batch_op.drop_column('size')
+        batch_op.drop_column('mime_type')
+        batch_op.drop_column('image_hash')
+
+    with op.batch_alter_table('nestPosts', schema=None) as batch_op:
+        batch_op.drop_index('ix_nestPosts__user_id')
+        batch_op.drop_index('ix_nestPosts__group_id')
+
+    with op.batch_alter_table('leaderboard', schema=None) as batch_op:
+        batch_op.drop_index('ix_leaderboard_user_drawing')
+        batch_op.drop_index('ix_leaderboard_drawing_score')
+
+    with op.batch_alter_table('blind_trace_submissions', schema=None) as batch_op:
+        batch_op.drop_index('ix_blind_trace_user_time')
+        batch_op.drop_index('ix_blind_trace_submissions_score')
+        batch_op.drop_index('ix_blind_trace_submissions_drawing_hash')
+        batch_op.drop_column('error')
+        batch_op.drop_column('score')
+        batch_op.drop_column('status')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
+        batch_op.drop_column('drawing_hash')
+
+    op.drop_table('grading_jobs')
+    op.drop_table('revoked_tokens')
+    op.drop_table('competition_sessions')
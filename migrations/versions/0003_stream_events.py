@@ -0,0 +1,42 @@
+"""stream events
+
+The table that relays competition stream events between processes (model/stream_events.py).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:46:00.058806
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases adopted from db.create_all() may have it already
+    if 'stream_events' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('stream_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_key', sa.String(length=64), nullable=True),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('stream_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stream_events_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stream_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stream_events_created_at'))
+
+    op.drop_table('stream_events')
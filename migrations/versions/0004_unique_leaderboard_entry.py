@@ -0,0 +1,74 @@
+"""unique leaderboard entry per user and word
+
+Concurrent results for the same user and word could both insert an entry, since
+ix_leaderboard_user_drawing was not unique.  Duplicates are merged into the oldest
+row, which takes the group's best score and stays hidden if any of them was hidden
+by an admin; the index is then recreated as unique.  Rows are picked in Python, as
+MySQL cannot delete from a table its own subquery reads.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 18:02:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+leaderboard = sa.table(
+    'leaderboard',
+    sa.column('id', sa.Integer),
+    sa.column('created_by', sa.Integer),
+    sa.column('drawing_name', sa.String),
+    sa.column('score', sa.Integer),
+    sa.column('is_deleted', sa.Boolean)
+)
+
+
+def _merge_duplicates(conn):
+    duplicated = (
+        sa.select(leaderboard.c.created_by, leaderboard.c.drawing_name)
+        .group_by(leaderboard.c.created_by, leaderboard.c.drawing_name)
+        .having(sa.func.count() > 1)
+        .subquery()
+    )
+    rows = conn.execute(
+        sa.select(leaderboard.c.id, leaderboard.c.created_by, leaderboard.c.drawing_name,
+                  leaderboard.c.score, leaderboard.c.is_deleted)
+        .join(duplicated, sa.and_(
+            leaderboard.c.created_by == duplicated.c.created_by,
+            leaderboard.c.drawing_name == duplicated.c.drawing_name
+        ))
+        .order_by(leaderboard.c.id)
+    ).all()
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.created_by, row.drawing_name), []).append(row)
+    for group in groups.values():
+        keep, extra = group[0], group[1:]
+        conn.execute(
+            leaderboard.update().where(leaderboard.c.id == keep.id).values(
+                score=max(row.score for row in group),
+                is_deleted=any(row.is_deleted for row in group)
+            )
+        )
+        conn.execute(leaderboard.delete().where(leaderboard.c.id.in_([row.id for row in extra])))
+
+
+def upgrade():
+    _merge_duplicates(op.get_bind())
+    with op.batch_alter_table('leaderboard', schema=None) as batch_op:
+        batch_op.drop_index('ix_leaderboard_user_drawing')
+        batch_op.create_index('ix_leaderboard_user_drawing', ['created_by', 'drawing_name'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('leaderboard', schema=None) as batch_op:
+        batch_op.drop_index('ix_leaderboard_user_drawing')
+        batch_op.create_index('ix_leaderboard_user_drawing', ['created_by', 'drawing_name'], unique=False)
@@ -0,0 +1,517 @@
+"""
+Streaming backups of every table.
+
+A backup is a directory holding one newline-delimited JSON file per table (one
+row object per line, optionally gzip or zstd compressed) and a manifest.json
+written last, so a directory without a manifest is an interrupted backup.  Rows
+are read with yield_per batches inside one read transaction and written as they
+arrive, so memory stays flat however large the tables grow, and every table comes
+from the same snapshot.
+
+The manifest records the format, the schema revision (when migrations are in use),
+each table's columns and, per file, its row count, size and sha256, which
+read_table() checks before yielding anything.
+
+restore_tables() upserts a backup back by primary key, one transaction per batch
+with the existing keys found by one IN query, and saves its progress after every
+batch so an interrupted restore resumes where it stopped.  upsert_in_batches()
+is the same machinery for the models' restore() methods, which key on natural
+keys (uid, name, ...) instead.
+
+Picture and drawing bytes live in the content-addressed blob store (BLOB_FOLDER);
+rows carry the blob's sha256 as the reference (see blob_references()).  The blobs the
+backed-up rows reference are hard-linked (copied across filesystems) into the
+backup's blobs/ folder, each checked against its hash on the way, and listed in the
+manifest; restore_tables() puts back any the blob store lacks.  Only pictures not
+yet moved to the blob store (image_hash is NULL) keep their legacy image_data in
+the table file.
+"""
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import and_, bindparam, case, inspect, select, text, tuple_
+from sqlalchemy.types import Date, DateTime, LargeBinary
+from __init__ import app, db
+from model.blob_store import blob_path, blob_put, blob_references, blob_relpath
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for compression='zstd'
+    zstandard = None
+
+BACKUP_FORMAT = 1
+MANIFEST = 'manifest.json'
+CHECKPOINT = 'restore-checkpoint.json'
+BLOBS = 'blobs'
+_EXTENSIONS = {None: '.ndjson', 'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+
+class BackupError(Exception):
+    """Raised when a backup is incomplete or does not match its manifest"""
+
+class _HashingWriter(io.RawIOBase):
+    """Passes writes through to a file while hashing and counting them"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+def _open_writer(raw, compression):
+    if compression is None:
+        return raw
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise BackupError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    raise BackupError(f"Unknown compression: {compression}")
+
+def _open_reader(path, compression):
+    if compression is None:
+        return open(path, 'rb')
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise BackupError("zstd compression needs the zstandard package")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    raise BackupError(f"Unknown compression: {compression}")
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot back up a {type(value).__name__}")
+
+def _table_select(table):
+    columns = list(table.columns)
+    if table.name == 'pictures':
+        # Migrated pictures are referenced by image_hash; their bytes are in the blob store
+        columns = [
+            case((table.c.image_hash.is_(None), table.c.image_data), else_=None).label('image_data')
+            if column.name == 'image_data' else column
+            for column in columns
+        ]
+    primary_key = list(table.primary_key.columns)
+    return select(*columns).order_by(*primary_key)
+
+def _file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def _backup_blobs(directory, hashes):
+    """
+    Hard-links (or copies) the referenced blobs into the backup, checking each against its hash.
+
+    Returns:
+    - dict: The manifest entry: folder, the hashes backed up, their total size and the hashes
+      that were missing or corrupt in the blob store.
+    """
+    saved, missing, size = [], [], 0
+    for blob_hash in sorted(hashes):
+        source = blob_path(blob_hash)
+        if not os.path.isfile(source) or _file_sha256(source) != blob_hash:
+            missing.append(blob_hash)
+            continue
+        target = os.path.join(directory, BLOBS, blob_relpath(blob_hash))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not os.path.exists(target):
+            try:
+                os.link(source, target)  # blobs are never modified in place, so sharing the inode is safe
+            except OSError:
+                shutil.copyfile(source, target)
+        saved.append(blob_hash)
+        size += os.path.getsize(target)
+    if missing:
+        print(f"Warning: {len(missing)} referenced blobs are missing or corrupt in {app.config['BLOB_FOLDER']} "
+              f"and are not in the backup: {', '.join(missing[:5])}{' ...' if len(missing) > 5 else ''}")
+    print(f"Backed up {len(saved)} blobs ({size} bytes)")
+    return {"folder": BLOBS, "hashes": saved, "bytes": size, "missing": missing}
+
+def _schema_revision(conn):
+    """The Alembic revision the database is at, or None before migrations are in use"""
+    if not inspect(conn).has_table('alembic_version'):
+        return None
+    return conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+
+def backup_tables(directory=None, compression=None, batch_size=1000, tables=None, engine=None, blobs=True):
+    """
+    Streams every table (or the named ones) into a new backup directory.
+
+    Parameters:
+    - directory (str, optional): Where to create the backup; a timestamped folder in BACKUP_FOLDER by default.
+    - compression (str, optional): None, 'gzip' or 'zstd'; BACKUP_COMPRESSION by default.
+    - batch_size (int): Rows fetched per round trip.
+    - tables (iterable, optional): Table names to back up instead of all of them.
+    - engine (Engine, optional): The database to back up; db.engine by default.
+    - blobs (bool): Also save the blob store files the backed-up rows reference.
+
+    Returns:
+    - str: The backup directory.
+    """
+    engine = engine or db.engine
+    compression = compression if compression is not None else app.config['BACKUP_COMPRESSION']
+    compression = None if compression == 'none' else compression
+    _open_writer(io.BytesIO(), compression)  # fail on a bad compression before touching the disk
+    if directory is None:
+        directory = os.path.join(app.config['BACKUP_FOLDER'], time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(directory, exist_ok=True)
+    selected = [table for table in db.metadata.sorted_tables if tables is None or table.name in tables]
+
+    manifest = {
+        "format": BACKUP_FORMAT,
+        "created_at": datetime.utcnow().isoformat(),
+        "database": engine.dialect.name,
+        "compression": compression,
+        "tables": []
+    }
+    encoder = json.JSONEncoder(default=_encode, separators=(',', ':'), check_circular=False)
+    started = time.perf_counter()
+    referenced, references = set(), blob_references()
+    # One read transaction, so every table comes from the same snapshot
+    with engine.connect() as conn, conn.begin():
+        manifest["schema_revision"] = _schema_revision(conn)
+        for table in selected:
+            filename = table.name + _EXTENSIONS[compression]
+            path = os.path.join(directory, filename)
+            rows = 0
+            with open(path + '.tmp', 'wb') as raw:
+                hashing = _HashingWriter(raw)
+                writer = _open_writer(hashing, compression)
+                result = conn.execution_options(yield_per=batch_size).execute(_table_select(table))
+                keys = list(result.keys())
+                reference = keys.index(references[table.name]) if table.name in references else None
+                for partition in result.partitions():
+                    if reference is not None:
+                        referenced.update(row[reference] for row in partition if row[reference])
+                    lines = [encoder.encode(dict(zip(keys, row))) for row in partition]
+                    writer.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                    rows += len(lines)
+                if writer is not hashing:
+                    writer.close()
+            os.replace(path + '.tmp', path)
+            manifest["tables"].append({
+                "name": table.name,
+                "file": filename,
+                "rows": rows,
+                "bytes": hashing.size,
+                "sha256": hashing.sha256.hexdigest(),
+                "columns": [column.name for column in table.columns]
+            })
+            print(f"Backed up {rows} rows from {table.name}")
+    if blobs:
+        manifest["blobs"] = _backup_blobs(directory, referenced)
+    manifest["seconds"] = round(time.perf_counter() - started, 3)
+
+    # The manifest goes last: its presence marks the backup as complete
+    with open(os.path.join(directory, MANIFEST + '.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(directory, MANIFEST + '.tmp'), os.path.join(directory, MANIFEST))
+    print(f"Data backed up to {directory}")
+    return directory
+
+def latest_backup(folder=None):
+    """
+    Finds the newest complete backup in a folder.
+
+    Parameters:
+    - folder (str, optional): The folder holding backups; BACKUP_FOLDER by default.
+
+    Returns:
+    - str: The backup directory, or None if there is no complete backup.
+    """
+    folder = folder or app.config['BACKUP_FOLDER']
+    if not os.path.isdir(folder):
+        return None
+    complete = [name for name in os.listdir(folder) if os.path.isfile(os.path.join(folder, name, MANIFEST))]
+    return os.path.join(folder, max(complete)) if complete else None
+
+def read_manifest(directory):
+    """
+    Loads a backup's manifest.
+
+    Raises:
+    - BackupError: The directory holds no manifest, i.e. the backup never finished.
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.isfile(path):
+        raise BackupError(f"{directory} has no {MANIFEST}; the backup is incomplete")
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BACKUP_FORMAT:
+        raise BackupError(f"Unsupported backup format: {manifest.get('format')}")
+    return manifest
+
+def verify_file(directory, entry):
+    """
+    Checks a table file's size and sha256 against its manifest entry.
+
+    Raises:
+    - BackupError: The file is missing or does not match.
+    """
+    path = os.path.join(directory, entry["file"])
+    if not os.path.isfile(path) or os.path.getsize(path) != entry["bytes"]:
+        raise BackupError(f"{entry['file']} is missing or truncated")
+    if _file_sha256(path) != entry["sha256"]:
+        raise BackupError(f"{entry['file']} does not match its checksum")
+
+def restore_blobs(directory, manifest):
+    """
+    Puts the backup's blobs that BLOB_FOLDER lacks back into the blob store.
+
+    Each blob is checked against its hash before it is stored.
+
+    Returns:
+    - int: The number of blobs restored.
+
+    Raises:
+    - BackupError: A blob listed in the manifest is missing from the backup or corrupt.
+    """
+    entry = manifest.get("blobs")
+    if not entry:
+        return 0
+    restored = 0
+    for blob_hash in entry["hashes"]:
+        if os.path.isfile(blob_path(blob_hash)):
+            continue
+        path = os.path.join(directory, entry["folder"], blob_relpath(blob_hash))
+        if not os.path.isfile(path):
+            raise BackupError(f"Blob {blob_hash} is missing from the backup")
+        with open(path, 'rb') as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != blob_hash:
+            raise BackupError(f"Blob {blob_hash} does not match its hash")
+        blob_put(data)
+        restored += 1
+    print(f"Restored {restored} blobs")
+    return restored
+
+def _decoders(table):
+    decoders = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            decoders[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            decoders[column.name] = date.fromisoformat
+        elif isinstance(column.type, LargeBinary):
+            decoders[column.name] = base64.b64decode
+    return decoders
+
+def read_table(directory, entry, compression=None, verify=True, skip=0):
+    """
+    Yields a backed-up table's rows as dicts, with column types restored.
+
+    Parameters:
+    - directory (str): The backup directory.
+    - entry (dict): The table's manifest entry.
+    - compression (str, optional): The manifest's compression.
+    - verify (bool): Check the file's checksum before reading it.
+    - skip (int): Leading rows to pass over without decoding, to resume a restore.
+
+    Yields:
+    - dict: One row, keyed by column name; columns the current schema lacks are dropped.
+    """
+    if verify:
+        verify_file(directory, entry)
+    table = db.metadata.tables.get(entry["name"])
+    if table is None:
+        raise BackupError(f"Table {entry['name']} is not in the current schema")
+    decoders = _decoders(table)
+    known = set(table.columns.keys())
+    with _open_reader(os.path.join(directory, entry["file"]), compression) as f:
+        for number, line in enumerate(f):
+            if number < skip:
+                continue
+            row = json.loads(line)
+            for name in list(row):
+                if name not in known:
+                    del row[name]
+                elif row[name] is not None and name in decoders:
+                    row[name] = decoders[name](row[name])
+            yield row
+
+def _by_columns(rows):
+    """Groups rows by their set of keys, since one executemany needs the same columns in every row"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    return groups.items()
+
+def upsert_rows(conn, table, rows, key=None, insert_defaults=None):
+    """
+    Inserts the rows whose key is not in the table yet and updates the others.
+
+    The existing keys are found with one IN query; inserts and updates are then
+    each one executemany per set of columns.  Later rows win over earlier rows with
+    the same key.
+
+    Parameters:
+    - conn (Connection): The connection, inside the caller's transaction.
+    - table (Table): The table to write.
+    - rows (list): Dicts keyed by column name; every row must carry the key columns.
+    - key (tuple, optional): Column names identifying a row; the primary key by default.
+    - insert_defaults (dict, optional): Values for columns a new row lacks (e.g. a password hash); never used in updates.
+
+    Returns:
+    - tuple: (rows inserted, rows updated).
+    """
+    key = tuple(key or (column.name for column in table.primary_key.columns))
+    unique = {}
+    for row in rows:
+        unique[tuple(row[name] for name in key)] = row
+    if not unique:
+        return 0, 0
+
+    key_columns = [table.c[name] for name in key]
+    if len(key_columns) == 1:
+        where = key_columns[0].in_([values[0] for values in unique])
+    else:
+        where = tuple_(*key_columns).in_(list(unique))
+    existing = {tuple(found) for found in conn.execute(select(*key_columns).where(where))}
+
+    new = [{**(insert_defaults or {}), **row} for values, row in unique.items() if values not in existing]
+    changed = [row for values, row in unique.items() if values in existing]
+    for _, group in _by_columns(new):
+        conn.execute(table.insert(), group)
+    for columns, group in _by_columns(changed):
+        columns = [name for name in columns if name not in key]
+        if not columns:
+            continue
+        statement = (
+            table.update()
+            .where(and_(*[column == bindparam(f'key_{column.name}') for column in key_columns]))
+            .values({name: bindparam(f'value_{name}') for name in columns})
+        )
+        conn.execute(statement, [
+            {**{f'key_{name}': row[name] for name in key}, **{f'value_{name}': row[name] for name in columns}}
+            for row in group
+        ])
+    return len(new), len(changed)
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def upsert_in_batches(table, records, key=None, batch_size=1000, to_rows=None, insert_defaults=None, engine=None):
+    """
+    Upserts records into a table in batches, one transaction per batch.
+
+    Parameters:
+    - table (Table): The table to write.
+    - records (iterable): Rows, or records for `to_rows` to turn into rows.
+    - key (tuple, optional): Column names identifying a row; the primary key by default.
+    - batch_size (int): Records per transaction.
+    - to_rows (callable, optional): to_rows(conn, batch) returns the rows for a batch of records,
+      e.g. after resolving names to ids with one query per batch.
+    - insert_defaults (dict, optional): Passed to upsert_rows().
+    - engine (Engine, optional): The database to write; db.engine by default.
+
+    Returns:
+    - dict: Counts of inserted and updated rows.
+    """
+    counts = {"inserted": 0, "updated": 0}
+    for batch in _batches(records, batch_size):
+        with (engine or db.engine).begin() as conn:
+            rows = to_rows(conn, batch) if to_rows else batch
+            inserted, updated = upsert_rows(conn, table, rows, key, insert_defaults)
+        counts["inserted"] += inserted
+        counts["updated"] += updated
+    return counts
+
+def _save_checkpoint(path, checkpoint):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
+
+def restore_tables(directory, batch_size=1000, resume=True, engine=None):
+    """
+    Restores a backup, upserting rows by primary key in dependency order.
+
+    Each batch of rows is one transaction, so a restore can run against a live
+    database and be run again safely: rows already present are updated, the rest
+    inserted.  After every committed batch the progress is saved to CHECKPOINT in
+    the backup directory; a restore interrupted part way resumes from there instead
+    of starting over, and the checkpoint is removed once the restore completes.
+    Blobs the blob store lacks are put back before any row.
+
+    Parameters:
+    - directory (str): The backup directory.
+    - batch_size (int): Rows per transaction.
+    - resume (bool): Continue from a checkpoint left by an interrupted restore of this backup.
+    - engine (Engine, optional): The database to restore into; db.engine by default.
+
+    Returns:
+    - dict: Per table, counts of inserted and updated rows.
+    """
+    engine = engine or db.engine
+    manifest = read_manifest(directory)
+    for entry in manifest["tables"]:
+        verify_file(directory, entry)
+    # Blobs first, so no restored row references a file the blob store lacks
+    restore_blobs(directory, manifest)
+
+    checkpoint_path = os.path.join(directory, CHECKPOINT)
+    checkpoint = {
+        "backup": manifest["created_at"],
+        "database": engine.url.render_as_string(hide_password=True),
+        "tables": {}
+    }
+    if resume and os.path.isfile(checkpoint_path):
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+        # Only a checkpoint from this backup into this database says which rows are in place
+        if saved.get("backup") == checkpoint["backup"] and saved.get("database") == checkpoint["database"]:
+            checkpoint["tables"] = saved.get("tables", {})
+            print(f"Resuming restore: {sum(checkpoint['tables'].values())} rows already restored")
+
+    results = {}
+    by_name = {entry["name"]: entry for entry in manifest["tables"]}
+    for table in db.metadata.sorted_tables:
+        entry = by_name.get(table.name)
+        if entry is None:
+            continue
+        done = checkpoint["tables"].get(table.name, 0)
+        counts = {"inserted": 0, "updated": 0}
+        rows = read_table(directory, entry, manifest["compression"], verify=False, skip=done)
+        for batch in _batches(rows, batch_size):
+            with engine.begin() as conn:
+                inserted, updated = upsert_rows(conn, table, batch)
+            counts["inserted"] += inserted
+            counts["updated"] += updated
+            done += len(batch)
+            checkpoint["tables"][table.name] = done
+            _save_checkpoint(checkpoint_path, checkpoint)
+        results[table.name] = counts
+        print(f"Restored {table.name}: {counts['inserted']} inserted, {counts['updated']} updated")
+
+    if os.path.isfile(checkpoint_path):
+        os.remove(checkpoint_path)
+    return results
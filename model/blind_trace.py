@@ -1,24 +1,60 @@
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
 from datetime import datetime
+from PIL import Image
+import io
+from model.blob_store import blob_stage, track_blobs
 
 class BlindTraceSubmission(db.Model):
     """Model for storing Blind Trace drawing submissions"""
     __tablename__ = 'blind_trace_submissions'
+    __table_args__ = (
+        # A user's history, newest first
+        db.Index('ix_blind_trace_user_time', 'user_id', 'submission_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     image_url = db.Column(db.String(255), nullable=False)  # Image users were given to memorize
     drawing_url = db.Column(db.String(255), nullable=True)  # URL of user's drawn submission (if saved)
+    drawing_hash = db.Column(db.String(64), nullable=True, index=True)  # sha256 of the PNG in the blob store
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
     is_deleted = db.Column(db.Boolean, default=False, nullable=False)
+    status = db.Column(db.String(16), default='pending', server_default='pending', nullable=False)  # pending | graded | failed
+    score = db.Column(db.Float, nullable=True, index=True)  # 0-100, set once graded
+    error = db.Column(db.String(255), nullable=True)  # why grading failed
     submission_time = db.Column(db.DateTime, default=datetime.utcnow)
     date_modified = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    def __init__(self, user_id, image_url, drawing_url=None, is_deleted=False):
+    user = db.relationship('User', lazy='select')
+
+    def __init__(self, user_id, image_url, drawing_url=None, is_deleted=False, drawing_bytes=None):
         self.user_id = user_id
         self.image_url = image_url
         self.drawing_url = drawing_url
         self.is_deleted = is_deleted
+        if drawing_bytes is not None:
+            self.store_drawing(drawing_bytes)
+
+    def store_drawing(self, drawing_bytes):
+        """
+        Validate a drawing, stage it for the blob store as a PNG and record its metadata.
+
+        PNG uploads are stored as sent; other formats are converted once here so the
+        grader and the admin page only ever see PNGs.  The file is written when the row is saved.
+
+        Raises:
+        - PIL.UnidentifiedImageError: The bytes are not an image.
+        """
+        with Image.open(io.BytesIO(drawing_bytes)) as img:
+            self.width, self.height = img.size
+            if img.format != 'PNG':
+                png = io.BytesIO()
+                img.save(png, 'PNG')
+                drawing_bytes = png.getvalue()
+        self.drawing_hash = blob_stage(self, drawing_bytes)
+        self.drawing_url = f"/api/blind_trace/drawing/{self.drawing_hash}"
 
     def __repr__(self):
         return f"BlindTraceSubmission(id={self.id}, user_id={self.user_id}, image_url={self.image_url})"
@@ -43,7 +79,12 @@ class BlindTraceSubmission(db.Model):
             "user_id": self.user_id,
             "image_url": self.image_url,
             "drawing_url": self.drawing_url,
+            "width": self.width,
+            "height": self.height,
             "is_deleted": self.is_deleted,
+            "status": self.status,
+            "score": self.score,
+            "error": self.error,
             "submission_time": self.submission_time.strftime("%Y-%m-%d %H:%M:%S"),
             "date_modified": self.date_modified.strftime("%Y-%m-%d %H:%M:%S"),
         }
@@ -75,12 +116,37 @@ class BlindTraceSubmission(db.Model):
 
     @classmethod
     def find_by_user(cls, user_id):
-        """Find all submissions by a specific user"""
-        return cls.query.filter_by(user_id=user_id, is_deleted=False).all()
+        """Find all submissions by a specific user, newest first"""
+        return cls.query.filter_by(user_id=user_id, is_deleted=False).order_by(cls.submission_time.desc()).all()
+
+track_blobs(BlindTraceSubmission, 'drawing_hash')
+
+class GradingJob(db.Model):
+    """
+    A submission waiting to be graded.
+
+    Jobs live in the database so queued work survives restarts and is shared by every
+    gunicorn worker; see model/grading_queue.py. The drawing itself is read from the
+    blob store through the submission's drawing_hash. A job is deleted once its
+    submission is graded or has failed for good.
+    """
+    __tablename__ = 'grading_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    submission_id = db.Column(db.Integer, db.ForeignKey('blind_trace_submissions.id'), nullable=False, unique=True)
+    status = db.Column(db.String(16), default='pending', nullable=False, index=True)  # pending | running
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    claimed_at = db.Column(db.Float, nullable=True)  # epoch seconds a dispatcher took the job
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __init__(self, submission_id):
+        self.submission_id = submission_id
+
+    def __repr__(self):
+        return f"GradingJob(id={self.id}, submission_id={self.submission_id}, status={self.status})"
 
 def initBlindTraceTable():
     """Initialize the Blind Trace Submissions table"""
     with app.app_context():
-        BlindTraceSubmission.__table__.drop(db.engine, checkfirst=True)
         db.create_all()
         print("Blind Trace Submissions table initialized")
@@ -0,0 +1,187 @@
+"""
+Content-addressed store for picture and drawing bytes, one file per sha256.
+
+Rows reference a blob by its hash.  Models stage the bytes with blob_stage() and
+register their hash column with track_blobs(): the file is written from the row's
+after_insert/after_update event, once the database has accepted the row, so a row
+that fails validation leaves no file behind.  If the transaction then rolls back,
+the blobs it created are deleted again unless another row references them; a
+commit re-writes any staged blob a concurrent rollback removed in the meantime.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from __init__ import app, db
+
+_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+_STAGED = '_staged_blob'  # instance attribute: (hash, bytes) waiting for the row to be saved
+_WRITTEN = 'blobs_written'  # session.info: hash -> (bytes, created by this transaction)
+_references = {}  # table name -> column holding blob hashes
+
+def blob_relpath(blob_hash):
+    """
+    Returns the path of a blob relative to BLOB_FOLDER.
+
+    Blobs are sharded two levels deep by the leading hex digits of their hash
+    (ab/cd/abcd...) so no single directory grows too large.
+
+    Parameters:
+    - blob_hash (str): The sha256 hex digest of the blob.
+
+    Returns:
+    - str: The relative path of the blob.
+    """
+    if not _HASH_PATTERN.match(blob_hash or ''):
+        raise ValueError(f"Invalid blob hash: {blob_hash}")
+    return os.path.join(blob_hash[0:2], blob_hash[2:4], blob_hash)
+
+def blob_path(blob_hash):
+    """
+    Returns the absolute path of a blob on disk.
+
+    Parameters:
+    - blob_hash (str): The sha256 hex digest of the blob.
+
+    Returns:
+    - str: The absolute path of the blob, whether or not it exists.
+    """
+    return os.path.join(app.config['BLOB_FOLDER'], blob_relpath(blob_hash))
+
+def blob_put(data):
+    """
+    Stores bytes in the content-addressed blob store.
+
+    The blob is keyed by the sha256 of its content, so storing the same bytes twice
+    (e.g. an identical drawing uploaded again) keeps a single copy. Writes go to a
+    temporary file that is renamed into place, so readers never see a partial blob.
+
+    Parameters:
+    - data (bytes): The content to store.
+
+    Returns:
+    - str: The sha256 hex digest identifying the blob.
+    """
+    blob_hash = hashlib.sha256(data).hexdigest()
+    path = blob_path(blob_hash)
+    if os.path.exists(path):
+        return blob_hash
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return blob_hash
+
+def blob_read(blob_hash):
+    """
+    Reads a blob's content.
+
+    Parameters:
+    - blob_hash (str): The sha256 hex digest of the blob.
+
+    Returns:
+    - bytes: The blob content.
+    """
+    with open(blob_path(blob_hash), 'rb') as blob_file:
+        return blob_file.read()
+
+def blob_delete(blob_hash):
+    """
+    Deletes a blob from the store.
+
+    Callers must check that no other record still references the hash, since
+    identical uploads share a blob.
+
+    Parameters:
+    - blob_hash (str): The sha256 hex digest of the blob.
+
+    Returns:
+    - bool: True if the blob no longer exists; otherwise, False.
+    """
+    try:
+        path = blob_path(blob_hash)
+        if os.path.exists(path):
+            os.remove(path)
+        return True
+    except Exception as e:
+        print(f'An error occurred while deleting blob {blob_hash}: {str(e)}')
+        return False
+
+def blob_stage(target, data):
+    """
+    Hashes bytes for a row and keeps them on the instance until the row is saved.
+
+    Parameters:
+    - target (db.Model): The row that will reference the blob; its model must be registered with track_blobs().
+    - data (bytes): The content to store.
+
+    Returns:
+    - str: The sha256 hex digest, for the row's hash column.
+    """
+    blob_hash = hashlib.sha256(data).hexdigest()
+    target.__dict__[_STAGED] = (blob_hash, data)
+    return blob_hash
+
+def _write_staged(mapper, connection, target):
+    staged = target.__dict__.pop(_STAGED, None)
+    if staged is None:
+        return
+    blob_hash, data = staged
+    created = not os.path.exists(blob_path(blob_hash))
+    blob_put(data)
+    session = object_session(target)
+    if session is not None:
+        written = session.info.setdefault(_WRITTEN, {})
+        written[blob_hash] = (data, created or written.get(blob_hash, (None, False))[1])
+
+def track_blobs(model, column):
+    """
+    Writes the blobs staged on a model's rows once the rows are flushed.
+
+    Parameters:
+    - model (db.Model): The model whose rows reference blobs.
+    - column (str): The column holding the blob hash.
+    """
+    _references[model.__tablename__] = column
+    event.listen(model, 'after_insert', _write_staged)
+    event.listen(model, 'after_update', _write_staged)
+
+def blob_references():
+    """
+    Returns:
+    - dict: Table name -> the column holding blob hashes, for every model registered with track_blobs().
+    """
+    return dict(_references)
+
+def blob_in_use(blob_hash):
+    """Whether any committed row references a blob"""
+    with db.engine.connect() as conn:
+        for table_name, column in _references.items():
+            table = db.metadata.tables[table_name]
+            if conn.execute(select(table.c[column]).where(table.c[column] == blob_hash).limit(1)).first():
+                return True
+    return False
+
+@event.listens_for(Session, 'after_commit')
+def _keep_written(session):
+    # A concurrent rollback may have removed a blob this transaction found already in place
+    for blob_hash, (data, _) in session.info.pop(_WRITTEN, {}).items():
+        if not os.path.exists(blob_path(blob_hash)):
+            blob_put(data)
+
+@event.listens_for(Session, 'after_rollback')
+def _remove_written(session):
+    for blob_hash, (_, created) in session.info.pop(_WRITTEN, {}).items():
+        try:
+            if created and not blob_in_use(blob_hash):
+                blob_delete(blob_hash)
+        except Exception as e:
+            print(f'An error occurred while removing rolled back blob {blob_hash}: {str(e)}')
@@ -2,6 +2,7 @@ import base64
 import os
 from werkzeug.utils import secure_filename
 from __init__ import app
+from model.thumbnails import delete_variants, schedule_variants, variant_for
 
 def default_car_decode():
         img_path = f"{app.config['UPLOAD_FOLDER']}/no_car.jpg"
@@ -9,7 +10,7 @@ def default_car_decode():
             base64_encoded = base64.b64encode(img_file.read()).decode('utf-8')
         return base64_encoded
 
-def car_base64_decode(user_id, user_car):
+def car_base64_decode(user_id, user_car, size=None):
     """
     Reads a user's car picture from the server.
 
@@ -19,12 +20,14 @@ def car_base64_decode(user_id, user_car):
     Parameters:
     - user_id (str): The unique identifier for the user.
     - user_car (str): The filename of the user's car picture.
+    - size (str): Optional resized variant to read, a key of THUMBNAIL_SIZES.
 
     Returns:
     - str: The base64 encoded image if the user has a car picture; otherwise, None.
     """
     img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_id, user_car)
     try:
+        img_path, _ = variant_for(img_path, size)
         with open(img_path, 'rb') as img_file:
             base64_encoded = base64.b64encode(img_file.read()).decode('utf-8')
         return base64_encoded
@@ -54,8 +57,11 @@ def car_base64_upload(base64_image, user_uid):
         if not os.path.exists(user_dir):
             os.makedirs(user_dir)
         file_path = os.path.join(user_dir, filename)
+        # The filename is reused on every upload, so drop the old variants first
+        delete_variants(file_path)
         with open(file_path, 'wb') as img_file:
             img_file.write(image_data)
+        schedule_variants(file_path)
         return filename 
     except Exception as e:
         print (f'An error occurred while updating the car picture: {str(e)}')
@@ -79,6 +85,7 @@ def car_file_delete(user_uid, filename):
         img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_uid, filename)
         if os.path.exists(img_path):
             os.remove(img_path)
+        delete_variants(img_path)
         # Success is when the file does not exist after calling this function
         return True 
     except Exception as e:
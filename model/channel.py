@@ -3,6 +3,7 @@ from sqlite3 import IntegrityError
 from sqlalchemy import Text, JSON
 from __init__ import app, db
 from model.group import Group
+from model.backup import upsert_in_batches
 class Channel(db.Model):
     """
     Channel Model
@@ -96,18 +97,18 @@ class Channel(db.Model):
             return None
         return self
     @staticmethod
-    def restore(data):
-        channels = {}
-        for channel_data in data:
-            _ = channel_data.pop('id', None)  # Remove 'id' from channel_data
-            name = channel_data.get("name", None)
-            channel = Channel.query.filter_by(_name=name).first()
-            if channel:
-                channel.update(channel_data)
-            else:
-                channel = Channel(**channel_data)
-                channel.create()
-        return channels
+    def restore(data, batch_size=1000):
+        """
+        Restores channels from read()-style dictionaries, matched on name,
+        updating existing ones and inserting the rest in batched transactions.
+
+        Returns:
+            dict: Counts of inserted and updated channels.
+        """
+        rows = [{'_name': channel_data['name'], '_group_id': channel_data['group_id'],
+                 '_attributes': channel_data.get('attributes') or {}}
+                for channel_data in data if channel_data.get('name') and 'group_id' in channel_data]
+        return upsert_in_batches(Channel.__table__, rows, key=('_name',), batch_size=batch_size)
 def initChannels():
     """
     The initChannels function creates the Channel table and adds tester data to the table.
@@ -1,6 +1,7 @@
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from __init__ import app, db
+from model.backup import upsert_in_batches
 
 class Time(db.Model):
     """Time Model for storing drawing completion times"""
@@ -47,14 +48,22 @@ class Time(db.Model):
         return f"Time(id={self.id}, users_name={self.users_name}, time_taken={self.time_taken})"
 
     def create(self):
-        """Create and return a new time entry"""
-        try:
-            db.session.add(self)
-            db.session.commit()
-            return self
-        except Exception as e:
-            db.session.rollback()
-            raise e
+        """Create and return a new time entry, updating the leaderboard in the same commit"""
+        from model.leaderboard import LeaderboardEntry  # leaderboard imports this module
+        for attempt in range(2):
+            try:
+                db.session.add(self)
+                LeaderboardEntry.record_time(self)
+                db.session.commit()
+                return self
+            except IntegrityError:
+                db.session.rollback()
+                if attempt:
+                    raise
+                # Another request created this user's entry for the word first; record_time now updates it
+            except Exception as e:
+                db.session.rollback()
+                raise e
 
     def read(self):
         """Return dictionary of time entry attributes"""
@@ -97,27 +106,26 @@ class Time(db.Model):
         return cls.query.filter_by(created_by=user_id).all()
 
     @staticmethod
-    def restore(data):
-        entries = {}
+    def restore(data, batch_size=1000):
+        """
+        Restore timer entries from read()-style dictionaries, matched on
+        (users_name, drawn_word): existing entries are updated and the rest
+        inserted, with one IN query and one transaction per batch.
+
+        Returns:
+            dict: Counts of inserted and updated entries.
+        """
+        fields = ('users_name', 'timer_duration', 'time_taken', 'drawn_word', 'created_by')
+        rows = []
         for entry_data in data:
-            _ = entry_data.pop('id', None)
-            users_name = entry_data.get("users_name", None)
-            drawn_word = entry_data.get("drawn_word", None)
-            
-            entry = Time.query.filter_by(
-                users_name=users_name,
-                drawn_word=drawn_word
-            ).first()
-            
-            if entry:
-                entry.update(entry_data)
-            else:
-                entry = Time(**entry_data)
-                entry.create()
-            
-            entries[f"{users_name}_{drawn_word}"] = entry
-        
-        return entries
+            if not entry_data.get('users_name') or not entry_data.get('drawn_word'):
+                continue
+            row = {field: entry_data[field] for field in fields if field in entry_data}
+            for field in ('date_created', 'date_modified'):
+                if entry_data.get(field):
+                    row[field] = datetime.strptime(entry_data[field], "%Y-%m-%d %H:%M:%S")
+            rows.append(row)
+        return upsert_in_batches(Time.__table__, rows, key=('users_name', 'drawn_word'), batch_size=batch_size)
 
 def initTimerTable():
     """Initialize the timer database table"""
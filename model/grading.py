@@ -0,0 +1,105 @@
+"""
+Scoring of blind-trace drawings against a reference image.
+
+Images are compared as float32 grayscale arrays, so differences cannot wrap around
+the way uint8 subtraction does.  The score is the structural similarity (SSIM) over
+sliding square windows; plain MSE is reported alongside it.  Window sums come from
+summed-area tables, so each window mean costs four lookups regardless of window size
+and the whole computation is a handful of vectorized array operations.
+
+Many submissions against the same reference are graded as one stacked (N, H, W)
+array; the reference statistics are computed once and the stack is processed in
+chunks to bound memory.
+"""
+import numpy as np
+
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+BATCH_CHUNK = 16  # drawings per vectorized step; 16 canvases of 800x500 use ~500 MB of float64 temporaries
+
+def _window_means(images, window):
+    """
+    Mean over every window x window patch (valid region only).
+
+    Parameters:
+    - images (numpy.ndarray): (..., H, W) array.
+    - window (int): Window edge in pixels.
+
+    Returns:
+    - numpy.ndarray: (..., H - window + 1, W - window + 1) float64 array.
+    """
+    # Zero first row/column so every window sum is four lookups, with no edge cases
+    shape = images.shape[:-2] + (images.shape[-2] + 1, images.shape[-1] + 1)
+    table = np.zeros(shape, dtype=np.float64)
+    np.cumsum(images, axis=-2, dtype=np.float64, out=table[..., 1:, 1:])
+    np.cumsum(table[..., 1:, 1:], axis=-1, out=table[..., 1:, 1:])
+    sums = table[..., window:, window:] - table[..., :-window, window:]
+    sums -= table[..., window:, :-window]
+    sums += table[..., :-window, :-window]
+    sums /= window * window
+    return sums
+
+def _reference_stats(reference, window):
+    y = reference.astype(np.float32)
+    mu_y = _window_means(y, window)
+    var_y = _window_means(y * y, window) - mu_y ** 2
+    return y, mu_y, var_y
+
+def _grade_chunk(drawings, reference_stats, window):
+    y, mu_y, var_y = reference_stats
+    x = drawings.astype(np.float32)
+
+    diff = x - y
+    mse = np.mean(diff * diff, axis=(-2, -1), dtype=np.float64)
+
+    mu_x = _window_means(x, window)
+    var_x = _window_means(x * x, window) - mu_x ** 2
+    cov = _window_means(x * y, window) - mu_x * mu_y
+    ssim_map = ((2 * mu_x * mu_y + SSIM_C1) * (2 * cov + SSIM_C2)) / (
+        (mu_x ** 2 + mu_y ** 2 + SSIM_C1) * (var_x + var_y + SSIM_C2)
+    )
+    ssim = ssim_map.mean(axis=(-2, -1))
+    return mse, ssim
+
+def grade_batch(drawings, reference, window=SSIM_WINDOW):
+    """
+    Grades N drawings against one reference.
+
+    Parameters:
+    - drawings (numpy.ndarray): (N, H, W) grayscale uint8 stack.
+    - reference (numpy.ndarray): (H, W) grayscale uint8 reference.
+    - window (int): SSIM window edge in pixels.
+
+    Returns:
+    - dict: 'mse' and 'ssim' float32 arrays and a 'score' array, each of length N; score is SSIM
+      clipped to [0, 1] and scaled to 0-100.
+    """
+    drawings = np.asarray(drawings)
+    if drawings.ndim != 3 or drawings.shape[1:] != reference.shape:
+        raise ValueError(f"Expected (N, {reference.shape[0]}, {reference.shape[1]}) drawings, got {drawings.shape}")
+    if min(reference.shape) < window:
+        raise ValueError(f"Images must be at least {window}x{window} pixels")
+
+    reference_stats = _reference_stats(reference, window)
+    mse = np.empty(len(drawings), dtype=np.float32)
+    ssim = np.empty(len(drawings), dtype=np.float32)
+    for start in range(0, len(drawings), BATCH_CHUNK):
+        stop = start + BATCH_CHUNK
+        mse[start:stop], ssim[start:stop] = _grade_chunk(drawings[start:stop], reference_stats, window)
+    score = np.round(100 * np.clip(ssim.astype(np.float64), 0, 1), 2)
+    return {"mse": mse, "ssim": ssim, "score": score}
+
+def grade(drawing, reference, window=SSIM_WINDOW):
+    """
+    Grades one drawing against a reference.
+
+    Parameters:
+    - drawing (numpy.ndarray): (H, W) grayscale uint8 drawing.
+    - reference (numpy.ndarray): (H, W) grayscale uint8 reference.
+
+    Returns:
+    - dict: 'mse', 'ssim' and 'score' as Python floats.
+    """
+    result = grade_batch(np.asarray(drawing)[np.newaxis], reference, window)
+    return {key: float(values[0]) for key, values in result.items()}
@@ -0,0 +1,221 @@
+"""
+Background grading of blind-trace submissions.
+
+The API only stores the drawing in the blob store and a GradingJob next to a pending
+BlindTraceSubmission, and returns.  A dispatcher thread in each gunicorn worker claims
+pending jobs from the database and grades them in a process pool, so decoding, the
+reference fetch and SSIM never run on a request thread and never hold the GIL of a
+process serving requests.  Processes that should not grade (the gevent SSE service)
+set GRADING_DISPATCHER=0.
+
+Claims are optimistic: a job is taken by an UPDATE guarded on its attempt count, so
+only one dispatcher wins it however many workers poll the same table.  The same
+UPDATE only succeeds while fewer than `workers` jobs are running, so the limit holds
+across all dispatchers rather than multiplying with the number of gunicorn workers.  A job whose
+dispatcher died stays 'running' until GRADING_JOB_TIMEOUT passes, then is claimed
+again, up to GRADING_MAX_ATTEMPTS times.
+"""
+import io
+import multiprocessing
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from PIL import Image
+from sqlalchemy import and_, delete, func, or_, select, update
+from __init__ import app, db
+from model.blind_trace import BlindTraceSubmission, GradingJob
+from model.blob_store import blob_read
+from model.grading import grade
+from model.reference_images import reference_array
+
+class QueueFull(Exception):
+    """Raised when GRADING_QUEUE_MAX jobs are already waiting"""
+
+def grade_drawing(drawing_hash, image_url):
+    """
+    Grades one drawing; runs in a worker process.
+
+    Only the blob hash crosses the process boundary; the worker reads and decodes the
+    PNG itself. Each worker keeps its own in-memory reference cache and shares the
+    disk cache.
+
+    Parameters:
+    - drawing_hash (str): The blob store hash of the drawing PNG.
+    - image_url (str): The reference image URL.
+
+    Returns:
+    - float: The 0-100 score.
+    """
+    with Image.open(io.BytesIO(blob_read(drawing_hash))) as img:
+        drawing = img.convert("L")
+    reference = reference_array(image_url, drawing.size)
+    return grade(np.asarray(drawing), reference)["score"]
+
+class GradingQueue:
+    """Durable grading queue backed by the grading_jobs table"""
+
+    def __init__(self, workers=2, max_queued=200, max_attempts=3, job_timeout=120, poll_interval=1.0, dispatch=True):
+        self.workers = workers  # jobs running at once across every dispatcher
+        self.dispatch = dispatch
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def queued_count(self):
+        """Number of jobs pending or being graded, across all workers"""
+        return db.session.query(func.count(GradingJob.id)).scalar()
+
+    def is_full(self):
+        return self.queued_count() >= self.max_queued
+
+    def enqueue(self, submission):
+        """
+        Saves a submission together with its grading job in one transaction.
+
+        Parameters:
+        - submission (BlindTraceSubmission): The new, unsaved submission; its staged drawing is stored with it.
+
+        Returns:
+        - BlindTraceSubmission: The saved submission, status 'pending'.
+
+        Raises:
+        - QueueFull: GRADING_QUEUE_MAX jobs are already waiting.
+        """
+        if self.is_full():
+            raise QueueFull(f"{self.max_queued} submissions are already waiting to be graded")
+        try:
+            submission.status = 'pending'
+            db.session.add(submission)
+            db.session.flush()
+            db.session.add(GradingJob(submission.id))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.start()
+        self._wake.set()
+        return submission
+
+    def start(self):
+        """Starts this process's dispatcher thread if it is not running yet and dispatching is enabled"""
+        if not self.dispatch:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='grading-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn, not fork: the serving process already runs other threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _run(self):
+        in_flight = {}  # future -> claimed job row
+        while True:
+            try:
+                with app.app_context():
+                    if len(in_flight) < self.workers:
+                        for job in self._claim(self.workers - len(in_flight)):
+                            future = self._pool().submit(grade_drawing, job.drawing_hash, job.image_url)
+                            in_flight[future] = job
+                if not in_flight:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    continue
+                done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                with app.app_context():
+                    for future in done:
+                        self._finish(in_flight.pop(future), future)
+            except Exception:
+                traceback.print_exc()
+                time.sleep(self.poll_interval)
+
+    def _claim(self, limit):
+        """Atomically takes up to `limit` pending (or abandoned) jobs"""
+        jobs = GradingJob.__table__
+        submissions = BlindTraceSubmission.__table__
+        now = time.time()
+        with db.engine.begin() as conn:
+            candidates = conn.execute(
+                select(jobs.c.id, jobs.c.submission_id, jobs.c.attempts, submissions.c.drawing_hash, submissions.c.image_url)
+                .join(submissions, submissions.c.id == jobs.c.submission_id)
+                .where(or_(
+                    jobs.c.status == 'pending',
+                    and_(jobs.c.status == 'running', jobs.c.claimed_at < now - self.job_timeout)
+                ))
+                .order_by(jobs.c.id)
+                .limit(limit)
+            ).all()
+
+        claimed = []
+        for job in candidates:
+            if job.attempts >= self.max_attempts:
+                self._fail(job, "Grading did not finish")
+                continue
+            # Running jobs (not yet presumed lost) counted inside the UPDATE, so the check and the claim are one statement
+            running = (
+                select(func.count()).select_from(jobs)
+                .where(jobs.c.status == 'running', jobs.c.claimed_at >= now - self.job_timeout)
+                .scalar_subquery()
+            )
+            with db.engine.begin() as conn:
+                result = conn.execute(
+                    update(jobs)
+                    .where(jobs.c.id == job.id, jobs.c.attempts == job.attempts, running < self.workers)
+                    .values(status='running', claimed_at=now, attempts=job.attempts + 1)
+                )
+            if result.rowcount == 1:
+                claimed.append(job)
+        return claimed
+
+    def _finish(self, job, future):
+        jobs = GradingJob.__table__
+        try:
+            score = future.result()
+        except BrokenProcessPool as e:
+            # A worker process died; every job it held fails the same way, so start a fresh pool
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self._retry_or_fail(job, e)
+            return
+        except Exception as e:
+            self._retry_or_fail(job, e)
+            return
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(BlindTraceSubmission.__table__)
+                .where(BlindTraceSubmission.__table__.c.id == job.submission_id)
+                .values(status='graded', score=score, error=None)
+            )
+            conn.execute(delete(jobs).where(jobs.c.id == job.id))
+
+    def _retry_or_fail(self, job, error):
+        print(f"Grading submission {job.submission_id} failed (attempt {job.attempts + 1}): {error}")
+        if job.attempts + 1 >= self.max_attempts:
+            self._fail(job, str(error))
+            return
+        jobs = GradingJob.__table__
+        with db.engine.begin() as conn:
+            conn.execute(update(jobs).where(jobs.c.id == job.id).values(status='pending', claimed_at=None))
+
+    def _fail(self, job, message):
+        jobs = GradingJob.__table__
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(BlindTraceSubmission.__table__)
+                .where(BlindTraceSubmission.__table__.c.id == job.submission_id)
+                .values(status='failed', error=message[:255])
+            )
+            conn.execute(delete(jobs).where(jobs.c.id == job.id))
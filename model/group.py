@@ -3,6 +3,7 @@ from sqlite3 import IntegrityError
 from __init__ import app, db
 from model.section import Section
 from model.user import User
+from model.backup import upsert_in_batches
 # Association table for the many-to-many relationship between Group and User (moderators)
 group_moderators = db.Table('group_moderators',
     db.Column('group_id', db.Integer, db.ForeignKey('groups.id'), primary_key=True),
@@ -102,28 +103,18 @@ class Group(db.Model):
             return None
         return self
     @staticmethod
-    def restore(data, users):
-        groups = {}
-        for group_data in data:
-            _ = group_data.pop('id', None)  # Remove 'id' from group_data
-            name = group_data.get("name", None)
-            group = Group.query.filter_by(_name=name).first()
-            if group:
-                group.update(group_data)
-            else:
-                group = Group(**group_data)
-                group.create()
-        # Restore moderators relationship (TBD)
+    def restore(data, users=None, batch_size=1000):
         """
-        for group_data in data:
-            group = groups[group_data['name']]
-            if 'moderators' in group_data:
-                for moderator_id in group_data['moderators']:
-                    moderator = users[moderator_id]
-                    group.moderators.append(moderator)
-        db.session.commit()
+        Restores groups from read()-style dictionaries, matched on name,
+        updating existing ones and inserting the rest in batched transactions.
+        Moderators are not restored (TBD).
+
+        Returns:
+            dict: Counts of inserted and updated groups.
         """
-        return groups
+        rows = [{'_name': group_data['name'], '_section_id': group_data['section_id']}
+                for group_data in data if group_data.get('name') and 'section_id' in group_data]
+        return upsert_in_batches(Group.__table__, rows, key=('_name',), batch_size=batch_size)
 def initGroups():
     """
     The initGroups function creates the Group table and adds tester data to the table.
@@ -1,11 +1,18 @@
+from sqlalchemy import case, func, select, tuple_
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
 from datetime import datetime
 from model.competition import Time
+from model.backup import upsert_in_batches, upsert_rows
 
 class LeaderboardEntry(db.Model):
     """LeaderboardEntry Model for storing drawing scores"""
     __tablename__ = 'leaderboard'
+    __table_args__ = (
+        db.Index('ix_leaderboard_drawing_score', 'drawing_name', 'score'),
+        # One entry per user and word; record_time and the API retry as an update when they race
+        db.Index('ix_leaderboard_user_drawing', 'created_by', 'drawing_name', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     profile_name = db.Column(db.String(255), nullable=False)
@@ -23,7 +30,8 @@ class LeaderboardEntry(db.Model):
         self.created_by = created_by
         self.is_deleted = is_deleted
 
-    def _validate_score(self, score):
+    @staticmethod
+    def _validate_score(score):
         """Validate score is between 0 and 1000"""
         try:
             score = int(score)
@@ -33,35 +41,168 @@ class LeaderboardEntry(db.Model):
         except (TypeError, ValueError) as e:
             raise ValueError(f"Invalid score: {str(e)}")
 
-    def calculate_score(self, timer_duration, time_taken):
-        """Calculate score based on competition performance"""
+    @staticmethod
+    def score_for(timer_duration, time_taken):
+        """Scale the speed factor (duration / time taken) to at most 1000 points"""
+        return min(1000, timer_duration * 500 // max(time_taken, 1))
+
+    @staticmethod
+    def score_column():
+        """SQL expression computing score_for() over the competition table"""
+        time_taken = case((Time.time_taken < 1, 1), else_=Time.time_taken)
+        score = (Time.timer_duration * 500) // time_taken
+        return case((score > 1000, 1000), else_=score)
+
+    @classmethod
+    def record_time(cls, time_entry):
+        """
+        Fold a competition result into the leaderboard.
+
+        Keeps the best score per (user, word); entries removed by an admin are
+        left alone so a new result does not bring them back.  Changes are only
+        staged on the session; Time.create() commits them with the result.
+        """
+        score = cls.score_for(time_entry.timer_duration, time_entry.time_taken)
+        entry = cls.query.filter_by(
+            created_by=time_entry.created_by,
+            drawing_name=time_entry.drawn_word
+        ).first()
+        if entry is None:
+            entry = cls(
+                profile_name=time_entry.users_name,
+                drawing_name=time_entry.drawn_word,
+                score=score,
+                created_by=time_entry.created_by
+            )
+            db.session.add(entry)
+        elif not entry.is_deleted and score > entry.score:
+            entry.score = score
+        return entry
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """
+        Recompute the leaderboard entries derived from the competition table.
+
+        Best scores are computed by one grouped query in the database, with the
+        profile name taken from each group's latest result, and upserted on
+        (created_by, drawing_name) in batches, so existing entries keep their ids.
+        Entries an admin removed are left alone, and entries with no competition
+        results (posted directly to the API) are kept as they are.
+
+        Returns:
+            int: The number of entries inserted or updated.
+        """
+        deleted = set(
+            db.session.query(cls.created_by, cls.drawing_name).filter_by(is_deleted=True).all()
+        )
+        groups = select(
+            func.max(Time.id).label('latest_id'),
+            func.max(cls.score_column()).label('score')
+        ).group_by(Time.created_by, Time.drawn_word).subquery()
+        best = db.session.query(
+            Time.created_by,
+            Time.drawn_word,
+            Time.users_name,
+            groups.c.score
+        ).join(groups, Time.id == groups.c.latest_id)
+
         try:
-            return int((timer_duration / time_taken) * 100)
-        except ZeroDivisionError:
-            raise ValueError("Time taken cannot be zero")
+            conn = db.session.connection()
+            count, batch = 0, []
+            for user_id, word, name, score in best.yield_per(batch_size):
+                if (user_id, word) in deleted:
+                    continue
+                batch.append({
+                    "profile_name": name,
+                    "drawing_name": word,
+                    "score": score,
+                    "created_by": user_id
+                })
+                if len(batch) >= batch_size:
+                    count += sum(upsert_rows(conn, cls.__table__, batch, key=('created_by', 'drawing_name')))
+                    batch = []
+            if batch:
+                count += sum(upsert_rows(conn, cls.__table__, batch, key=('created_by', 'drawing_name')))
+            db.session.commit()
+            return count
         except Exception as e:
-            raise ValueError(f"Score calculation error: {str(e)}")
+            db.session.rollback()
+            raise e
 
     @classmethod
     def get_grouped_rankings(cls):
-        """Get rankings grouped by drawing name"""
-        try:
-            # Get unique drawings from competition
-            drawings = Time.query.with_entities(Time.drawn_word).distinct().all()
-            result = {}
-            
-            for drawing in drawings:
-                entries = cls.query.filter_by(
-                    drawing_name=drawing[0]
-                ).order_by(
-                    cls.score.desc()
-                ).all()
-                result[drawing[0]] = [entry.read() for entry in entries]
-            
-            return result
-        except Exception as e:
-            print(f"Error getting rankings: {str(e)}")
-            return {}
+        """Get rankings grouped by drawing name, best score first, in one query"""
+        entries = cls.query.filter_by(
+            is_deleted=False
+        ).order_by(
+            cls.drawing_name, cls.score.desc()
+        ).all()
+        result = {}
+        for entry in entries:
+            result.setdefault(entry.drawing_name, []).append(entry.read())
+        return result
+
+    @staticmethod
+    def encode_cursor(entry):
+        """Opaque keyset cursor pointing just after `entry`"""
+        return f"{entry.score}:{entry.id}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Parse a cursor from encode_cursor(), raising ValueError if malformed"""
+        score, entry_id = cursor.split(":")
+        return int(score), int(entry_id)
+
+    @classmethod
+    def ranked(cls):
+        """Non-deleted entries in ranking order: best score first, ties by age"""
+        return cls.query.filter_by(is_deleted=False).order_by(cls.score.desc(), cls.id.asc())
+
+    @classmethod
+    def page(cls, query, limit, cursor=None):
+        """
+        Fetch one keyset page of a ranked() query.
+
+        Returns:
+            tuple: (entries, next_cursor); next_cursor is None on the last page.
+        """
+        if cursor:
+            score, entry_id = cls.decode_cursor(cursor)
+            query = query.filter(
+                (cls.score < score) | ((cls.score == score) & (cls.id > entry_id))
+            )
+        entries = query.limit(limit + 1).all()
+        next_cursor = cls.encode_cursor(entries[limit - 1]) if len(entries) > limit else None
+        return entries[:limit], next_cursor
+
+    @classmethod
+    def get_word_page(cls, word, limit, cursor=None):
+        """One page of the rankings for a single word"""
+        return cls.page(cls.ranked().filter(cls.drawing_name == word), limit, cursor)
+
+    @classmethod
+    def get_top(cls, limit, cursor=None):
+        """One page of the best scores across all words"""
+        return cls.page(cls.ranked(), limit, cursor)
+
+    @classmethod
+    def get_rank(cls, user_id, word):
+        """
+        Rank of a user's entry for a word, without loading the board.
+
+        Returns:
+            tuple: (entry, rank), or (None, None) if the user has no entry.
+        """
+        entry = cls.query.filter_by(created_by=user_id, drawing_name=word, is_deleted=False).first()
+        if entry is None:
+            return None, None
+        ahead = cls.query.filter(
+            cls.drawing_name == word,
+            cls.is_deleted == False,  # noqa: E712
+            (cls.score > entry.score) | ((cls.score == entry.score) & (cls.id < entry.id))
+        ).count()
+        return entry, ahead + 1
 
     def __repr__(self):
         return f"LeaderboardEntry(id={self.id}, profile_name={self.profile_name}, score={self.score})"
@@ -118,51 +259,72 @@ class LeaderboardEntry(db.Model):
         return cls.query.filter_by(created_by=user_id).all()
 
     @staticmethod
-    def restore(data):
-        entries = {}
-        try:
-            for entry_data in data:
-                _ = entry_data.pop('id', None)
-                profile_name = entry_data.get("profile_name", None)
-                drawing_name = entry_data.get("drawing_name", None)
-                
-                # Try to find matching competition entry
-                competition_entry = Time.query.filter_by(
-                    users_name=profile_name,
-                    drawn_word=drawing_name
-                ).first()
-                
-                if competition_entry:
-                    # Calculate score from competition data
-                    score = int((competition_entry.timer_duration / competition_entry.time_taken) * 100)
-                    entry_data['score'] = max(score, entry_data.get('score', 0))
-                
-                entry = LeaderboardEntry.query.filter_by(
-                    profile_name=profile_name,
-                    drawing_name=drawing_name
-                ).first()
-                
-                if entry:
-                    if entry_data.get('score', 0) > entry.score:
-                        for key, value in entry_data.items():
-                            setattr(entry, key, value)
-                        entry.update()
-                else:
-                    entry = LeaderboardEntry(**entry_data)
-                    entry.create()
-                
-                entries[f"{profile_name}_{drawing_name}"] = entry
-            
-            return entries
-        except Exception as e:
-            print(f"Error in restore method: {str(e)}")
-            return {}
+    def restore(data, batch_size=1000):
+        """
+        Restore leaderboard entries from read()-style dictionaries, matched on
+        (created_by, drawing_name), the entry's unique key.
+
+        An entry takes the better of its own score and the best score_for() of the
+        user's competition results for the word, and replaces an existing entry only
+        if it scores higher. Every score is validated before the first batch is
+        written; each batch then looks up competition results and existing entries
+        with one IN query each and upserts in one transaction.
+
+        Returns:
+            dict: Counts of inserted and updated entries.
+
+        Raises:
+            ValueError: An entry's score is not between 0 and 1000.
+        """
+        times = Time.__table__
+        entries = LeaderboardEntry.__table__
+        fields = ('profile_name', 'drawing_name', 'score', 'created_by', 'is_deleted')
+
+        def to_rows(conn, batch):
+            pairs = list({(entry_data['created_by'], entry_data['drawing_name']) for entry_data in batch})
+            competition = {}
+            for result in conn.execute(
+                select(times.c.created_by, times.c.drawn_word, times.c.timer_duration, times.c.time_taken)
+                .where(tuple_(times.c.created_by, times.c.drawn_word).in_(pairs))
+            ):
+                pair = (result.created_by, result.drawn_word)
+                score = LeaderboardEntry.score_for(result.timer_duration, result.time_taken)
+                competition[pair] = max(score, competition.get(pair, 0))
+            existing = dict(((entry.created_by, entry.drawing_name), entry.score) for entry in conn.execute(
+                select(entries.c.created_by, entries.c.drawing_name, entries.c.score)
+                .where(tuple_(entries.c.created_by, entries.c.drawing_name).in_(pairs))
+            ))
+            rows = []
+            for entry_data in batch:
+                pair = (entry_data['created_by'], entry_data['drawing_name'])
+                row = {field: entry_data[field] for field in fields if field in entry_data}
+                for field in ('date_created', 'date_modified'):
+                    if entry_data.get(field):
+                        row[field] = datetime.strptime(entry_data[field], "%Y-%m-%d %H:%M:%S")
+                if pair in competition:
+                    row['score'] = max(competition[pair], row.get('score', 0))
+                if pair in existing and row.get('score', 0) <= existing[pair]:
+                    continue
+                rows.append(row)
+            return rows
+
+        data = [dict(entry_data) for entry_data in data
+                if entry_data.get('created_by') is not None and entry_data.get('drawing_name')]
+        # Validate everything up front, so a bad entry fails the restore before any batch commits
+        for entry_data in data:
+            if 'score' in entry_data:
+                entry_data['score'] = LeaderboardEntry._validate_score(entry_data['score'])
+        return upsert_in_batches(entries, data, key=('created_by', 'drawing_name'),
+                                 batch_size=batch_size, to_rows=to_rows)
 
 def initLeaderboardTable():
-    """Initialize the leaderboard table"""
+    """
+    Fill the leaderboard from competition results when it is empty.
+
+    The table itself comes from the migrations: init_db runs upgrade_schema() first.
+    """
     with app.app_context():
-        # Drop existing table if it exists
-        LeaderboardEntry.__table__.drop(db.engine, checkfirst=True)
-        # Create new table with updated schema
-        db.create_all()
-        print("Leaderboard table initialized with is_deleted column")
+        # Scores are maintained at write time; a populated table (and its hidden entries) is kept
+        if LeaderboardEntry.query.first() is None:
+            count = LeaderboardEntry.rebuild()
+            print(f"Leaderboard table initialized with {count} entries")
@@ -24,8 +24,8 @@ class NestPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     _title = db.Column(db.String(255), nullable=False)
     _content = db.Column(Text, nullable=False)
-    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    _group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=False)
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    _group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=False, index=True)
     _image_url = db.Column(db.String(255), nullable=False)
 
     def __init__(self, title, content, user_id, group_id, image_url):
@@ -94,6 +94,52 @@ class NestPost(db.Model):
             "image_url": self._image_url
         }
         return data
+
+    @staticmethod
+    def list_posts(user_id=None, group_id=None, limit=None, after_id=None):
+        """
+        Lists posts, with user and group names, in a single query.
+
+        Posts are joined to users and groups instead of calling read() per row,
+        which looks both up separately. Pages are keyed on id, so later pages cost
+        the same as the first.
+
+        Args:
+            user_id (int, optional): Only posts by this user.
+            group_id (int, optional): Only posts in this group.
+            limit (int, optional): Page size; all matching posts when None.
+            after_id (int, optional): Return posts with an id greater than this.
+
+        Returns:
+            tuple: (list of dicts shaped like read(), next after_id or None on the last page).
+        """
+        query = db.session.query(
+            NestPost.id, NestPost._title, NestPost._content, NestPost._image_url,
+            User._name.label('user_name'), Group._name.label('group_name')
+        ).outerjoin(User, User.id == NestPost._user_id).outerjoin(Group, Group.id == NestPost._group_id)
+        if user_id is not None:
+            query = query.filter(NestPost._user_id == user_id)
+        if group_id is not None:
+            query = query.filter(NestPost._group_id == group_id)
+        if after_id is not None:
+            query = query.filter(NestPost.id > after_id)
+        query = query.order_by(NestPost.id)
+        if limit is not None:
+            query = query.limit(limit + 1)
+        rows = query.all()
+        next_after_id = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after_id = rows[-1].id
+        posts = [{
+            "id": row.id,
+            "title": row._title,
+            "content": row._content,
+            "user_name": row.user_name,
+            "group_name": row.group_name,
+            "image_url": row._image_url
+        } for row in rows]
+        return posts, next_after_id
     
     def update(self):
         """
@@ -0,0 +1,143 @@
+"""
+Password hashing off the request threads.
+
+check_password_hash/generate_password_hash are deliberately slow.  hashlib releases
+the GIL while it iterates, so running them on a small dedicated thread pool lets
+the rest of the worker's threads keep serving other endpoints during a burst of
+logins, and bounds how many CPU cores hashing may take at once.  When every worker
+and queue slot is busy the call fails fast with HashingBusy instead of piling up.
+"""
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import check_password_hash, generate_password_hash
+from __init__ import app
+
+class HashingBusy(Exception):
+    """Raised when PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE hashes are already in flight"""
+
+_executor = ThreadPoolExecutor(max_workers=app.config['PASSWORD_HASH_WORKERS'], thread_name_prefix='passwords')
+_slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_WORKERS'] + app.config['PASSWORD_HASH_QUEUE'])
+
+# Bulk imports share one process pool, started on first use and kept for the life of the worker
+_import_pool = None
+_import_pool_lock = threading.Lock()
+
+def _get_import_pool():
+    global _import_pool
+    with _import_pool_lock:
+        if _import_pool is None:
+            # spawn, not fork: the serving process already runs other threads
+            _import_pool = ProcessPoolExecutor(max_workers=app.config['PASSWORD_IMPORT_WORKERS'],
+                                               mp_context=multiprocessing.get_context('spawn'))
+        return _import_pool
+
+def _discard_import_pool(pool):
+    global _import_pool
+    with _import_pool_lock:
+        if _import_pool is pool:
+            _import_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@functools.lru_cache(maxsize=None)
+def _method_prefix(method):
+    """
+    The method prefix werkzeug writes for a method, with defaults spelled out
+    (e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000'), to compare against stored hashes.
+
+    Werkzeug's defaults change between versions, so one deliberately slow hash is run
+    to read them, on the first rehash check rather than whenever the module is imported.
+    """
+    return generate_password_hash('', method).split('$', 1)[0]
+
+def _run(func, *args, **kwargs):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy("Too many password checks in progress")
+    try:
+        return _executor.submit(func, *args, **kwargs).result()
+    finally:
+        _slots.release()
+
+def hash_password(password):
+    """
+    Hashes a password with PASSWORD_HASH_METHOD on the hashing pool.
+
+    Parameters:
+    - password (str): The plain-text password.
+
+    Returns:
+    - str: The werkzeug hash string.
+
+    Raises:
+    - HashingBusy: The pool and its queue are full.
+    """
+    return _run(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'], salt_length=10)
+
+def check_password(password_hash, password):
+    """
+    Verifies a password against a stored hash on the hashing pool.
+
+    Parameters:
+    - password_hash (str): The stored werkzeug hash.
+    - password (str): The plain-text password to check.
+
+    Returns:
+    - bool: True if the password matches.
+
+    Raises:
+    - HashingBusy: The pool and its queue are full.
+    """
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """
+    Checks whether a stored hash was made with a method or cost other than PASSWORD_HASH_METHOD.
+
+    Parameters:
+    - password_hash (str): The stored werkzeug hash.
+
+    Returns:
+    - bool: True if the hash should be replaced on the next successful login.
+    """
+    return password_hash.split('$', 1)[0] != _method_prefix(app.config['PASSWORD_HASH_METHOD'])
+
+def hash_passwords(passwords, shared=()):
+    """
+    Hashes many passwords at once for bulk imports, using every CPU.
+
+    Every password gets its own salt, except those listed in `shared`: an import's
+    DEFAULT_PASSWORD is public anyway, so it is hashed once and that hash reused for
+    every row. The work runs on a process pool of PASSWORD_IMPORT_WORKERS, separate
+    from the login pool so an import never takes hashing capacity from logins. The
+    pool is started by the first import and reused by later ones, which queue on it
+    rather than starting processes of their own.
+
+    Parameters:
+    - passwords (list): Plain-text passwords, in row order.
+    - shared (iterable): Passwords hashed once and shared by every row using them.
+
+    Returns:
+    - list: Werkzeug hash strings, in the same order as `passwords`.
+    """
+    method = app.config['PASSWORD_HASH_METHOD']
+    shared = set(shared)
+    hashes = {password: generate_password_hash(password, method, salt_length=10)
+              for password in shared.intersection(passwords)}
+    pending = [password for password in passwords if password not in shared]
+    if len(pending) <= 1:
+        own = [generate_password_hash(password, method, salt_length=10) for password in pending]
+    else:
+        pool = _get_import_pool()
+        workers = app.config['PASSWORD_IMPORT_WORKERS']
+        try:
+            own = list(pool.map(generate_password_hash, pending, [method] * len(pending), [10] * len(pending),
+                                chunksize=max(1, len(pending) // (workers * 4))))
+        except BrokenProcessPool:
+            # A pool process died; the next import starts a fresh pool
+            _discard_import_pool(pool)
+            raise
+    own = iter(own)
+    return [hashes[password] if password in shared else next(own) for password in passwords]
@@ -2,8 +2,9 @@ import base64
 import os
 from werkzeug.utils import secure_filename
 from __init__ import app
+from model.thumbnails import delete_variants, schedule_variants, variant_for
 
-def pfp_base64_decode(user_id, user_pfp):
+def pfp_base64_decode(user_id, user_pfp, size=None):
     """
     Reads a user's profile picture from the server.
 
@@ -13,12 +14,14 @@ def pfp_base64_decode(user_id, user_pfp):
     Parameters:
     - user_id (str): The unique identifier for the user.
     - user_pfp (str): The filename of the user's profile picture.
+    - size (str): Optional resized variant to read, a key of THUMBNAIL_SIZES.
 
     Returns:
     - str: The base64 encoded image if the user has a profile picture; otherwise, None.
     """
     img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_id, user_pfp)
     try:
+        img_path, _ = variant_for(img_path, size)
         with open(img_path, 'rb') as img_file:
             base64_encoded = base64.b64encode(img_file.read()).decode('utf-8')
         return base64_encoded
@@ -48,8 +51,11 @@ def pfp_base64_upload(base64_image, user_uid):
         if not os.path.exists(user_dir):
             os.makedirs(user_dir)
         file_path = os.path.join(user_dir, filename)
+        # The filename is reused on every upload, so drop the old variants first
+        delete_variants(file_path)
         with open(file_path, 'wb') as img_file:
             img_file.write(image_data)
+        schedule_variants(file_path)
         return filename 
     except Exception as e:
         print (f'An error occurred while updating the profile picture: {str(e)}')
@@ -73,6 +79,7 @@ def pfp_file_delete(user_uid, filename):
         img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_uid, filename)
         if os.path.exists(img_path):
             os.remove(img_path)
+        delete_variants(img_path)
         # Success is when the file does not exist after calling this function
         return True 
     except Exception as e:
@@ -1,7 +1,13 @@
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from sqlalchemy import inspect
+from sqlalchemy.orm import deferred
+import base64
+import io
+from PIL import Image
 from __init__ import app, db
+from model.blob_store import blob_stage, blob_delete, blob_in_use, blob_path, track_blobs
+from model.thumbnails import delete_variants
 
 class Picture(db.Model):
     """Picture Model for storing drawing images"""
@@ -10,15 +16,74 @@ class Picture(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     drawing_name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    image_data = db.Column(db.Text, nullable=False)  # Base64 encoded image
+    # Legacy base64 data URI, emptied by migrate_pictures; deferred so listings never load it
+    image_data = deferred(db.Column(db.Text, nullable=True))
+    image_hash = db.Column(db.String(64), nullable=True, index=True)  # sha256 of the file in the blob store
+    mime_type = db.Column(db.String(50), nullable=True)
+    size = db.Column(db.Integer, nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
     user_name = db.Column(db.String(255), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, default=datetime.now, index=True)
 
-    def __init__(self, drawing_name, description, image_data, user_name):
+    def __init__(self, drawing_name, description, user_name, image_bytes=None, image_data=None):
         self.drawing_name = drawing_name
         self.description = description
-        self.image_data = image_data
         self.user_name = user_name
+        self.image_data = image_data
+        if image_bytes is not None:
+            self.store_image(image_bytes)
+
+    def store_image(self, image_bytes):
+        """Validate an image, stage it for the blob store and record its metadata; the file is written when the row is saved"""
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            self.width, self.height = img.size
+            self.mime_type = Image.MIME.get(img.format, 'application/octet-stream')
+        self.image_hash = blob_stage(self, image_bytes)
+        self.size = len(image_bytes)
+        self.image_data = None
+
+    def legacy_image_bytes(self):
+        """Decode the legacy data URI stored in image_data"""
+        encoded = self.image_data.split(',', 1)[1] if ',' in self.image_data else self.image_data
+        return base64.b64decode(encoded)
+
+    @property
+    def image_url(self):
+        return f"/api/pictures/{self.id}/image"
+
+    @property
+    def thumbnail_url(self):
+        return f"{self.image_url}?size=thumb"
+
+    @staticmethod
+    def encode_cursor(picture):
+        """Opaque keyset cursor pointing just after `picture`"""
+        return f"{picture.created_at.isoformat()}|{picture.id}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Parse a cursor from encode_cursor(), raising ValueError if malformed"""
+        created_at, picture_id = cursor.split("|")
+        return datetime.fromisoformat(created_at), int(picture_id)
+
+    @classmethod
+    def get_page(cls, limit, cursor=None):
+        """
+        One keyset page of pictures, newest first.
+
+        Returns:
+            tuple: (pictures, next_cursor); next_cursor is None on the last page.
+        """
+        query = cls.query.order_by(cls.created_at.desc(), cls.id.desc())
+        if cursor:
+            created_at, picture_id = cls.decode_cursor(cursor)
+            query = query.filter(
+                (cls.created_at < created_at) | ((cls.created_at == created_at) & (cls.id < picture_id))
+            )
+        pictures = query.limit(limit + 1).all()
+        next_cursor = cls.encode_cursor(pictures[limit - 1]) if len(pictures) > limit else None
+        return pictures[:limit], next_cursor
 
     def create(self):
         try:
@@ -34,20 +99,59 @@ class Picture(db.Model):
             "id": self.id,
             "drawing_name": self.drawing_name,
             "description": self.description,
-            "image_data": self.image_data,  # This should include the data URI prefix
+            "image_url": self.image_url,
+            "thumbnail_url": self.thumbnail_url,
+            "mime_type": self.mime_type,
+            "size": self.size,
+            "width": self.width,
+            "height": self.height,
             "user_name": self.user_name,
             "created_at": self.created_at.strftime("%Y-%m-%d %H:%M:%S")
         }
 
     def delete(self):
         try:
+            image_hash = self.image_hash
             db.session.delete(self)
             db.session.commit()
+            # Identical drawings share a blob, also with blind trace submissions; only remove it once unreferenced
+            if image_hash and not blob_in_use(image_hash):
+                delete_variants(blob_path(image_hash))
+                blob_delete(image_hash)
             return True
         except Exception as e:
             db.session.rollback()
             return False
 
+track_blobs(Picture, 'image_hash')
+
+def migratePictureBlobs(batch_size=100):
+    """
+    Move legacy base64 image_data into the blob store.
+
+    Rows are converted in batches, each committed on its own, so the command can
+    be interrupted and rerun; converted rows are skipped.
+
+    Returns:
+        tuple: (migrated, failed) row counts.
+    """
+    migrated, failed = 0, 0
+    while True:
+        pictures = Picture.query.filter(
+            Picture.image_hash.is_(None),
+            Picture.image_data.isnot(None)
+        ).order_by(Picture.id).offset(failed).limit(batch_size).all()
+        if not pictures:
+            return migrated, failed
+        for picture in pictures:
+            try:
+                picture.store_image(picture.legacy_image_bytes())
+                migrated += 1
+            except Exception as e:
+                print(f"Picture {picture.id} could not be migrated: {str(e)}")
+                failed += 1
+        db.session.commit()
+
 def initPictureTable():
     """Create the pictures table if it doesn't exist"""
     try:
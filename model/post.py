@@ -1,11 +1,12 @@
 # post.py
 import logging
 from sqlite3 import IntegrityError
-from sqlalchemy import Text, JSON
+from sqlalchemy import Text, JSON, func, select
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
 from model.user import User
 from model.channel import Channel
+from model.backup import upsert_in_batches
 class Post(db.Model):
     # creates the post in discussion channel
     """
@@ -25,8 +26,8 @@ class Post(db.Model):
     _title = db.Column(db.String(255), nullable=False)
     _comment = db.Column(db.String(255), nullable=False)
     _content = db.Column(JSON, nullable=False)
-    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    _channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=False)
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    _channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=False, index=True)
     def __init__(self, title, comment, user_id=None, channel_id=None, content={}, user_name=None, channel_name=None):
         """
         Constructor, 1st step in object creation.
@@ -85,6 +86,118 @@ class Post(db.Model):
             "channel_name": channel.name if channel else None
         }
         return data
+    @staticmethod
+    def list_posts(user_id=None, channel_id=None, limit=None, after_id=None):
+        """
+        Lists posts, with author and channel names, in a single query.
+
+        Posts are joined to users and channels instead of calling read() per row,
+        which looked both up separately (2N+1 queries). Pages are keyed on id, so
+        later pages cost the same as the first.
+        Args:
+            user_id (int, optional): Only posts by this user.
+            channel_id (int, optional): Only posts in this channel.
+            limit (int, optional): Page size; all matching posts when None.
+            after_id (int, optional): Return posts with an id greater than this.
+        Returns:
+            tuple: (list of dicts shaped like read(), next after_id or None on the last page).
+        """
+        query = db.session.query(
+            Post.id, Post._title, Post._comment, Post._content,
+            User._name.label('user_name'), Channel._name.label('channel_name')
+        ).outerjoin(User, User.id == Post._user_id).outerjoin(Channel, Channel.id == Post._channel_id)
+        if user_id is not None:
+            query = query.filter(Post._user_id == user_id)
+        if channel_id is not None:
+            query = query.filter(Post._channel_id == channel_id)
+        if after_id is not None:
+            query = query.filter(Post.id > after_id)
+        query = query.order_by(Post.id)
+        if limit is not None:
+            query = query.limit(limit + 1)
+        rows = query.all()
+        next_after_id = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after_id = rows[-1].id
+        posts = [{
+            "id": row.id,
+            "title": row._title,
+            "comment": row._comment,
+            "content": row._content,
+            "user_name": row.user_name,
+            "channel_name": row.channel_name
+        } for row in rows]
+        return posts, next_after_id
+
+    @staticmethod
+    def bulk_create(rows, user_id, batch_size=1000):
+        """
+        Creates many posts by one user with batched inserts.
+
+        Rows are validated in one pass (title, comment and an existing channel_id are
+        required; channels are checked with one IN query per 500 ids), then inserted
+        with one executemany per batch, each batch in its own transaction.
+        Args:
+            rows (list): Dictionaries with title, comment, channel_id and optionally content.
+            user_id (int): The author of every post.
+            batch_size (int): Rows inserted per transaction.
+        Returns:
+            dict: success_count, error_count and errors, a list of {index, message}.
+        """
+        results = {'errors': [], 'success_count': 0, 'error_count': 0}
+
+        def reject(index, message):
+            results['errors'].append({'index': index, 'message': message})
+            results['error_count'] += 1
+
+        def as_id(value):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+
+        channel_ids = list({as_id(row.get('channel_id')) for row in rows if isinstance(row, dict)} - {None})
+        existing = set()
+        for start in range(0, len(channel_ids), 500):
+            chunk = channel_ids[start:start + 500]
+            existing.update(channel_id for (channel_id,) in db.session.query(Channel.id).filter(Channel.id.in_(chunk)))
+
+        values = []
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                reject(index, 'Expected an object')
+            elif 'title' not in row:
+                reject(index, 'Post title is required')
+            elif 'comment' not in row:
+                reject(index, 'Post comment is required')
+            elif 'channel_id' not in row:
+                reject(index, 'Channel ID is required')
+            elif as_id(row['channel_id']) not in existing:
+                reject(index, f"Channel {row['channel_id']} not found")
+            else:
+                values.append((index, {
+                    '_title': row['title'],
+                    '_comment': row['comment'],
+                    '_content': row.get('content') or {},
+                    '_user_id': user_id,
+                    '_channel_id': as_id(row['channel_id']),
+                }))
+
+        for start in range(0, len(values), batch_size):
+            batch = values[start:start + batch_size]
+            try:
+                db.session.execute(Post.__table__.insert(), [value for _, value in batch])
+                db.session.commit()
+                results['success_count'] += len(batch)
+            except Exception as e:
+                db.session.rollback()
+                logging.warning(f"Could not create a batch of {len(batch)} posts due to {str(e)}.")
+                for index, _ in batch:
+                    reject(index, 'Could not be saved')
+        results['errors'].sort(key=lambda error: error['index'])
+        return results
+
     def update(self, data):
         """
         Updates the post object with new data.
@@ -113,18 +226,51 @@ class Post(db.Model):
             db.session.rollback()
             raise e
     @staticmethod
-    def restore(data):
-        for post_data in data:
-            _ = post_data.pop('id', None)  # Remove 'id' from post_data
-            title = post_data.get("title", None)
-            post = Post.query.filter_by(_title=title).first()
-            if post:
-                post.update(post_data)
-            else:
-                post = Post(**post_data)
-                post.update(post_data)
-                post.create()
-                # restores posts from list of dictionaries
+    def restore(data, batch_size=1000):
+        """
+        Restores posts from read()-style dictionaries, matched on title.
+
+        read() names the author and channel rather than giving their ids, so each
+        batch resolves the names with one IN query per table; posts whose user or
+        channel cannot be found are skipped. Existing posts are updated and the rest
+        inserted, one transaction per batch.
+        Args:
+            data (list): Dictionaries with title, comment, content and user_name/channel_name (or user_id/channel_id).
+            batch_size (int): Posts per transaction.
+        Returns:
+            dict: Counts of inserted and updated posts.
+        """
+        def to_rows(conn, batch):
+            users = Post._ids_by_name(conn, User.__table__, {post_data.get('user_name') for post_data in batch})
+            channels = Post._ids_by_name(conn, Channel.__table__, {post_data.get('channel_name') for post_data in batch})
+            rows = []
+            for post_data in batch:
+                user_id = post_data.get('user_id') or users.get(post_data.get('user_name'))
+                channel_id = post_data.get('channel_id') or channels.get(post_data.get('channel_name'))
+                if not post_data.get('title') or user_id is None or channel_id is None:
+                    logging.warning(f"Skipping post {post_data.get('title')}: user or channel not found.")
+                    continue
+                rows.append({
+                    '_title': post_data['title'],
+                    '_comment': post_data.get('comment', ''),
+                    '_content': post_data.get('content') or {},
+                    '_user_id': user_id,
+                    '_channel_id': channel_id
+                })
+            return rows
+        return upsert_in_batches(Post.__table__, data, key=('_title',), batch_size=batch_size, to_rows=to_rows)
+
+    @staticmethod
+    def _ids_by_name(conn, table, names):
+        """Maps names to ids with one query; the lowest id wins when a name is shared"""
+        names = [name for name in names if name]
+        if not names:
+            return {}
+        found = conn.execute(
+            select(table.c._name, func.min(table.c.id)).where(table.c._name.in_(names)).group_by(table.c._name)
+        )
+        return dict(found.all())
+
 def initPosts():
     """
     The initPosts function creates the Post table and adds tester data to the table.
@@ -0,0 +1,170 @@
+"""
+Reference images for blind-trace grading.
+
+Every submission is graded against one of a handful of reference images, so they are
+kept at two levels:
+- on disk under REFERENCE_CACHE_FOLDER, keyed by the sha256 of the URL, with the
+  ETag/Last-Modified needed to revalidate them once REFERENCE_CACHE_TTL has passed;
+- in an in-memory LRU of decoded grayscale numpy arrays already resized to the
+  canvas size they are compared at.
+Once warm, grading does no network or decode work at all.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import requests
+from PIL import Image
+from __init__ import app
+
+_lock = threading.Lock()
+_arrays = OrderedDict()  # (url, width, height) -> (array, checked_at)
+
+def _cache_paths(url):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    folder = app.config['REFERENCE_CACHE_FOLDER']
+    return os.path.join(folder, f"{key}.img"), os.path.join(folder, f"{key}.json")
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_path, path)
+
+def _enforce_disk_limit():
+    """Evict the least recently fetched references once the folder exceeds its byte budget"""
+    folder = app.config['REFERENCE_CACHE_FOLDER']
+    images = [os.path.join(folder, name) for name in os.listdir(folder) if name.endswith('.img')]
+    total = sum(os.path.getsize(path) for path in images)
+    for path in sorted(images, key=os.path.getmtime):
+        if total <= app.config['REFERENCE_CACHE_MAX_BYTES']:
+            break
+        total -= os.path.getsize(path)
+        os.remove(path)
+        meta_path = path[:-len('.img')] + '.json'
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+def fetch_reference(url):
+    """
+    Returns the bytes of a reference image, fetching it at most once per TTL.
+
+    A cached copy older than REFERENCE_CACHE_TTL is revalidated with a conditional GET;
+    if the origin cannot be reached the stale copy is still used.
+
+    Parameters:
+    - url (str): The reference image URL.
+
+    Returns:
+    - tuple: (bytes, changed) where changed is False when the cached copy was reused.
+
+    Raises:
+    - requests.RequestException: The image is not cached and could not be fetched.
+    """
+    image_path, meta_path = _cache_paths(url)
+    meta = None
+    if os.path.exists(image_path) and os.path.exists(meta_path):
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        if time.time() - meta['fetched_at'] < app.config['REFERENCE_CACHE_TTL']:
+            with open(image_path, 'rb') as image_file:
+                return image_file.read(), False
+
+    headers = {}
+    if meta and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta and meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        response = requests.get(url, headers=headers, timeout=app.config['REFERENCE_FETCH_TIMEOUT'])
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException:
+        if meta is None:
+            raise
+        print(f"Reference image {url} could not be revalidated, using cached copy")
+        with open(image_path, 'rb') as image_file:
+            return image_file.read(), False
+
+    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+    if response.status_code == 304:
+        meta['fetched_at'] = time.time()
+        _write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        with open(image_path, 'rb') as image_file:
+            return image_file.read(), False
+
+    data = response.content
+    changed = meta is None or meta.get('sha256') != hashlib.sha256(data).hexdigest()
+    _write_atomic(image_path, data)
+    _write_atomic(meta_path, json.dumps({
+        "url": url,
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "fetched_at": time.time()
+    }).encode('utf-8'))
+    _enforce_disk_limit()
+    return data, changed
+
+def reference_array(url, size):
+    """
+    Returns a reference image as a grayscale uint8 array resized to `size`.
+
+    Parameters:
+    - url (str): The reference image URL.
+    - size (tuple): The (width, height) of the canvas it is compared against.
+
+    Returns:
+    - numpy.ndarray: A read-only (height, width) uint8 array.
+    """
+    key = (url, size[0], size[1])
+    now = time.time()
+    with _lock:
+        entry = _arrays.get(key)
+        if entry and now - entry[1] < app.config['REFERENCE_CACHE_TTL']:
+            _arrays.move_to_end(key)
+            return entry[0]
+
+    data, changed = fetch_reference(url)
+    if entry and not changed:
+        array = entry[0]
+    else:
+        with Image.open(io.BytesIO(data)) as img:
+            array = np.asarray(img.convert("L").resize(size))
+        array.flags.writeable = False
+
+    with _lock:
+        if changed:
+            # Sizes decoded from the old content are stale too
+            for stale in [k for k in _arrays if k[0] == url]:
+                del _arrays[stale]
+        _arrays[key] = (array, now)
+        _arrays.move_to_end(key)
+        while len(_arrays) > app.config['REFERENCE_CACHE_ENTRIES']:
+            _arrays.popitem(last=False)
+    return array
+
+def prewarm_references(urls, sizes=None):
+    """
+    Loads reference images into the disk and memory caches before a round starts.
+
+    Parameters:
+    - urls (list): The reference image URLs used in the round.
+    - sizes (list, optional): (width, height) canvas sizes; defaults to REFERENCE_CANVAS_SIZES.
+
+    Returns:
+    - dict: URL -> error message for references that could not be loaded.
+    """
+    errors = {}
+    for url in urls:
+        for size in sizes or app.config['REFERENCE_CANVAS_SIZES']:
+            try:
+                reference_array(url, tuple(size))
+            except Exception as e:
+                errors[url] = str(e)
+    return errors
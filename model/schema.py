@@ -0,0 +1,71 @@
+"""
+Database schema upgrades, run once at startup instead of on the request path.
+
+The schema is versioned with Flask-Migrate: every change to the models gets a
+revision in migrations/versions (`flask db migrate -m "..."`), and upgrade_schema()
+applies whatever revisions the database has not seen yet.  It runs from
+`flask custom init_db`, which gunicorn.conf.py calls before the workers start, so
+workers never inspect or alter tables while serving, and nothing is dropped on restart.
+
+Databases made by db.create_all() before migrations existed have no alembic_version
+table.  They are adopted by stamping them at the baseline revision, the schema
+create_all() built before this series, and upgrading from there like any other.
+If an adopted database still differs from the models afterwards, the upgrade fails
+rather than let the workers start on tables their queries do not fit.
+"""
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect
+from __init__ import app, db
+
+BASELINE_REVISION = '0001'
+
+class SchemaError(Exception):
+    """Raised when an adopted database still differs from the models after upgrading"""
+
+def current_revision():
+    """
+    Returns:
+    - str: The revision the database is at, or None if it has never been migrated.
+    """
+    with db.engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+def schema_differences():
+    """
+    Compares the database with the models.
+
+    Returns:
+    - list: Alembic's differences (missing columns, indexes, ...); empty when they match.
+    """
+    with db.engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn), db.metadata)
+
+def upgrade_schema():
+    """
+    Brings the database schema up to the newest migration.
+
+    Returns:
+    - tuple: The revision before (None for a new or adopted database) and after.
+
+    Raises:
+    - SchemaError: An adopted database does not match the models after upgrading.
+    """
+    with app.app_context():
+        tables = set(inspect(db.engine).get_table_names())
+        before = current_revision()
+        adopted = before is None and bool(tables)
+        if adopted:
+            # Built by db.create_all(): start from the baseline's schema
+            stamp(revision=BASELINE_REVISION)
+        upgrade()
+        if adopted:
+            differences = schema_differences()
+            if differences:
+                for difference in differences:
+                    print(f"Schema differs from the models: {difference}")
+                # Unstamp, so the next start checks again instead of trusting the revision
+                stamp(revision='base')
+                raise SchemaError(f"{len(differences)} differences remain after upgrading; add a migration for them")
+        return before, current_revision()
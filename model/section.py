@@ -1,6 +1,7 @@
 # section.py
 from sqlite3 import IntegrityError
 from __init__ import app, db
+from model.backup import upsert_in_batches
 class Section(db.Model):
     """
     Section Model
@@ -81,19 +82,17 @@ class Section(db.Model):
             return None
         return self
     @staticmethod
-    def restore(data):
-        sections = {}
-        for section_data in data:
-            _ = section_data.pop('id', None)  # Remove 'id' from section_data
-            name = section_data.get("name", None)
-            section = Section.query.filter_by(_name=name).first()
-            if section:
-                section.update(section_data)
-            else:
-                section = Section(**section_data)
-                section.create()
-        db.session.commit()
-        return sections
+    def restore(data, batch_size=1000):
+        """
+        Restores sections from read()-style dictionaries, matched on name,
+        updating existing ones and inserting the rest in batched transactions.
+
+        Returns:
+            dict: Counts of inserted and updated sections.
+        """
+        rows = [{'_name': section_data['name'], '_theme': section_data.get('theme')}
+                for section_data in data if section_data.get('name')]
+        return upsert_in_batches(Section.__table__, rows, key=('_name',), batch_size=batch_size)
 def initSections():
     """
     The initSections function creates the Section table and adds tester data to the table.
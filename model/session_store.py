@@ -0,0 +1,146 @@
+import heapq
+import itertools
+import threading
+import time
+from sqlalchemy import delete, select
+from __init__ import app, db
+from model.timer import TimerSession
+
+
+class CompetitionSession(db.Model):
+    """Shared state of a running competition round, one row per user"""
+    __tablename__ = 'competition_sessions'
+
+    key = db.Column(db.String(64), primary_key=True)
+    user_name = db.Column(db.String(255), nullable=True)
+    drawn_word = db.Column(db.String(50), nullable=False)
+    timer_duration = db.Column(db.Integer, nullable=False)
+    started_at = db.Column(db.Float, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+
+
+class MemorySessionStore:
+    """
+    Session store held in process memory.
+
+    Fast, but only correct when every request for a round reaches the same
+    process (a single gunicorn worker).  Expiry uses one heap of TTLs that is
+    drained lazily on every call, so put/pop are O(log n) with no threads.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sessions = {}  # key -> (session, expires_at)
+        self._expiry = []    # heap of (expires_at, seq, key, session)
+        self._seq = itertools.count()
+
+    def _expire(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, _, key, session = heapq.heappop(self._expiry)
+            entry = self._sessions.get(key)
+            if entry and entry[0] is session:
+                del self._sessions[key]
+
+    def put(self, session, expires_at):
+        with self._lock:
+            self._expire(self.clock())
+            self._sessions[session.key] = (session, expires_at)
+            heapq.heappush(self._expiry, (expires_at, next(self._seq), session.key, session))
+
+    def get(self, key):
+        with self._lock:
+            self._expire(self.clock())
+            entry = self._sessions.get(key)
+            return entry[0] if entry else None
+
+    def pop(self, key):
+        with self._lock:
+            self._expire(self.clock())
+            entry = self._sessions.pop(key, None)
+            return entry[0] if entry else None
+
+    def sessions(self):
+        with self._lock:
+            self._expire(self.clock())
+            return [session for session, _ in self._sessions.values()]
+
+
+class DatabaseSessionStore:
+    """
+    Session store kept in the `competition_sessions` table.
+
+    Every gunicorn worker sees the same rounds, so a PUT may land on a
+    different worker than the POST that started the timer.  Each operation runs
+    in its own short transaction on the engine, independent of the request's
+    ORM session.  Timestamps are wall-clock so that all workers (and restarts)
+    agree on them.
+    """
+
+    table = CompetitionSession.__table__
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+
+    @staticmethod
+    def _to_session(row):
+        return TimerSession(
+            row.key, row.timer_duration, row.drawn_word, row.started_at, user_name=row.user_name
+        )
+
+    def put(self, session, expires_at):
+        now = self.clock()
+        with db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(
+                (self.table.c.key == str(session.key)) | (self.table.c.expires_at <= now)
+            ))
+            conn.execute(self.table.insert().values(
+                key=str(session.key),
+                user_name=session.user_name,
+                drawn_word=session.word,
+                timer_duration=session.duration,
+                started_at=session.started_at,
+                expires_at=expires_at
+            ))
+
+    def get(self, key):
+        with db.engine.connect() as conn:
+            row = conn.execute(select(self.table).where(
+                self.table.c.key == str(key),
+                self.table.c.expires_at > self.clock()
+            )).first()
+        return self._to_session(row) if row else None
+
+    def pop(self, key):
+        with db.engine.begin() as conn:
+            row = conn.execute(select(self.table).where(
+                self.table.c.key == str(key),
+                self.table.c.expires_at > self.clock()
+            )).first()
+            if row is None:
+                return None
+            # Only the worker whose delete matches the row it read wins the stop
+            result = conn.execute(delete(self.table).where(
+                self.table.c.key == row.key,
+                self.table.c.started_at == row.started_at
+            ))
+            if result.rowcount != 1:
+                return None
+        return self._to_session(row)
+
+    def sessions(self):
+        with db.engine.connect() as conn:
+            rows = conn.execute(select(self.table).where(
+                self.table.c.expires_at > self.clock()
+            )).all()
+        return [self._to_session(row) for row in rows]
+
+
+def create_session_store(kind=None):
+    """Build the session store named by COMPETITION_SESSION_STORE"""
+    kind = kind or app.config['COMPETITION_SESSION_STORE']
+    if kind == 'memory':
+        return MemorySessionStore()
+    if kind == 'database':
+        return DatabaseSessionStore()
+    raise ValueError(f"Unknown competition session store: {kind}")
@@ -0,0 +1,276 @@
+"""
+Online snapshots of the SQLite database file.
+
+Copying the .db file while the app runs can capture a page half written, and
+misses whatever is still in the WAL.  Snapshots instead go through SQLite itself:
+- 'backup' uses the online backup API, SNAPSHOT_PAGE_STEP pages per step with a
+  short sleep in between, so other connections get the database between steps;
+- 'vacuum' runs VACUUM INTO, one read transaction producing a compacted copy.
+In WAL mode neither blocks writers.  A paged backup restarts whenever another
+connection writes mid-copy; after SNAPSHOT_MAX_RESTARTS it finishes in one step.
+
+take_snapshot() keeps the newest SNAPSHOT_RETENTION full snapshots in
+SNAPSHOT_FOLDER.  Between them it can write incremental snapshots: SQLite does not
+track changed pages, so the new copy is compared page by page with the previous
+snapshot (kept as .mirror.db) and only the pages that differ are stored, gzipped.
+restore_snapshot() rebuilds any snapshot from its full copy and the increments
+after it.
+"""
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import time
+from __init__ import app
+
+MIRROR = '.mirror.db'
+_PAGE_HEADER = struct.Struct('>I')  # page number of each page in an increment
+
+class SnapshotError(Exception):
+    """Raised when the database is not SQLite or a snapshot chain is broken"""
+
+class _Restarted(Exception):
+    """Raised from the progress callback when a paged backup keeps restarting"""
+
+def sqlite_path(uri=None):
+    """
+    Resolves the file of a SQLite URI the way Flask-SQLAlchemy does.
+
+    Relative paths are relative to the instance folder, not the working directory.
+
+    Parameters:
+    - uri (str, optional): A sqlite:/// URI; the app's database by default.
+
+    Returns:
+    - str: The absolute file path, or None if the URI is not a SQLite file.
+    """
+    uri = uri or app.config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('sqlite:///') or uri == 'sqlite:///:memory:':
+        return None
+    path = uri[len('sqlite:///'):].split('?', 1)[0]
+    return path if os.path.isabs(path) else os.path.join(app.instance_path, path)
+
+def snapshot_sqlite(destination, source=None, method='backup', pages=None, progress=None):
+    """
+    Copies a live SQLite database to a new file without stopping writers.
+
+    Parameters:
+    - destination (str): The snapshot file; replaced only once the copy is complete.
+    - source (str, optional): The database file; the app's database by default.
+    - method (str): 'backup' (paged online backup API) or 'vacuum' (VACUUM INTO).
+    - pages (int, optional): Pages per backup step; SNAPSHOT_PAGE_STEP by default.
+    - progress (callable, optional): progress(remaining, total) after each backup step.
+
+    Returns:
+    - dict: The method used, the number of restarts and the seconds taken.
+    """
+    source = source or sqlite_path()
+    if source is None:
+        raise SnapshotError("Snapshots need a SQLite database")
+    pages = pages or app.config['SNAPSHOT_PAGE_STEP']
+    os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+    partial = destination + '.tmp'
+    if os.path.exists(partial):
+        os.remove(partial)
+    started = time.perf_counter()
+    restarts = 0
+
+    src = sqlite3.connect(source, timeout=app.config['SNAPSHOT_BUSY_TIMEOUT'])
+    try:
+        if method == 'vacuum':
+            src.execute('VACUUM INTO ?', (partial,))
+        elif method == 'backup':
+            last = {'remaining': None}
+
+            def on_step(status, remaining, total):
+                nonlocal restarts
+                # remaining grows again when another connection wrote and the copy started over
+                if last['remaining'] is not None and remaining > last['remaining']:
+                    restarts += 1
+                    if restarts > app.config['SNAPSHOT_MAX_RESTARTS']:
+                        raise _Restarted()
+                last['remaining'] = remaining
+                if progress:
+                    progress(remaining, total)
+
+            dst = sqlite3.connect(partial)
+            try:
+                try:
+                    src.backup(dst, pages=pages, progress=on_step, sleep=app.config['SNAPSHOT_STEP_SLEEP'])
+                except _Restarted:
+                    # Too busy to copy in steps; one step is a single read transaction
+                    src.backup(dst, pages=-1)
+            finally:
+                dst.close()
+        else:
+            raise SnapshotError(f"Unknown snapshot method: {method}")
+    finally:
+        src.close()
+    os.replace(partial, destination)
+    return {"method": method, "restarts": restarts, "seconds": round(time.perf_counter() - started, 3)}
+
+def _pages(path, page_size):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(page_size), b''):
+            yield block
+
+def _page_size(path):
+    with open(path, 'rb') as f:
+        header = f.read(100)
+    size = struct.unpack('>H', header[16:18])[0]
+    return 65536 if size == 1 else size
+
+def _write_increment(snapshot, mirror, destination):
+    """Stores the pages of `snapshot` that differ from `mirror`; returns how many"""
+    page_size = _page_size(snapshot)
+    page_count = os.path.getsize(snapshot) // page_size
+    changed = 0
+    with gzip.open(destination + '.tmp', 'wb', compresslevel=6) as out:
+        out.write((json.dumps({"page_size": page_size, "page_count": page_count}) + '\n').encode())
+        old_pages = _pages(mirror, page_size) if _page_size(mirror) == page_size else iter(())
+        for number, page in enumerate(_pages(snapshot, page_size)):
+            if next(old_pages, None) != page:
+                out.write(_PAGE_HEADER.pack(number))
+                out.write(page)
+                changed += 1
+    os.replace(destination + '.tmp', destination)
+    return changed, page_count
+
+def _apply_increment(path, increment):
+    with gzip.open(increment, 'rb') as f, open(path, 'r+b') as target:
+        header = json.loads(f.readline())
+        page_size = header["page_size"]
+        while True:
+            number = f.read(_PAGE_HEADER.size)
+            if not number:
+                break
+            target.seek(_PAGE_HEADER.unpack(number)[0] * page_size)
+            target.write(f.read(page_size))
+        target.truncate(header["page_count"] * page_size)
+
+def list_snapshots(folder=None):
+    """
+    Lists the snapshots in a folder, oldest first.
+
+    Returns:
+    - list: File names; '.db' files are full snapshots, '.inc.gz' files increments on the ones before them.
+    """
+    folder = folder or app.config['SNAPSHOT_FOLDER']
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        name for name in os.listdir(folder)
+        if not name.startswith('.') and (name.endswith('.db') or name.endswith('.inc.gz'))
+    )
+
+def rotate_snapshots(folder=None, retention=None):
+    """
+    Deletes all but the newest `retention` full snapshots, with the increments built on them.
+
+    Returns:
+    - list: The deleted file names.
+    """
+    folder = folder or app.config['SNAPSHOT_FOLDER']
+    retention = retention if retention is not None else app.config['SNAPSHOT_RETENTION']
+    names = list_snapshots(folder)
+    fulls = [name for name in names if name.endswith('.db')]
+    if len(fulls) <= retention:
+        return []
+    keep_from = fulls[-retention] if retention > 0 else None
+    removed = [name for name in names if keep_from is None or name < keep_from]
+    for name in removed:
+        os.remove(os.path.join(folder, name))
+    return removed
+
+def take_snapshot(folder=None, incremental=False, method='backup', retention=None, full_every=None, source=None):
+    """
+    Takes a full or incremental snapshot of the app's database and rotates old ones.
+
+    An incremental snapshot falls back to a full one when there is no previous
+    snapshot to compare with, or after `full_every` increments in a row.
+
+    Parameters:
+    - folder (str, optional): Where snapshots are kept; SNAPSHOT_FOLDER by default.
+    - incremental (bool): Store only the pages changed since the previous snapshot.
+    - method (str): 'backup' or 'vacuum', see snapshot_sqlite().
+    - retention (int, optional): Full snapshots to keep; SNAPSHOT_RETENTION by default.
+    - full_every (int, optional): Increments before the next full snapshot; SNAPSHOT_FULL_EVERY by default.
+    - source (str, optional): The database file; the app's database by default.
+
+    Returns:
+    - dict: The snapshot's file name, kind and statistics.
+    """
+    folder = folder or app.config['SNAPSHOT_FOLDER']
+    full_every = full_every if full_every is not None else app.config['SNAPSHOT_FULL_EVERY']
+    os.makedirs(folder, exist_ok=True)
+    mirror = os.path.join(folder, MIRROR)
+    names = list_snapshots(folder)
+    since_full = 0
+    for name in reversed(names):
+        if name.endswith('.db'):
+            break
+        since_full += 1
+    incremental = incremental and os.path.isfile(mirror) and any(name.endswith('.db') for name in names) \
+        and since_full < full_every
+
+    source = source or sqlite_path()
+    stem = os.path.splitext(os.path.basename(source or 'database'))[0]
+    # Microseconds, so two snapshots in the same second get distinct names that still sort in order
+    now = time.time()
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f'-{int(now % 1 * 1e6):06d}'
+    name = f"{stem}-{stamp}{'.inc.gz' if incremental else '.db'}"
+    if os.path.exists(os.path.join(folder, name)):
+        # Replacing a snapshot would break the chain of increments built on it
+        raise SnapshotError(f"Snapshot {name} already exists; refusing to overwrite it")
+    # VACUUM INTO renumbers pages, so increments are always diffed from a paged backup
+    copy = os.path.join(folder, f'.{stamp}.tmp.db')
+    stats = snapshot_sqlite(copy, source=source, method='backup' if incremental else method)
+    if incremental:
+        changed, page_count = _write_increment(copy, mirror, os.path.join(folder, name))
+        stats.update(kind='incremental', pages_changed=changed, pages=page_count)
+        os.replace(copy, mirror)
+    else:
+        os.replace(copy, os.path.join(folder, name))
+        shutil.copyfile(os.path.join(folder, name), mirror + '.tmp')
+        os.replace(mirror + '.tmp', mirror)
+        stats.update(kind='full')
+    stats.update(name=name, bytes=os.path.getsize(os.path.join(folder, name)))
+    stats["rotated"] = rotate_snapshots(folder, retention)
+    return stats
+
+def restore_snapshot(name, destination, folder=None):
+    """
+    Rebuilds the database as of a snapshot into a new file.
+
+    Parameters:
+    - name (str): A snapshot file name from list_snapshots().
+    - destination (str): The file to write; point SQLALCHEMY_DATABASE_URI at it, or
+      move it over the database while the app is stopped.
+    - folder (str, optional): Where snapshots are kept; SNAPSHOT_FOLDER by default.
+    """
+    folder = folder or app.config['SNAPSHOT_FOLDER']
+    names = list_snapshots(folder)
+    if name not in names:
+        raise SnapshotError(f"No snapshot named {name}")
+    chain = []
+    for candidate in reversed(names[:names.index(name) + 1]):
+        chain.append(candidate)
+        if candidate.endswith('.db'):
+            break
+    else:
+        raise SnapshotError(f"The full snapshot {name} builds on has been rotated away")
+    chain.reverse()
+    shutil.copyfile(os.path.join(folder, chain[0]), destination + '.tmp')
+    for increment in chain[1:]:
+        _apply_increment(destination + '.tmp', os.path.join(folder, increment))
+    check = sqlite3.connect(destination + '.tmp')
+    try:
+        result = check.execute('PRAGMA quick_check').fetchone()[0]
+    finally:
+        check.close()
+    if result != 'ok':
+        os.remove(destination + '.tmp')
+        raise SnapshotError(f"Rebuilt snapshot failed quick_check: {result}")
+    os.replace(destination + '.tmp', destination)
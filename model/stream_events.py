@@ -0,0 +1,62 @@
+import time
+from sqlalchemy import delete, func, select
+from __init__ import app, db
+
+
+class StreamEvent(db.Model):
+    """A competition event waiting to be relayed to the SSE streams of every process"""
+    __tablename__ = 'stream_events'
+    # Never reuse ids: relays remember the last id they read, and pruning can empty the table
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_key = db.Column(db.String(64), nullable=True)  # None: sent to every listener
+    name = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.Float, nullable=False, index=True)
+
+
+class DatabaseEventBus:
+    """
+    Event relay kept in the `stream_events` table.
+
+    The worker that handles a write is rarely the process holding the listener's
+    stream (streams are served by a separate async worker), so events are inserted
+    here and every process's Broadcaster reads the rows after the last id it saw,
+    once per tick.  Rows older than `retention` seconds are deleted by the next
+    publish; a stream that falls that far behind just misses them.
+    """
+
+    table = StreamEvent.__table__
+
+    def __init__(self, retention=60, clock=time.time):
+        self.retention = retention
+        self.clock = clock
+
+    def publish(self, events):
+        """Insert (name, JSON data, user key or None) tuples in one transaction"""
+        now = self.clock()
+        with db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.created_at <= now - self.retention))
+            conn.execute(self.table.insert(), [
+                {"name": name, "data": data, "user_key": user_key, "created_at": now}
+                for name, data, user_key in events
+            ])
+
+    def last_id(self):
+        with db.engine.connect() as conn:
+            return conn.execute(select(func.max(self.table.c.id))).scalar() or 0
+
+    def read_since(self, last_id):
+        """Return (name, JSON data, user key) rows with an id above `last_id`, and the new last id"""
+        with db.engine.connect() as conn:
+            rows = conn.execute(select(self.table).where(self.table.c.id > last_id).order_by(self.table.c.id)).all()
+        return [(row.name, row.data, row.user_key) for row in rows], (rows[-1].id if rows else last_id)
+
+
+def create_event_bus(kind=None):
+    """Build the event relay matching COMPETITION_SESSION_STORE; None keeps events in process"""
+    kind = kind or app.config['COMPETITION_SESSION_STORE']
+    if kind == 'database':
+        return DatabaseEventBus(retention=app.config['STREAM_EVENT_RETENTION'])
+    return None
@@ -0,0 +1,143 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, features
+from __init__ import app
+
+# Longest edge, in pixels, of each resized variant
+THUMBNAIL_SIZES = {
+    'thumb': 160,
+    'medium': 480,
+}
+
+# WebP is much smaller for flat drawings; fall back to PNG if Pillow was built without it
+THUMBNAIL_FORMAT = 'WEBP' if features.check('webp') else 'PNG'
+THUMBNAIL_MIME_TYPE = 'image/webp' if THUMBNAIL_FORMAT == 'WEBP' else 'image/png'
+
+# Pillow releases the GIL while decoding and resampling, so threads scale across cores
+_executor = ThreadPoolExecutor(max_workers=app.config['THUMBNAIL_WORKERS'], thread_name_prefix='thumbnails')
+
+def is_valid_size(size):
+    """
+    Checks a requested ?size= value.
+
+    Parameters:
+    - size (str): The requested size, possibly None.
+
+    Returns:
+    - bool: True for None, 'original' or a key of THUMBNAIL_SIZES.
+    """
+    return not size or size == 'original' or size in THUMBNAIL_SIZES
+
+def variant_path(original_path, size):
+    """
+    Returns the path of a resized variant, stored alongside the original.
+
+    Parameters:
+    - original_path (str): The path of the original image.
+    - size (str): A key of THUMBNAIL_SIZES.
+
+    Returns:
+    - str: The variant path, e.g. 'toby.png.thumb.webp'.
+    """
+    return f"{original_path}.{size}.{THUMBNAIL_FORMAT.lower()}"
+
+def generate_variants(original_path):
+    """
+    Writes every THUMBNAIL_SIZES variant of an image next to it.
+
+    Variants are written to a uniquely named temporary file and renamed into place,
+    so a reader never sees a partial file, and the background job and an on-demand
+    request generating the same image at once cannot mix their writes. Images
+    already smaller than a size are re-encoded without upscaling.
+
+    Parameters:
+    - original_path (str): The path of the original image.
+
+    Returns:
+    - list: The paths of the variants written.
+    """
+    written = []
+    with Image.open(original_path) as img:
+        img.load()
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        for size, edge in THUMBNAIL_SIZES.items():
+            variant = img.copy()
+            variant.thumbnail((edge, edge), Image.LANCZOS)
+            path = variant_path(original_path, size)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                             suffix='.tmp', delete=False) as tmp:
+                try:
+                    if THUMBNAIL_FORMAT == 'WEBP':
+                        variant.save(tmp, THUMBNAIL_FORMAT, quality=80, method=4)
+                    else:
+                        variant.save(tmp, THUMBNAIL_FORMAT, optimize=True)
+                except Exception:
+                    tmp.close()
+                    os.remove(tmp.name)
+                    raise
+            os.replace(tmp.name, path)
+            written.append(path)
+    return written
+
+def _generate_logged(original_path):
+    try:
+        return generate_variants(original_path)
+    except Exception as e:
+        print(f'An error occurred while generating thumbnails for {original_path}: {str(e)}')
+        return []
+
+def schedule_variants(original_path):
+    """
+    Queues variant generation on the background worker pool.
+
+    Uploads return immediately; until the variants exist, variant_for() builds
+    the requested one on demand.
+
+    Parameters:
+    - original_path (str): The path of the original image.
+
+    Returns:
+    - Future: Resolves to the list of variant paths.
+    """
+    return _executor.submit(_generate_logged, original_path)
+
+def variant_for(original_path, size):
+    """
+    Resolves the file to serve for a requested size.
+
+    Parameters:
+    - original_path (str): The path of the original image.
+    - size (str): A key of THUMBNAIL_SIZES, or None/'original' for the full image.
+
+    Returns:
+    - tuple: (path, mime_type); mime_type is None when the original is returned,
+      including when a missing variant could not be generated.
+
+    Raises:
+    - ValueError: The size is not one of THUMBNAIL_SIZES.
+    """
+    if not size or size == 'original':
+        return original_path, None
+    if not is_valid_size(size):
+        raise ValueError(f"Unknown size '{size}', expected one of: original, {', '.join(THUMBNAIL_SIZES)}")
+    path = variant_path(original_path, size)
+    if not os.path.exists(path):
+        _generate_logged(original_path)
+        if not os.path.exists(path):
+            return original_path, None
+    return path, THUMBNAIL_MIME_TYPE
+
+def delete_variants(original_path):
+    """
+    Removes the resized variants of an image, ignoring ones that do not exist.
+
+    Parameters:
+    - original_path (str): The path of the original image.
+    """
+    for size in THUMBNAIL_SIZES:
+        try:
+            os.remove(variant_path(original_path, size))
+        except FileNotFoundError:
+            pass
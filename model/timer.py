@@ -0,0 +1,86 @@
+import time
+
+
+class TimerSession:
+    """A single competition round owned by one user"""
+
+    __slots__ = ("key", "duration", "word", "user_name", "started_at", "deadline")
+
+    def __init__(self, key, duration, word, started_at, user_name=None):
+        self.key = key
+        self.duration = duration
+        self.word = word
+        self.user_name = user_name
+        self.started_at = started_at
+        self.deadline = started_at + duration
+
+    def is_active(self, now):
+        """True while the round is still on the clock"""
+        return now < self.deadline
+
+    def time_remaining(self, now):
+        """Whole seconds left on the clock, never negative"""
+        return max(0, int(round(self.deadline - now)))
+
+    def time_taken(self, now):
+        """Whole seconds used so far, capped at the round duration"""
+        return self.duration - self.time_remaining(now)
+
+
+class TimerEngine:
+    """
+    Tracks competition timers per user without a thread per round.
+
+    Each round stores its start timestamp and deadline; the remaining time is
+    computed on read.  Rounds are kept in a session store (see
+    model/session_store.py) which owns expiry, so the engine itself is
+    stateless and any gunicorn worker sharing the store can serve any request.
+
+    Finished rounds are kept for `retention` seconds after their deadline so a
+    late PUT can still record the result, then they expire.
+    """
+
+    def __init__(self, store, retention=300):
+        self._store = store
+        self._retention = retention
+
+    @property
+    def store(self):
+        return self._store
+
+    def start(self, key, duration, word, user_name=None):
+        """Start (or restart) the round for `key` and return its session"""
+        now = self._store.clock()
+        session = TimerSession(key, duration, word, now, user_name=user_name)
+        self._store.put(session, expires_at=session.deadline + self._retention)
+        return session
+
+    def status(self, key):
+        """Return the live status of the round for `key`"""
+        now = self._store.clock()
+        session = self._store.get(key)
+        if session is None:
+            return {"time_remaining": 0, "is_active": False}
+        return {
+            "time_remaining": session.time_remaining(now),
+            "is_active": session.is_active(now),
+            "duration": session.duration,
+            "word": session.word,
+        }
+
+    def stop(self, key):
+        """
+        Stop the round for `key`.
+
+        Returns:
+            tuple: (session, time_taken), or (None, None) if there is no round.
+        """
+        session = self._store.pop(key)
+        if session is None:
+            return None, None
+        return session, session.time_taken(self._store.clock())
+
+    def active_count(self):
+        """Number of rounds still on the clock"""
+        now = self._store.clock()
+        return sum(1 for session in self._store.sessions() if session.is_active(now))
@@ -0,0 +1,153 @@
+"""
+Revoked API tokens.
+
+Every token carries a random jti.  Logging out records the jti in revoked_tokens
+until the token would have expired anyway.  token_required must reject those tokens
+without a database query per request, so each process keeps the list in memory:
+- a bloom filter answers "definitely not revoked" for almost every live token with a
+  few bit lookups;
+- an exact jti -> expiry map settles the rare bloom hit.
+The process pulls rows revoked since its last sync every TOKEN_REVOCATION_SYNC
+seconds, on whichever request notices the interval has passed, so a logout in one
+gunicorn worker reaches the others within that interval.
+
+Tokens issued before jti existed cannot be revoked individually; bumping the user's
+token_version still rejects them.
+"""
+import hashlib
+import threading
+import time
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from __init__ import app, db
+
+class RevokedToken(db.Model):
+    """A token rejected by token_required until it expires"""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.Float, nullable=False, index=True)  # epoch seconds, the token's exp
+    revoked_at = db.Column(db.Float, nullable=False, index=True)  # epoch seconds, drives incremental sync
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings; no false negatives, rare false positives"""
+
+    def __init__(self, bits=1 << 20, hashes=4):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray(bits // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=4 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], 'little') % self.bits
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class RevocationList:
+    """In-memory mirror of revoked_tokens, refreshed incrementally"""
+
+    def __init__(self, sync_interval=5, bloom_bits=1 << 20):
+        self.sync_interval = sync_interval
+        self._bloom_bits = bloom_bits
+        self._bloom = BloomFilter(bloom_bits)
+        self._revoked = {}  # jti -> expires_at
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_at = None  # monotonic time of the last sync
+        self._high_water = 0.0  # newest revoked_at seen
+
+    def _add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._bloom.add(jti)
+
+    def is_revoked(self, jti):
+        """
+        Checks a token id, syncing from the database first if the interval has passed.
+
+        Parameters:
+        - jti (str): The token's jti claim.
+
+        Returns:
+        - bool: True if the token was revoked and has not expired yet.
+        """
+        self.sync_if_due()
+        if jti not in self._bloom:
+            return False
+        with self._lock:
+            expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, jti, expires_at):
+        """
+        Revokes a token in this process immediately and in the others at their next sync.
+
+        Parameters:
+        - jti (str): The token's jti claim.
+        - expires_at (float): The token's exp claim; the row is pruned after it.
+        """
+        self._add(jti, expires_at)
+        try:
+            db.session.add(RevokedToken(jti=jti, expires_at=expires_at, revoked_at=time.time()))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # already revoked
+
+    def sync_if_due(self):
+        """Runs sync() when the interval has passed; concurrent callers skip instead of waiting"""
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self.sync()
+        except Exception as e:
+            print(f'An error occurred while syncing revoked tokens: {str(e)}')
+        finally:
+            self._sync_lock.release()
+
+    def sync(self):
+        """Loads rows revoked since the last sync and drops expired entries"""
+        table = RevokedToken.__table__
+        now = time.time()
+        # Rows committed just before the previous sync may carry an older revoked_at
+        since = self._high_water - self.sync_interval
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.jti, table.c.expires_at, table.c.revoked_at)
+                .where(table.c.revoked_at >= since, table.c.expires_at > now)
+            ).all()
+        for row in rows:
+            self._add(row.jti, row.expires_at)
+            self._high_water = max(self._high_water, row.revoked_at)
+        self._prune(now)
+        self._synced_at = time.monotonic()
+
+    def _prune(self, now):
+        with self._lock:
+            expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+            if not expired:
+                return
+            for jti in expired:
+                del self._revoked[jti]
+            # Bloom filters cannot forget, so rebuild from what is left
+            self._bloom = BloomFilter(self._bloom_bits)
+            for jti in self._revoked:
+                self._bloom.add(jti)
+        with db.engine.begin() as conn:
+            conn.execute(delete(RevokedToken.__table__).where(RevokedToken.__table__.c.expires_at <= now))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._revoked)
+
+revocation_list = RevocationList(
+    sync_interval=app.config['TOKEN_REVOCATION_SYNC'],
+    bloom_bits=app.config['TOKEN_REVOCATION_BLOOM_BITS']
+)
@@ -3,11 +3,13 @@ from flask import current_app
 from flask_login import UserMixin
 from datetime import date
 from sqlalchemy.exc import IntegrityError
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 import os
 import json
 
 from __init__ import app, db
+from model.passwords import HashingBusy, check_password, hash_password, hash_passwords, needs_rehash
+from model.backup import upsert_in_batches
 
 """ Helper Functions """
 
@@ -48,6 +50,7 @@ class User(db.Model, UserMixin):
         _password (Column): A string representing the hashed password of the user. It is not unique and cannot be null.
         _role (Column): A string representing the user's role within the application. Defaults to "User".
         _pfp (Column): A string representing the path to the user's profile picture. It can be null.
+        _token_version (Column): An integer stamped into issued tokens; bumping it invalidates all of them.
     """
     __tablename__ = 'users'
 
@@ -59,6 +62,7 @@ class User(db.Model, UserMixin):
     _role = db.Column(db.String(20), default="User", nullable=False)
     _pfp = db.Column(db.String(255), unique=False, nullable=True)
     _car = db.Column(db.String(255), unique=False, nullable=True)
+    _token_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
    
     posts = db.relationship('Post', backref='author', lazy=True)
                                  
@@ -225,19 +229,44 @@ class User(db.Model, UserMixin):
         """
         if not password or password == "":
             password=app.config["DEFAULT_PASSWORD"]
-        self._password = generate_password_hash(password, "pbkdf2:sha256", salt_length=10)
+        self._password = generate_password_hash(password, app.config["PASSWORD_HASH_METHOD"], salt_length=10)
 
     def is_password(self, password):
         """
         Checks if the provided password matches the user's stored password.
+
+        The hash is checked on the password hashing pool, not the calling thread.
         
         Args:
             password (str): The password to check.
         
         Returns:
             bool: True if the password matches, False otherwise.
+
+        Raises:
+            HashingBusy: Too many password checks are already in progress.
+        """
+        return check_password(self._password, password)
+
+    def upgrade_password_hash(self, password):
         """
-        return check_password_hash(self._password, password)
+        Re-hashes the password with PASSWORD_HASH_METHOD if the stored hash uses another method or cost.
+
+        Call only after is_password(password) succeeded; the plain password is not kept otherwise.
+        
+        Args:
+            password (str): The password that was just verified.
+        """
+        if not needs_rehash(self._password):
+            return
+        try:
+            self._password = hash_password(password)
+            db.session.commit()
+        except HashingBusy:
+            pass  # try again on a later login
+        except Exception as e:
+            db.session.rollback()
+            print(f'An error occurred while upgrading the password hash for {self._uid}: {str(e)}')
 
     def __str__(self):
         """
@@ -268,6 +297,23 @@ class User(db.Model, UserMixin):
         """
         self._role = role
 
+    @property
+    def token_version(self):
+        """
+        Gets the version stamped into tokens issued to this user.
+
+        Returns:
+            int: The current token version.
+        """
+        return self._token_version or 0
+
+    def revoke_tokens(self):
+        """
+        Invalidates every token issued to this user so far, e.g. to log out all devices.
+        """
+        self._token_version = self.token_version + 1
+        db.session.commit()
+
     def is_admin(self):
         """
         Checks if the user is an admin.
@@ -471,18 +517,122 @@ class User(db.Model, UserMixin):
                 os.rename(old_path, new_path)
                 
     @staticmethod
-    def restore(data):
-        users = {}
-        for user_data in data:
-            _ = user_data.pop('id', None)  # Remove 'id' from user_data and store it in user_id
-            uid = user_data.get("uid", None)
-            user = User.query.filter_by(_uid=uid).first()
-            if user:
-                user.update(user_data)
+    def bulk_import(rows, batch_size=1000):
+        """
+        Creates many users at once, without going through the single-user endpoint.
+
+        Rows are validated in one pass (name and uid of at least 2 characters, uid not
+        repeated in the import nor already taken), passwords are hashed on all CPUs,
+        and valid rows are inserted with one executemany per batch of `batch_size`,
+        each batch in its own transaction. A row without a password gets
+        DEFAULT_PASSWORD, as the old per-row import did; those rows share one hash.
+
+        Args:
+            rows (list): Dictionaries with name, uid and optionally password and pfp.
+            batch_size (int): Rows inserted per transaction.
+
+        Returns:
+            dict: success_count, error_count and errors, a list of {index, uid, message}.
+        """
+        results = {'errors': [], 'success_count': 0, 'error_count': 0}
+
+        def reject(index, uid, message):
+            results['errors'].append({'index': index, 'uid': uid, 'message': message})
+            results['error_count'] += 1
+
+        # Validation pass; existing uids are fetched in chunks of one IN query each
+        candidates = [(index, row.get('uid')) for index, row in enumerate(rows)
+                      if isinstance(row, dict) and isinstance(row.get('uid'), str)]
+        existing = set()
+        uids = [uid for _, uid in candidates]
+        for start in range(0, len(uids), 500):
+            chunk = uids[start:start + 500]
+            existing.update(uid for (uid,) in db.session.query(User._uid).filter(User._uid.in_(chunk)))
+
+        valid = []
+        seen = set()
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                reject(index, None, 'Expected an object')
+                continue
+            name, uid = row.get('name'), row.get('uid')
+            if not isinstance(name, str) or len(name) < 2:
+                reject(index, uid, 'Name is missing, or is less than 2 characters')
+            elif not isinstance(uid, str) or len(uid) < 2:
+                reject(index, uid, 'User ID is missing, or is less than 2 characters')
+            elif uid in seen:
+                reject(index, uid, f'User ID {uid} appears more than once in the import')
+            elif uid in existing:
+                reject(index, uid, f'User ID {uid} is duplicate')
             else:
-                user = User(**user_data)
-                user.create()
-        return users
+                seen.add(uid)
+                valid.append((index, row))
+
+        passwords = [row.get('password') or app.config['DEFAULT_PASSWORD'] for _, row in valid]
+        hashes = hash_passwords(passwords, shared=[app.config['DEFAULT_PASSWORD']])
+
+        table = User.__table__
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            values = [{
+                '_name': row['name'],
+                '_uid': row['uid'],
+                '_email': '?',
+                '_password': password_hash,
+                '_role': 'User',
+                '_pfp': row.get('pfp') or '',
+                '_car': '',
+                '_token_version': 0,
+            } for (_, row), password_hash in zip(batch, hashes[start:start + batch_size])]
+            try:
+                db.session.execute(table.insert(), values)
+                db.session.commit()
+                results['success_count'] += len(batch)
+            except IntegrityError:
+                # Someone took a uid since validation; retry the batch row by row to find it
+                db.session.rollback()
+                for (index, row), value in zip(batch, values):
+                    try:
+                        db.session.execute(table.insert(), [value])
+                        db.session.commit()
+                        results['success_count'] += 1
+                    except IntegrityError:
+                        db.session.rollback()
+                        reject(index, row['uid'], f"User ID {row['uid']} is duplicate")
+        results['errors'].sort(key=lambda error: error['index'])
+        return results
+
+    @staticmethod
+    def restore(data, batch_size=1000):
+        """
+        Restores users from read()-style dictionaries, matched on uid.
+
+        Existing users are updated and new ones inserted, one transaction per batch,
+        with a single IN query per batch to find which uids exist. A password in the
+        data is hashed and set; new users without one get DEFAULT_PASSWORD, hashed
+        once for all of them. Keys the table has no column for (id, sections, ...)
+        are ignored.
+
+        Args:
+            data (list): Dictionaries with uid and optionally name, email, role, pfp, car and password.
+            batch_size (int): Users per transaction.
+
+        Returns:
+            dict: Counts of inserted and updated users.
+        """
+        fields = {'uid': '_uid', 'name': '_name', 'email': '_email', 'role': '_role', 'pfp': '_pfp', 'car': '_car'}
+        data = [user_data for user_data in data if user_data.get('uid')]
+        passwords = [user_data['password'] for user_data in data if user_data.get('password')]
+        hashes = iter(hash_passwords(passwords))
+        rows = []
+        for user_data in data:
+            row = {column: user_data[field] for field, column in fields.items() if field in user_data}
+            if user_data.get('password'):
+                row['_password'] = next(hashes)
+            rows.append(row)
+        default_hash = generate_password_hash(app.config['DEFAULT_PASSWORD'], app.config['PASSWORD_HASH_METHOD'], salt_length=10)
+        return upsert_in_batches(User.__table__, rows, key=('_uid',), batch_size=batch_size,
+                                 insert_defaults={'_name': '', '_email': '?', '_password': default_hash})
 
 
 """Database Creation and Testing """
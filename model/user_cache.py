@@ -0,0 +1,155 @@
+"""
+Per-process cache of the users behind API tokens.
+
+token_required used to load the full User row on every guarded request, the most
+frequent query in the app.  Most handlers only need the id, uid, name and role (and
+token_required the token_version), so those are cached for USER_CACHE_TTL seconds as a CachedUser; touching any other
+attribute (read(), update(), pfp, ...) loads the real row once for that request.
+
+Entries are dropped when a User is updated or deleted through the ORM, after the
+commit.  Other gunicorn workers keep their own copy until the TTL expires, which
+bounds how long a role change takes to reach them.
+"""
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes, object_session
+from __init__ import app, db
+from model.user import User
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # (uid, token version) -> (snapshot dict, expires_at)
+_generation = 0  # bumped by every invalidation, so a lookup racing a commit is not cached
+stats = {"hits": 0, "misses": 0}
+
+_SNAPSHOT_FIELDS = ('id', 'uid', 'name', 'role', 'token_version')
+
+class CachedUser:
+    """
+    Stand-in for a User built from a cached snapshot.
+
+    id, uid, name, role and token_version (and their underscored column names) are answered from
+    the snapshot; anything else, including assignments, goes to the real User,
+    which is loaded from the session on first use.
+    """
+
+    def __init__(self, snapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_user', None)
+
+    def _load(self):
+        user = object.__getattribute__(self, '_user')
+        if user is None:
+            user = db.session.get(User, object.__getattribute__(self, '_snapshot')['id'])
+            if user is None:
+                raise LookupError("User no longer exists")
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def __getattr__(self, name):
+        snapshot = object.__getattribute__(self, '_snapshot')
+        field = name.lstrip('_')
+        if field in _SNAPSHOT_FIELDS and object.__getattribute__(self, '_user') is None:
+            return snapshot[field]
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __eq__(self, other):
+        if isinstance(other, CachedUser):
+            other = other._load()
+        return self._load() == other
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, '_snapshot')['id'])
+
+    def __repr__(self):
+        return f"CachedUser({object.__getattribute__(self, '_snapshot')})"
+
+def get_user(uid, version=0):
+    """
+    Returns the user for a token, from the cache when possible.
+
+    Parameters:
+    - uid (str): The token's _uid claim.
+    - version (int): The token version, so tokens issued before a change never match a newer entry.
+
+    Returns:
+    - CachedUser: The user, or None if no user has this uid (not cached).
+    """
+    key = (uid, version)
+    now = time.monotonic()
+    ttl = app.config['USER_CACHE_TTL']
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[1] > now:
+            _entries.move_to_end(key)
+            stats["hits"] += 1
+            return CachedUser(entry[0])
+        generation = _generation
+        stats["misses"] += 1
+
+    user = User.query.filter_by(_uid=uid).first()
+    if user is None:
+        return None
+    snapshot = {field: getattr(user, field) for field in _SNAPSHOT_FIELDS}
+    if ttl > 0:
+        with _lock:
+            if generation == _generation:
+                _entries[key] = (snapshot, now + ttl)
+                _entries.move_to_end(key)
+                while len(_entries) > app.config['USER_CACHE_SIZE']:
+                    _entries.popitem(last=False)
+    cached = CachedUser(snapshot)
+    object.__setattr__(cached, '_user', user)
+    return cached
+
+def invalidate(uids=None):
+    """
+    Drops cached entries for the given uids, or every entry when uids is None.
+
+    Parameters:
+    - uids (iterable, optional): The uids to drop.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        if uids is None:
+            _entries.clear()
+            return
+        uids = set(uids)
+        for key in [key for key in _entries if key[0] in uids]:
+            del _entries[key]
+
+_PENDING = 'user_cache_invalidate'
+
+def _mark(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    # Both the old and the new uid, in case the uid itself changed
+    history = attributes.get_history(target, '_uid')
+    uids = set(history.deleted or ()) | {target._uid}
+    pending = session.info.setdefault(_PENDING, set())
+    if pending is not None:  # None means a bulk statement already asked to drop everything
+        pending.update(uids)
+
+for _name in ('after_update', 'after_delete'):
+    event.listen(User, _name, _mark)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_bulk(state):
+    # Bulk UPDATE/DELETE statements skip the mapper events; drop everything
+    if (state.is_update or state.is_delete) and User.__mapper__ in state.all_mappers:
+        state.session.info[_PENDING] = None
+
+@event.listens_for(Session, 'after_commit')
+def _flush_pending(session):
+    if _PENDING in session.info:
+        invalidate(session.info.pop(_PENDING))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
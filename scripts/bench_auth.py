@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+""" bench_auth.py
+Measures the database cost of token_required per guarded request, with and without the user cache.
+
+Registers a guarded route that only reads g.current_user.id, logs in as the default
+user, then sends N requests through the Flask test client twice: once with
+USER_CACHE_TTL=0 (a user query on every request, the old behaviour) and once with the
+configured TTL. Reports queries and time spent in the database per request.
+With --revoked N it then records N revoked tokens and measures again, to check the
+revocation check keeps guarded requests flat. The seeded rows are removed afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_auth.py --requests 2000
+
+Or run from the root of the project:
+> scripts/bench_auth.py --revoked 100000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+from flask import g
+from sqlalchemy import event
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from api.jwt_authorize import token_required
+from model import user_cache
+from model.token_revocation import RevokedToken, revocation_list
+
+
+class QueryTimer:
+    """Counts statements and the time spent executing them on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        self.seconds = 0.0
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.seconds += time.perf_counter() - conn.info['query_start'].pop()
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+@app.route('/bench/auth')
+@token_required()
+def bench_auth():
+    return {"id": g.current_user.id}
+
+
+def run(client, timer, requests):
+    timer.reset()
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert client.get('/bench/auth').status_code == 200
+    elapsed = time.perf_counter() - start
+    return timer.count / requests, timer.seconds * 1e6 / requests, elapsed * 1e6 / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--revoked', type=int, default=0, help='revoked tokens to seed for a final run')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    response = client.post('/api/authenticate', json={
+        "uid": app.config['DEFAULT_USER'],
+        "password": app.config['DEFAULT_PASSWORD']
+    })
+    if response.status_code != 200:
+        sys.exit(f"Login as {app.config['DEFAULT_USER']} failed: {response.status_code}")
+
+    with app.app_context():
+        timer = QueryTimer(db.engine)
+    ttl = app.config['USER_CACHE_TTL'] or 10
+    for label, cache_ttl in (("no cache", 0), (f"cache ttl={ttl}s", ttl)):
+        app.config['USER_CACHE_TTL'] = cache_ttl
+        user_cache.invalidate()
+        queries, db_us, total_us = run(client, timer, args.requests)
+        print(f"{label:>15}: {queries:.3f} queries/request, "
+              f"{db_us:7.1f} us DB/request, {total_us:7.1f} us/request")
+
+    if args.revoked:
+        prefix = 'bench-'
+        expires_at = time.time() + 3600
+        with app.app_context():
+            db.session.execute(RevokedToken.__table__.insert(), [
+                {"jti": f"{prefix}{uuid.uuid4().hex}", "expires_at": expires_at, "revoked_at": time.time()}
+                for _ in range(args.revoked)
+            ])
+            db.session.commit()
+            revocation_list.sync()
+            try:
+                queries, db_us, total_us = run(client, timer, args.requests)
+                label = f"{len(revocation_list)} revoked"
+                print(f"{label:>15}: {queries:.3f} queries/request, "
+                      f"{db_us:7.1f} us DB/request, {total_us:7.1f} us/request")
+            finally:
+                db.session.execute(RevokedToken.__table__.delete().where(RevokedToken.jti.startswith(prefix)))
+                db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
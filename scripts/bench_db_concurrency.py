@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+""" bench_db_concurrency.py
+Compares SQLite settings under concurrent readers and writers on the guess and leaderboard APIs.
+
+Each configuration runs in its own process, with the settings passed through the
+SQLITE_* environment variables: the old defaults (rollback journal, synchronous
+FULL) and the tuned ones (WAL, synchronous NORMAL, mmap, larger cache). Reader
+threads alternate GET /api/guess and GET /api/leaderboard/top; writer threads
+alternate POST /api/guess and POST /api/leaderboard, like gunicorn's worker threads.
+For each run it prints requests per second, latency percentiles and failed requests
+per kind. Rows written by the benchmark (words prefixed 'bench-') are deleted.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_db_concurrency.py --readers 6 --writers 2 --seconds 10
+
+Or run from the root of the project:
+> scripts/bench_db_concurrency.py
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CONFIGURATIONS = {
+    "rollback journal, synchronous=FULL": {
+        "SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_MMAP_SIZE": "0", "SQLITE_CACHE_SIZE": "-2000"
+    },
+    "WAL, synchronous=NORMAL": {},  # the defaults in __init__.py
+}
+PREFIX = 'bench-'
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else 0.0
+
+
+def worker(client, calls, deadline, results, lock):
+    """Cycles through `calls` until the deadline, recording (kind, seconds, ok)"""
+    local = []
+    i = 0
+    while time.perf_counter() < deadline:
+        kind, call = calls[i % len(calls)]
+        start = time.perf_counter()
+        status = call(client, i).status_code
+        local.append((kind, time.perf_counter() - start, status < 300))
+        i += 1
+    with lock:
+        results.extend(local)
+
+
+def run_child(readers, writers, seconds):
+    """Runs one configuration in this process and prints its results as JSON"""
+    from main import app, db
+    from model.guess import Guess
+    from model.leaderboard import LeaderboardEntry
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app.config['LOGIN_RATE_LIMIT'] = False
+
+    client = app.test_client()
+    client.get('/')  # warm up; the schema comes from `flask custom init_db`
+    response = client.post('/api/authenticate', json={
+        "uid": app.config['ADMIN_USER'], "password": app.config['ADMIN_PASSWORD']
+    })
+    assert response.status_code == 200, response.status_code
+    cookie = client.get_cookie(app.config['JWT_TOKEN_NAME'])
+
+    def new_client():
+        c = app.test_client()
+        c.set_cookie(app.config['JWT_TOKEN_NAME'], cookie.value)
+        return c
+
+    reads = [
+        ('GET /api/guess', lambda c, i: c.get('/api/guess')),
+        ('GET /api/leaderboard/top', lambda c, i: c.get('/api/leaderboard/top')),
+    ]
+    writes = [
+        ('POST /api/guess', lambda c, i: c.post('/api/guess', json={
+            "user_guess": f"{PREFIX}{i}", "correct_word": f"{PREFIX}{i % 7}"})),
+        ('POST /api/leaderboard', lambda c, i: c.post('/api/leaderboard', json={
+            "drawing_name": f"{PREFIX}{threading.get_ident() % 1000}-{i}", "score": i % 1000})),
+    ]
+    results, lock = [], threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(new_client(), reads, deadline, results, lock))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(new_client(), writes, deadline, results, lock))
+                for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        Guess.query.filter(Guess.correct_answer.startswith(PREFIX)).delete(synchronize_session=False)
+        LeaderboardEntry.query.filter(LeaderboardEntry.drawing_name.startswith(PREFIX)).delete(synchronize_session=False)
+        db.session.commit()
+
+    summary = {"journal_mode": mode, "kinds": {}}
+    for kind in [kind for kind, _ in reads + writes]:
+        times = sorted(elapsed for k, elapsed, ok in results if k == kind)
+        summary["kinds"][kind] = {
+            "count": len(times),
+            "failed": sum(1 for k, _, ok in results if k == kind and not ok),
+            "p50": percentile(times, 0.5), "p99": percentile(times, 0.99), "max": percentile(times, 1.0)
+        }
+    print("RESULT " + json.dumps(summary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--readers', type=int, default=6)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.readers, args.writers, args.seconds)
+        return
+
+    for label, settings in CONFIGURATIONS.items():
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--readers', str(args.readers),
+             '--writers', str(args.writers), '--seconds', str(args.seconds)],
+            env={**os.environ, **settings}, capture_output=True, text=True
+        ).stdout
+        lines = [line for line in output.splitlines() if line.startswith('RESULT ')]
+        if not lines:
+            sys.exit(f"{label}: the benchmark process failed")
+        summary = json.loads(lines[-1][len('RESULT '):])
+        print(f"{label} (journal_mode={summary['journal_mode']}), "
+              f"{args.readers} readers + {args.writers} writers for {args.seconds:g} s")
+        for kind, stats in summary["kinds"].items():
+            print(f"  {kind:>24}: {stats['count'] / args.seconds:7.1f} req/s, p50 {stats['p50']:6.1f} ms, "
+                  f"p99 {stats['p99']:7.1f} ms, max {stats['max']:7.1f} ms, {stats['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
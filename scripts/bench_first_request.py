@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+""" bench_first_request.py
+Measures what a freshly booted worker does on its first requests.
+
+Every run starts a new process, like a gunicorn worker after a deploy or restart,
+imports the app and times its first and second GET /api/leaderboard. It also counts
+the schema statements (CREATE, DROP, ALTER, PRAGMA table_info, ...) the first request
+executed and checks that the leaderboard still has the rows and hidden entries it
+had before the restart. Run `flask custom init_db` (or scripts/db_init.py) first so
+the schema exists.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_first_request.py --runs 5
+
+Or run from the root of the project:
+> scripts/bench_first_request.py
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DDL = ('CREATE', 'DROP', 'ALTER', 'PRAGMA MAIN.TABLE_INFO', 'PRAGMA TEMP.TABLE_INFO', 'PRAGMA TABLE_INFO')
+
+
+def leaderboard_state(db, LeaderboardEntry):
+    return {
+        "rows": db.session.query(LeaderboardEntry).count(),
+        "hidden": db.session.query(LeaderboardEntry).filter_by(is_deleted=True).count(),
+    }
+
+
+def run_child():
+    """Boots the app in this process, serves two requests and prints the timings as JSON"""
+    started = time.perf_counter()
+    from sqlalchemy import event
+    from main import app, db
+    from model.leaderboard import LeaderboardEntry
+    imported = time.perf_counter() - started
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+    client = app.test_client()
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        status = client.get('/api/leaderboard').status_code
+        timings.append(time.perf_counter() - start)
+        assert status == 200, status
+        if not timings[1:]:
+            first_statements = list(statements)
+    with app.app_context():
+        after = leaderboard_state(db, LeaderboardEntry)
+    ddl = [s for s in first_statements if s.lstrip().upper().startswith(DDL)]
+    print(json.dumps({
+        "import": imported, "first": timings[0], "second": timings[1],
+        "statements": len(first_statements), "ddl": len(ddl), "after": after
+    }))
+
+
+def run_parent(runs):
+    from main import app, db
+    from model.leaderboard import LeaderboardEntry
+    with app.app_context():
+        before = leaderboard_state(db, LeaderboardEntry)
+        db.session.remove()
+        db.engine.dispose()
+    print(f"Leaderboard before the restarts: {before['rows']} rows, {before['hidden']} hidden")
+
+    results = []
+    for run in range(runs):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"run {run + 1}: import {result['import'] * 1000:.0f} ms, first request "
+              f"{result['first'] * 1000:.1f} ms ({result['statements']} statements, {result['ddl']} schema), "
+              f"second {result['second'] * 1000:.1f} ms, leaderboard {result['after']['rows']} rows, "
+              f"{result['after']['hidden']} hidden")
+
+    def median(key):
+        return statistics.median(result[key] for result in results) * 1000
+
+    print(f"median: first request {median('first'):.1f} ms, second {median('second'):.1f} ms")
+    print("leaderboard preserved across restarts" if all(r['after'] == before for r in results)
+          else "leaderboard CHANGED across restarts")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5, help='worker boots to measure')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+    else:
+        run_parent(args.runs)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+""" bench_grading.py
+Measures the per-submission cost of blind-trace grading at different batch sizes.
+
+Builds a synthetic canvas-sized reference (800x500 by default) and noisy copies of it
+as submissions, then grades them with model.grading.grade_batch at batch sizes 1, 32
+and 256 and reports the time per submission.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_grading.py
+
+Or run from the root of the project:
+> scripts/bench_grading.py [--width 800] [--height 500] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.grading import grade_batch
+
+BATCH_SIZES = [1, 32, 256]
+
+
+def synthetic_images(count, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    reference = np.full((height, width), 255, dtype=np.uint8)
+    rows, cols = np.ogrid[:height, :width]
+    reference[(rows - height // 2) ** 2 + (cols - width // 2) ** 2 < (min(width, height) // 3) ** 2] = 0
+    noise = rng.integers(-40, 40, size=(count, height, width), dtype=np.int16)
+    drawings = np.clip(reference.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return reference, drawings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--width', type=int, default=800)
+    parser.add_argument('--height', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per batch size; the fastest is reported')
+    args = parser.parse_args()
+
+    reference, drawings = synthetic_images(max(BATCH_SIZES), args.width, args.height)
+    print(f"Canvas {args.width}x{args.height}")
+    for batch_size in BATCH_SIZES:
+        batch = drawings[:batch_size]
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = grade_batch(batch, reference)
+            best = min(best, time.perf_counter() - start)
+        print(f"  batch {batch_size:>3}: {best * 1000:8.1f} ms total, "
+              f"{best * 1000 / batch_size:6.2f} ms/submission, "
+              f"mean score {result['score'].mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
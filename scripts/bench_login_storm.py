@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+""" bench_login_storm.py
+Measures latency of an unrelated endpoint while /api/authenticate is flooded with logins.
+
+Starts the app on a local port (threaded, like gunicorn --threads), then a probe process
+requests GET /api/leaderboard every 20 ms and records latencies in three phases:
+- baseline: no logins;
+- storm: N processes each posting --rate valid logins per second, rate limiting on;
+- storm, no rate limit: the same with LOGIN_RATE_LIMIT off, so every attempt is hashed
+  on the password pool (PASSWORD_HASH_WORKERS threads, extra attempts get a 503).
+Reports p50/p99 probe latency and the login status codes seen in each phase.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_login_storm.py --clients 16 --rate 5 --seconds 10
+
+Or run from the root of the project:
+> scripts/bench_login_storm.py
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+from werkzeug.serving import make_server
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app
+
+PROBE_PATH = '/api/leaderboard'
+PROBE_INTERVAL = 0.02
+
+
+def probe(base_url, seconds, results):
+    session = requests.Session()
+    latencies = []
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        start = time.perf_counter()
+        session.get(base_url + PROBE_PATH)
+        latencies.append(time.perf_counter() - start)
+        time.sleep(PROBE_INTERVAL)
+    results.put(latencies)
+
+
+def storm(base_url, seconds, rate, credentials, results):
+    session = requests.Session()
+    statuses = Counter()
+    deadline = time.time() + seconds
+    next_at = time.time()
+    while time.time() < deadline:
+        statuses[session.post(base_url + '/api/authenticate', json=credentials).status_code] += 1
+        next_at += 1 / rate
+        time.sleep(max(0, next_at - time.time()))
+    results.put(statuses)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_phase(label, base_url, seconds, clients, rate):
+    results = multiprocessing.Queue()
+    credentials = {"uid": app.config['DEFAULT_USER'], "password": app.config['DEFAULT_PASSWORD']}
+    stormers = [multiprocessing.Process(target=storm, args=(base_url, seconds, rate, credentials, results))
+                for _ in range(clients)]
+    prober = multiprocessing.Process(target=probe, args=(base_url, seconds, results))
+    for process in stormers + [prober]:
+        process.start()
+    collected = [results.get() for _ in stormers + [prober]]
+    for process in stormers + [prober]:
+        process.join()
+
+    latencies = next(item for item in collected if isinstance(item, list))
+    statuses = sum((item for item in collected if isinstance(item, Counter)), Counter())
+    logins = ', '.join(f"{code}: {count}" for code, count in sorted(statuses.items())) or 'none'
+    print(f"{label:>22}: p50 {percentile(latencies, 0.5) * 1000:6.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.1f} ms over {len(latencies)} probes; logins {logins}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=16, help='login storm processes')
+    parser.add_argument('--rate', type=float, default=5, help='login attempts per second per storm process')
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--port', type=int, default=8298)
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no per-request access log
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{args.port}"
+    requests.get(base_url)  # warm up; the schema comes from `flask custom init_db`
+
+    print(f"Password pool: {app.config['PASSWORD_HASH_WORKERS']} workers, {os.cpu_count()} CPUs")
+    run_phase("baseline", base_url, args.seconds, 0, args.rate)
+    run_phase("storm", base_url, args.seconds, args.clients, args.rate)
+    app.config['LOGIN_RATE_LIMIT'] = False
+    run_phase("storm, no rate limit", base_url, args.seconds, args.clients, args.rate)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
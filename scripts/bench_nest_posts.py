@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+""" bench_nest_posts.py
+Times NestPost listings with per-row read() against the joined NestPost.list_posts().
+
+Seeds N nest posts (titles prefixed 'bench-nest-'), spread over every user and group,
+then for all posts and for one group's posts times the old path (query, then read()
+per row, in a fresh session as each request would be) against list_posts(), counting
+statements and checking both return the same rows. It also walks GET /api/nestPosts
+page by page through its Link headers. Exits non-zero if list_posts() takes more than
+one query or a result differs. The seeded posts are deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_nest_posts.py --posts 5000
+
+Or run from the root of the project:
+> scripts/bench_nest_posts.py
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import event
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.group import Group
+from model.nestPost import NestPost
+from model.user import User
+
+PREFIX = 'bench-nest-'
+
+
+class QueryCounter:
+    """Counts statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def seed(count):
+    user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+    group_ids = [group_id for (group_id,) in db.session.query(Group.id)]
+    db.session.execute(NestPost.__table__.insert(), [{
+        '_title': f"{PREFIX}{i}",
+        '_content': 'bench',
+        '_user_id': user_ids[i % len(user_ids)],
+        '_group_id': group_ids[i % len(group_ids)],
+        '_image_url': 'bench.png'
+    } for i in range(count)])
+    db.session.commit()
+    return group_ids[0]
+
+
+def measure(counter, label, old, new):
+    db.session.remove()
+    start_count, start = counter.count, time.perf_counter()
+    old_rows = old()
+    old_time, old_queries = time.perf_counter() - start, counter.count - start_count
+    db.session.remove()
+    start_count, start = counter.count, time.perf_counter()
+    new_rows, _ = new()
+    new_time, new_queries = time.perf_counter() - start, counter.count - start_count
+    print(f"{label}: {len(new_rows)} posts")
+    print(f"  {'read() per row':>16}: {old_queries:5d} queries, {old_time * 1000:7.1f} ms")
+    print(f"  {'list_posts()':>16}: {new_queries:5d} queries, {new_time * 1000:7.1f} ms")
+    ok = new_queries == 1 and old_rows == new_rows
+    if not ok:
+        print("  <-- list_posts() " + ("differs from read()" if old_rows != new_rows else "took more than one query"))
+    return ok
+
+
+def walk_pages(client, limit):
+    """Follows the Link headers of GET /api/nestPosts; returns the ids seen and the page count"""
+    ids, pages, url = [], 0, f'/api/nestPosts?limit={limit}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+        ids.extend(post['id'] for post in response.get_json())
+        pages += 1
+        link = response.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+    return ids, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    client.get('/')  # warm up; the schema comes from `flask custom init_db`
+
+    with app.app_context():
+        if not db.session.query(Group.id).first():
+            sys.exit("No group to post in; run scripts/db_init.py first")
+        counter = QueryCounter(db.engine)
+        try:
+            group_id = seed(args.posts)
+            ok = measure(counter, "All posts",
+                         lambda: [post.read() for post in NestPost.query.order_by(NestPost.id)],
+                         lambda: NestPost.list_posts())
+            ok &= measure(counter, f"Group {group_id}",
+                          lambda: [post.read() for post in NestPost.query.filter_by(_group_id=group_id).order_by(NestPost.id)],
+                          lambda: NestPost.list_posts(group_id=group_id))
+
+            start = time.perf_counter()
+            ids, pages = walk_pages(client, args.page_size)
+            elapsed = time.perf_counter() - start
+            expected = [post_id for (post_id,) in db.session.query(NestPost.id).order_by(NestPost.id)]
+            print(f"GET /api/nestPosts: {pages} pages of {args.page_size} in {elapsed * 1000:.0f} ms")
+            if ids != expected:
+                print("  <-- pages skipped or repeated posts")
+                ok = False
+        finally:
+            NestPost.query.filter(NestPost._title.startswith(PREFIX)).delete(synchronize_session=False)
+            db.session.commit()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
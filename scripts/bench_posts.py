@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+""" bench_posts.py
+Pins the number of queries behind post listings and times them against per-row read().
+
+Bulk-creates N posts (titles prefixed 'bench-posts-') by the first user in the first
+channel, then for GET /api/posts, GET /api/post/user and POST /api/posts/filter
+counts the statements on the posts table each request runs with 10 and with N+10 posts in the table.
+Exits non-zero if a listing's query count grows with the number of posts. Finally it
+times building the full list with Post.read() per row (the old path) and with
+Post.list_posts(). The seeded posts are deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_posts.py --posts 2000
+
+Or run from the root of the project:
+> scripts/bench_posts.py
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import event
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.channel import Channel
+from model.post import Post
+from model.user import User
+
+PREFIX = 'bench-posts-'
+
+
+class QueryCounter:
+    """Counts statements on an engine that touch the posts table"""
+
+    def __init__(self, engine):
+        self.count = 0
+        self.total = 0  # every statement
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, *args):
+        self.total += 1
+        # Token checks (user cache misses, revocation syncs) come and go with timing
+        if 'posts' in statement:
+            self.count += 1
+
+
+def seed(user, channel, count):
+    rows = [{"title": f"{PREFIX}{i}", "comment": "bench", "channel_id": channel.id, "content": {"i": i}}
+            for i in range(count)]
+    results = Post.bulk_create(rows, user.id)
+    assert results['error_count'] == 0, results['errors'][:5]
+
+
+def listing_queries(client, counter, channel):
+    counts = {}
+    for label, call in (
+        ("GET /api/posts", lambda: client.get('/api/posts')),
+        ("GET /api/post/user", lambda: client.get('/api/post/user')),
+        ("POST /api/posts/filter", lambda: client.post('/api/posts/filter', json={"channel_id": channel.id})),
+    ):
+        start = counter.count
+        assert call().status_code == 200
+        counts[label] = counter.count - start
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--posts', type=int, default=2000)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    client.get('/')  # warm up; the schema comes from `flask custom init_db`
+    response = client.post('/api/authenticate', json={
+        "uid": app.config['ADMIN_USER'],
+        "password": app.config['ADMIN_PASSWORD']
+    })
+    if response.status_code != 200:
+        sys.exit(f"Login as {app.config['ADMIN_USER']} failed: {response.status_code}")
+
+    with app.app_context():
+        user = User.query.filter_by(_uid=app.config['ADMIN_USER']).first()
+        channel = Channel.query.order_by(Channel.id).first()
+        if channel is None:
+            sys.exit("No channel to post in; run scripts/db_init.py first")
+        counter = QueryCounter(db.engine)
+        failed = False
+        try:
+            seed(user, channel, 10)
+            listing_queries(client, counter, channel)  # warm up before counting
+            small = listing_queries(client, counter, channel)
+            seed(user, channel, args.posts)
+            large = listing_queries(client, counter, channel)
+            for label in small:
+                ok = large[label] <= small[label]
+                failed |= not ok
+                print(f"{label:>24}: {small[label]} queries at 10 posts, {large[label]} at {args.posts + 10}"
+                      f"{'' if ok else '  <-- grows with the number of posts'}")
+
+            db.session.expire_all()
+            start_count, start = counter.total, time.perf_counter()
+            old = [post.read() for post in Post.query.all()]
+            old_time, old_queries = time.perf_counter() - start, counter.total - start_count
+            start_count, start = counter.total, time.perf_counter()
+            new, _ = Post.list_posts()
+            new_time, new_queries = time.perf_counter() - start, counter.total - start_count
+            assert old == new, "list_posts() differs from read()"
+            print(f"{'read() per row':>24}: {old_queries} queries, {old_time * 1000:.0f} ms for {len(old)} posts")
+            print(f"{'list_posts()':>24}: {new_queries} queries, {new_time * 1000:.0f} ms for {len(new)} posts")
+        finally:
+            Post.query.filter(Post._title.startswith(PREFIX)).delete(synchronize_session=False)
+            db.session.commit()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+""" bench_restore.py
+Restores a synthetic 100k-row backup into scratch databases, interrupts a restore and resumes it.
+
+Builds a scratch SQLite database with N rows (a few sections, groups and channels,
+N/10 users and the rest posts), backs it up with model/backup.py, then restores it:
+- into an empty database (every row inserted),
+- into the same database again (every row updated; a restore is idempotent),
+- into another empty database in a child process that is killed part way through,
+  then resumed from the checkpoint, and compared row for row with the source.
+Finally a sample of posts is restored the old way, one lookup and commit per row,
+and the time is extrapolated to the whole dump. The application database is not
+touched; all databases live in a temporary directory.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_restore.py --rows 100000
+
+Or run from the root of the project:
+> scripts/bench_restore.py
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.backup import CHECKPOINT, backup_tables, read_manifest, read_table, restore_tables
+
+
+def scratch_engine(directory, name):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    db.metadata.create_all(engine)
+    return engine
+
+
+def seed(engine, rows):
+    tables = db.metadata.tables
+    users = rows // 10
+    posts = rows - users - 7
+    with engine.begin() as conn:
+        conn.execute(tables['sections'].insert(), [{'id': 1, '_name': 'Bench'}])
+        conn.execute(tables['groups'].insert(), [{'id': i, '_name': f'group-{i}', '_section_id': 1} for i in (1, 2)])
+        conn.execute(tables['channels'].insert(),
+                     [{'id': i, '_name': f'channel-{i}', '_group_id': 1 + i % 2, '_attributes': {}} for i in (1, 2, 3, 4)])
+        conn.execute(tables['users'].insert(), [{
+            'id': i, '_name': f'User {i}', '_uid': f'user{i}', '_email': '?',
+            '_password': 'pbkdf2:sha256:1000000$bench$0', '_role': 'User', '_pfp': '', '_token_version': 0
+        } for i in range(1, users + 1)])
+        conn.execute(tables['posts'].insert(), [{
+            'id': i, '_title': f'Post {i}', '_comment': 'c' * 80, '_content': {'n': i, 'tags': ['bench']},
+            '_user_id': 1 + i % users, '_channel_id': 1 + i % 4
+        } for i in range(1, posts + 1)])
+
+
+def snapshot(engine):
+    """Every row of every table, to compare a restored database with the source"""
+    with engine.connect() as conn:
+        return {table.name: conn.execute(select(table).order_by(*table.primary_key.columns)).all()
+                for table in db.metadata.sorted_tables}
+
+
+def restore_in_child(directory, url):
+    with app.app_context():
+        restore_tables(directory, batch_size=1000, engine=create_engine(url))
+
+
+def interrupted_restore(directory, engine, at_rows):
+    """Starts a restore in a child process and kills it once `at_rows` rows are committed"""
+    process = multiprocessing.get_context('spawn').Process(
+        target=restore_in_child, args=(directory, engine.url.render_as_string(hide_password=False)))
+    process.start()
+    checkpoint_path = os.path.join(directory, CHECKPOINT)
+    done = 0
+    while process.is_alive() and done < at_rows:
+        time.sleep(0.05)
+        try:
+            with open(checkpoint_path) as f:
+                done = sum(json.load(f)["tables"].values())
+        except (OSError, ValueError):
+            pass
+    process.kill()
+    process.join()
+    return done
+
+
+def per_row_restore(directory, engine, sample):
+    """The old approach: look each row up by its natural key, then insert or update it and commit"""
+    manifest = read_manifest(directory)
+    posts = db.metadata.tables['posts']
+    entry = next(entry for entry in manifest["tables"] if entry["name"] == 'posts')
+    start = time.perf_counter()
+    count = 0
+    with engine.connect() as conn:
+        for row in read_table(directory, entry, manifest["compression"]):
+            found = conn.execute(select(posts.c.id).where(posts.c._title == row['_title'])).first()
+            if found:
+                conn.execute(posts.update().where(posts.c.id == found.id).values(row))
+            else:
+                conn.execute(posts.insert().values(row))
+            conn.commit()
+            count += 1
+            if count >= sample:
+                break
+    return time.perf_counter() - start, entry["rows"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--sample', type=int, default=2000, help='Posts restored row by row for the old-path estimate')
+    args = parser.parse_args()
+
+    with app.app_context(), tempfile.TemporaryDirectory() as scratch:
+        source = scratch_engine(scratch, 'source.db')
+        seed(source, args.rows)
+        start = time.perf_counter()
+        directory = backup_tables(os.path.join(scratch, 'backup'), 'gzip', engine=source)
+        print(f"{'backup':>28}: {time.perf_counter() - start:6.2f} s")
+        expected = snapshot(source)
+        failed = False
+
+        target = scratch_engine(scratch, 'target.db')
+        for label in ('restore into empty db', 'restore again (updates)'):
+            start = time.perf_counter()
+            results = restore_tables(directory, batch_size=args.batch_size, engine=target)
+            elapsed = time.perf_counter() - start
+            inserted = sum(counts["inserted"] for counts in results.values())
+            updated = sum(counts["updated"] for counts in results.values())
+            print(f"{label:>28}: {elapsed:6.2f} s, {inserted} inserted, {updated} updated, "
+                  f"{(inserted + updated) / elapsed:,.0f} rows/s")
+        if snapshot(target) != expected:
+            print("  <-- restored rows differ from the source")
+            failed = True
+
+        resumed = scratch_engine(scratch, 'resumed.db')
+        done = interrupted_restore(directory, resumed, args.rows * 2 // 5)
+        with resumed.connect() as conn:
+            present = sum(conn.execute(select(func.count()).select_from(table)).scalar()
+                          for table in db.metadata.sorted_tables)
+        print(f"{'killed restore':>28}: {done} rows checkpointed, {present} rows in the database")
+        start = time.perf_counter()
+        restore_tables(directory, batch_size=args.batch_size, engine=resumed)
+        print(f"{'resumed restore':>28}: {time.perf_counter() - start:6.2f} s")
+        if snapshot(resumed) != expected:
+            print("  <-- resumed restore differs from the source")
+            failed = True
+
+        elapsed, total = per_row_restore(directory, scratch_engine(scratch, 'per_row.db'), args.sample)
+        print(f"{'per-row lookup and commit':>28}: {elapsed:6.2f} s for {args.sample} posts, "
+              f"~{elapsed / args.sample * total:,.0f} s for all {total}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
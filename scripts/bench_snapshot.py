@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+""" bench_snapshot.py
+Measures how long writers stall while the SQLite database is snapshotted.
+
+Builds a scratch database (WAL mode by default) of roughly --mb megabytes, starts a
+writer thread committing small inserts as fast as it can, and while it runs takes:
+- a plain file copy (what backup_database used to do; never blocks, may be torn),
+- a paged online backup, a VACUUM INTO and an incremental snapshot (model/snapshots.py).
+For each it reports the writer's commit latency (p50, p99, max) and commits made
+during the copy, then rebuilds the incremental snapshot and checks it passes
+quick_check. The application database is not touched.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_snapshot.py --mb 50
+
+Or run from the root of the project:
+> scripts/bench_snapshot.py --journal delete
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app
+from model.snapshots import list_snapshots, restore_snapshot, snapshot_sqlite, take_snapshot
+
+
+def build(path, megabytes, journal):
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA journal_mode={journal}')
+    conn.execute('CREATE TABLE rows (id INTEGER PRIMARY KEY, body TEXT)')
+    body = 'x' * 1000
+    conn.executemany('INSERT INTO rows (body) VALUES (?)', ((body,) for _ in range(megabytes * 1000)))
+    conn.commit()
+    conn.close()
+
+
+class Writer(threading.Thread):
+    """Commits one small insert after another, recording each commit's latency"""
+
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.latencies = []
+        self.running = True
+
+    def run(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        while self.running:
+            start = time.perf_counter()
+            conn.execute('INSERT INTO rows (body) VALUES (?)', ('y' * 100,))
+            conn.commit()
+            self.latencies.append(time.perf_counter() - start)
+            time.sleep(0.001)
+        conn.close()
+
+
+def measure(label, path, action):
+    writer = Writer(path)
+    writer.start()
+    time.sleep(0.2)
+    before = len(writer.latencies)
+    start = time.perf_counter()
+    detail = action()
+    elapsed = time.perf_counter() - start
+    latencies = sorted(writer.latencies[before:])
+    writer.running = False
+    writer.join()
+    if not latencies:
+        print(f"{label:>18}: {elapsed:6.2f} s, no commits completed during the copy {detail}")
+        return
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000
+    print(f"{label:>18}: {elapsed:6.2f} s, {len(latencies):5d} commits, "
+          f"p50 {p50:6.2f} ms, p99 {p99:7.2f} ms, max {latencies[-1] * 1000:7.2f} ms {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mb', type=int, default=50, help='Approximate database size')
+    parser.add_argument('--journal', default='wal', help='journal_mode of the scratch database (wal, delete, ...)')
+    args = parser.parse_args()
+
+    with app.app_context(), tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'live.db')
+        build(path, args.mb, args.journal)
+        folder = os.path.join(scratch, 'snapshots')
+        print(f"{args.mb} MB database, journal_mode={args.journal}")
+
+        def copy():
+            shutil.copyfile(path, os.path.join(scratch, 'copy.db'))
+            return ''
+
+        def paged():
+            return f"({snapshot_sqlite(os.path.join(scratch, 'paged.db'), source=path)['restarts']} restarts)"
+
+        def vacuum():
+            snapshot_sqlite(os.path.join(scratch, 'vacuum.db'), source=path, method='vacuum')
+            return ''
+
+        measure("file copy", path, copy)
+        measure("paged backup", path, paged)
+        measure("VACUUM INTO", path, vacuum)
+        take_snapshot(folder, source=path)
+        time.sleep(1)  # snapshot names have one-second resolution
+
+        def incremental():
+            stats = take_snapshot(folder, incremental=True, source=path)
+            return f"({stats['pages_changed']} of {stats['pages']} pages, {stats['bytes']} bytes)"
+        measure("incremental", path, incremental)
+
+        rebuilt = os.path.join(scratch, 'rebuilt.db')
+        restore_snapshot(list_snapshots(folder)[-1], rebuilt, folder)
+        count = sqlite3.connect(rebuilt).execute('SELECT count(*) FROM rows').fetchone()[0]
+        print(f"Rebuilt the incremental snapshot: quick_check ok, {count} rows")
+
+
+if __name__ == "__main__":
+    main()
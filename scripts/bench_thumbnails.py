@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+""" bench_thumbnails.py
+Measures the bytes saved by serving thumbnail variants instead of full drawings.
+
+Copies every image in saved_drawings/, drawings/ and instance/uploads/ to a scratch
+directory, generates the THUMBNAIL_SIZES variants on the thumbnail worker pool, and
+reports original vs variant bytes and generation time. Empty or unreadable files are
+skipped.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_thumbnails.py
+
+Or run from the root of the project:
+> scripts/bench_thumbnails.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.thumbnails import THUMBNAIL_SIZES, schedule_variants, variant_path
+
+SAMPLE_DIRS = ['saved_drawings', 'drawings', os.path.join('instance', 'uploads')]
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+
+
+def sample_images(root):
+    for sample_dir in SAMPLE_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(root, sample_dir)):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if filename.lower().endswith(IMAGE_EXTENSIONS) and os.path.getsize(path) > 0:
+                    yield path
+
+
+def main():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    scratch = tempfile.mkdtemp(prefix='bench_thumbnails_')
+    try:
+        originals = []
+        for index, path in enumerate(sample_images(root)):
+            copy = os.path.join(scratch, f"{index}_{os.path.basename(path)}")
+            shutil.copyfile(path, copy)
+            originals.append(copy)
+        if not originals:
+            print("No sample images found")
+            return
+
+        start = time.perf_counter()
+        futures = [schedule_variants(path) for path in originals]
+        generated = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        original_bytes = sum(os.path.getsize(path) for path in originals)
+        print(f"{len(originals)} images, {original_bytes:,} bytes original")
+        for size in THUMBNAIL_SIZES:
+            variant_bytes = sum(
+                os.path.getsize(variant_path(path, size))
+                for path, written in zip(originals, generated) if written
+            )
+            print(f"  {size:>7}: {variant_bytes:>10,} bytes "
+                  f"({original_bytes / max(variant_bytes, 1):.1f}x smaller)")
+        print(f"Generated in {elapsed * 1000:.0f} ms ({elapsed * 1000 / len(originals):.1f} ms/image)")
+    finally:
+        shutil.rmtree(scratch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+""" bench_timer_workers.py
+Measures timer endpoint throughput as the number of gunicorn workers grows.
+
+For each worker count from 1 to --max-workers it starts gunicorn with the database
+competition session store (the one that shares rounds between workers) on a local
+port, logs in the default user and runs --clients client threads for --seconds.
+Each client starts a round with POST /api/competition/timer, then reads it back
+with four GET /api/competition/timer, over and over, so every round a worker reads
+may have been started by another worker.  It prints requests per second, latency
+percentiles and the speedup over one worker.  Throughput can only grow with the
+number of free cores: the clients run on this machine too.
+
+Usage: Run from the terminal as such (gunicorn must be installed):
+
+Goto the scripts directory:
+> cd scripts; ./bench_timer_workers.py --max-workers 4 --clients 32 --seconds 10
+
+Or run from the root of the project:
+> scripts/bench_timer_workers.py
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+# Add the directory containing main.py to the Python path
+PROJECT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT)
+
+from __init__ import app
+
+READS_PER_WRITE = 4
+
+
+def start_server(workers, port):
+    env = dict(os.environ, COMPETITION_SESSION_STORE='database', SKIP_DB_UPGRADE='1', GUNICORN_WORKERS=str(workers))
+    server = subprocess.Popen(
+        ['gunicorn', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'main:app'],
+        cwd=PROJECT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(f"{base_url}/api/competition/timer", timeout=1)
+            return server, base_url
+        except requests.RequestException:
+            time.sleep(0.5)
+    server.kill()
+    raise RuntimeError(f"gunicorn with {workers} workers did not start")
+
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def login(base_url):
+    response = requests.post(f"{base_url}/api/authenticate", json={
+        "uid": app.config['DEFAULT_USER'],
+        "password": app.config['DEFAULT_PASSWORD']
+    })
+    response.raise_for_status()
+    return response.cookies.get(app.config['JWT_TOKEN_NAME'])
+
+
+def client(base_url, token, deadline, results, lock):
+    session = requests.Session()
+    session.cookies.set(app.config['JWT_TOKEN_NAME'], token)
+    local, failed = [], 0
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if i % (READS_PER_WRITE + 1) == 0:
+            response = session.post(f"{base_url}/api/competition/timer", json={"duration": 60})
+        else:
+            response = session.get(f"{base_url}/api/competition/timer")
+        if response.status_code < 300:
+            local.append(time.perf_counter() - start)
+        else:
+            failed += 1
+        i += 1
+    with lock:
+        results['latencies'].extend(local)
+        results['failed'] += failed
+
+
+def run(workers, clients, seconds, port):
+    server, base_url = start_server(workers, port)
+    try:
+        token = login(base_url)
+        results = {'latencies': [], 'failed': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=client, args=(base_url, token, deadline, results, lock))
+                   for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        stop_server(server)
+    latencies = sorted(results['latencies'])
+    return {
+        'rps': len(latencies) / seconds,
+        'p50': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        'failed': results['failed'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-workers', type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--port', type=int, default=8291)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores, {args.clients} clients, {args.seconds}s per run, "
+          f"{READS_PER_WRITE} GETs per POST")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        result = run(workers, args.clients, args.seconds, args.port)
+        baseline = baseline or result['rps']
+        print(f"{workers} workers: {result['rps']:.0f} req/s ({result['rps'] / baseline:.2f}x), "
+              f"p50 {result['p50']:.1f} ms, p99 {result['p99']:.1f} ms, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
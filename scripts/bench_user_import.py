@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+""" bench_user_import.py
+Times a bulk user import through User.bulk_import, the path behind POST /api/users.
+
+Imports N synthetic users (uids prefixed 'bench-import-'), with --with-passwords
+giving every row its own password instead of DEFAULT_PASSWORD, reports the time
+taken, then deletes the imported rows again.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_user_import.py --users 10000
+
+Or run from the root of the project:
+> scripts/bench_user_import.py --users 1000 --with-passwords
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.user import User
+
+PREFIX = 'bench-import-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--with-passwords', action='store_true', help='hash a distinct password per row')
+    args = parser.parse_args()
+
+    rows = [{"name": f"Bench User {i}", "uid": f"{PREFIX}{i}"} for i in range(args.users)]
+    if args.with_passwords:
+        for i, row in enumerate(rows):
+            row["password"] = f"password-{i}"
+
+    with app.app_context():
+        db.create_all()
+        try:
+            start = time.perf_counter()
+            results = User.bulk_import(rows)
+            elapsed = time.perf_counter() - start
+            print(f"{results['success_count']} users imported, {results['error_count']} errors "
+                  f"in {elapsed:.2f}s ({args.users / elapsed:,.0f} users/s)")
+        finally:
+            User.query.filter(User._uid.startswith(PREFIX)).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -22,25 +22,14 @@ General Process outline:
 3. Load Data: The bulk load API in "this" project inserts the data using required business logic.
 
 """
-import shutil
 import sys
 import os
+from flask_migrate import stamp
 
 # Add the directory containing main.py to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Import application object
-from main import app, db, generate_data
-
-# Backup the old database
-def backup_database(db_uri, backup_uri):
-    """Backup the current database."""
-    if backup_uri:
-        db_path = db_uri.replace('sqlite:///', 'instance/')
-        backup_path = backup_uri.replace('sqlite:///', 'instance/')
-        shutil.copyfile(db_path, backup_path)
-        print(f"Database backed up to {backup_path}")
-    else:
-        print("Backup not supported for production database.")
+from main import app, db, generate_data, backup_database
 
 # Main extraction and loading process
 def main():
@@ -78,6 +67,8 @@ def main():
             # Create the tables defined in the project
             print("Generating data.")
             generate_data()
+            # The tables match the newest migration, so later upgrades start from there
+            stamp()
                         
     except Exception as e:
         print(f"An error occurred: {e}")
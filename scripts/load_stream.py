@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+""" load_stream.py
+Compares request volume of timer polling against the /api/competition/stream SSE endpoint.
+
+Starts the app on a local port, logs in as the default user, then runs N simulated
+players for a fixed number of seconds:
+- poll: each player GETs /api/competition/timer once per second (the current client behaviour).
+- stream: each player holds one /api/competition/stream connection and reads pushed events.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./load_stream.py --clients 50 --seconds 10
+
+Or run from the root of the project:
+> scripts/load_stream.py
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app
+
+
+class RequestCounter:
+    """WSGI middleware counting requests that reach the app"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.count += 1
+        return self.wsgi_app(environ, start_response)
+
+
+def login(base_url):
+    session = requests.Session()
+    response = session.post(f"{base_url}/api/authenticate", json={
+        "uid": app.config['DEFAULT_USER'],
+        "password": app.config['DEFAULT_PASSWORD']
+    })
+    response.raise_for_status()
+    # The auth cookie is marked secure; resend it over plain http to the local server
+    for cookie in session.cookies:
+        cookie.secure = False
+    return session
+
+
+def poll_player(session, base_url, seconds, results):
+    deadline = time.time() + seconds
+    received = 0
+    while time.time() < deadline:
+        if session.get(f"{base_url}/api/competition/timer").ok:
+            received += 1
+        time.sleep(1)
+    results.append(received)
+
+
+def stream_player(session, base_url, seconds, results):
+    deadline = time.time() + seconds
+    received = 0
+    with session.get(f"{base_url}/api/competition/stream", stream=True, timeout=seconds + 5) as response:
+        for line in response.iter_lines():
+            if line.startswith(b"data:"):
+                received += 1
+            if time.time() >= deadline:
+                break
+    results.append(received)
+
+
+def run(mode, clients, seconds, base_url, counter):
+    session = login(base_url)
+    session.post(f"{base_url}/api/competition/timer", json={"duration": seconds * 2})
+    start = counter.count
+    results = []
+    target = poll_player if mode == 'poll' else stream_player
+    threads = [threading.Thread(target=target, args=(session, base_url, seconds, results)) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests_made = counter.count - start
+    print(f"{mode:>6}: {clients} clients, {seconds}s -> {requests_made} requests "
+          f"({requests_made / seconds:.1f} req/s), {sum(results)} updates received")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--port', type=int, default=8299)
+    args = parser.parse_args()
+
+    counter = RequestCounter(app.wsgi_app)
+    app.wsgi_app = counter
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    with app.app_context():
+        requests.get(base_url)  # warm up; the schema comes from `flask custom init_db`
+        run('poll', args.clients, args.seconds, base_url, counter)
+        run('stream', args.clients, args.seconds, base_url, counter)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
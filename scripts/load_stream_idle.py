@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+""" load_stream_idle.py
+Holds many idle /api/competition/stream connections open against a running deployment.
+
+Logs in through --api as the default user, opens --connections SSE streams to
+--stream (the API itself by default) and keeps them open for --seconds while it:
+- times GET /api/competition/timer on --api every 100 ms, showing whether the open
+  streams starve the API's worker threads;
+- starts a round through --api and counts the streams that receive its round_start
+  event, which has to cross from the API process to the stream process.
+Streams are plain non-blocking sockets, so one client process can hold thousands.
+
+Usage: Start the deployment, e.g. the two gunicorn services of docker-compose.yml:
+> gunicorn --workers=1 --threads=8 --bind=127.0.0.1:8203 main:app
+> SKIP_DB_UPGRADE=1 gunicorn --worker-class=gevent --worker-connections=4000 --bind=127.0.0.1:8204 main:app
+
+Goto the scripts directory:
+> cd scripts; ./load_stream_idle.py --api http://127.0.0.1:8203 --stream http://127.0.0.1:8204 --connections 2000
+
+Or run from the root of the project:
+> scripts/load_stream_idle.py --connections 2000
+"""
+import argparse
+import os
+import resource
+import selectors
+import socket
+import statistics
+import sys
+import time
+from urllib.parse import urlparse
+
+import requests
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from __init__ import app
+
+MARKER = b"event: round_start"
+
+
+class Stream:
+    """One SSE connection driven by the selector"""
+
+    def __init__(self, request):
+        self.pending = request
+        self.status = None
+        self.tail = b""
+        self.round_started = False
+        self.closed = False
+
+
+def login(api):
+    session = requests.Session()
+    response = session.post(f"{api}/api/authenticate", json={
+        "uid": app.config['DEFAULT_USER'],
+        "password": app.config['DEFAULT_PASSWORD']
+    })
+    response.raise_for_status()
+    # The auth cookie is marked secure; resend it over plain http to a local server
+    for cookie in session.cookies:
+        cookie.secure = False
+    return session, session.cookies.get(app.config['JWT_TOKEN_NAME'])
+
+
+def open_streams(selector, url, token, count):
+    host, port = url.hostname, url.port or 80
+    request = (f"GET /api/competition/stream HTTP/1.1\r\nHost: {host}:{port}\r\n"
+               f"Cookie: {app.config['JWT_TOKEN_NAME']}={token}\r\nAccept: text/event-stream\r\n\r\n").encode()
+    streams = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.connect_ex((host, port))
+        stream = Stream(request)
+        selector.register(sock, selectors.EVENT_WRITE | selectors.EVENT_READ, stream)
+        streams.append(stream)
+    return streams
+
+
+def pump(selector, timeout):
+    """Send pending requests and read whatever the streams received"""
+    for key, mask in selector.select(timeout):
+        sock, stream = key.fileobj, key.data
+        try:
+            if mask & selectors.EVENT_WRITE and stream.pending:
+                sent = sock.send(stream.pending)
+                stream.pending = stream.pending[sent:]
+                if not stream.pending:
+                    selector.modify(sock, selectors.EVENT_READ, stream)
+            if mask & selectors.EVENT_READ:
+                data = sock.recv(65536)
+                if not data:
+                    raise ConnectionError("closed")
+                if stream.status is None and data.startswith(b"HTTP/"):
+                    stream.status = int(data.split(b" ", 2)[1])
+                if MARKER in stream.tail + data:
+                    stream.round_started = True
+                stream.tail = data[-len(MARKER):]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            stream.closed = True
+            selector.unregister(sock)
+            sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--api', default='http://127.0.0.1:8203', help='base URL of the API workers')
+    parser.add_argument('--stream', default=None, help='base URL serving /api/competition/stream (default: --api)')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--seconds', type=int, default=10)
+    args = parser.parse_args()
+    stream_url = urlparse(args.stream or args.api)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, min(hard, args.connections + 256)), hard))
+
+    session, token = login(args.api)
+    selector = selectors.DefaultSelector()
+    started = time.perf_counter()
+    streams = open_streams(selector, stream_url, token, args.connections)
+
+    latencies, failures = [], 0
+    round_started_at = None
+    deadline = started + args.seconds
+    next_probe = time.perf_counter()
+    while time.perf_counter() < deadline:
+        pump(selector, 0.01)
+        if time.perf_counter() >= next_probe:
+            next_probe += 0.1
+            start = time.perf_counter()
+            try:
+                ok = session.get(f"{args.api}/api/competition/timer", timeout=2).ok
+            except requests.RequestException:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1
+        if round_started_at is None and time.perf_counter() >= started + args.seconds / 2:
+            round_started_at = time.perf_counter()
+            try:
+                session.post(f"{args.api}/api/competition/timer", json={"duration": 60}, timeout=5)
+            except requests.RequestException as e:
+                print(f"Could not start a round: {e}")
+
+    established = sum(1 for stream in streams if stream.status == 200)
+    open_now = sum(1 for stream in streams if stream.status == 200 and not stream.closed)
+    delivered = sum(1 for stream in streams if stream.round_started)
+    latencies.sort()
+    print(f"streams: {established} of {args.connections} established, {open_now} still open, "
+          f"{delivered} received round_start")
+    if latencies:
+        print(f"API GET /api/competition/timer while holding them: {len(latencies)} ok, {failures} failed, "
+              f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    else:
+        print(f"API GET /api/competition/timer while holding them: 0 ok, {failures} failed")
+
+
+if __name__ == "__main__":
+    main()